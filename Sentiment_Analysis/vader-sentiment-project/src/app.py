@@ -1,5 +1,7 @@
 from vader_sentiment import SentimentAnalyzer
 from vader_sentiment import structure
+from vader_sentiment.budget import AnalysisBudget
+from vader_sentiment.resources import RESOURCES
 import sys
 import re
 try:
@@ -43,17 +45,9 @@ def split_sentences(text):
 
 def split_words(text):
     # basic word tokenization using nltk for better tokens if available
-    if NLTK_AVAILABLE:
+    if NLTK_AVAILABLE and RESOURCES.tokenizer_ready():
         try:
             tokens = nltk.word_tokenize(text)
-        except LookupError:
-            # try to download 'punkt' once and retry
-            try:
-                print("NLTK punkt tokenizer not found — downloading...")
-                nltk.download('punkt', quiet=True)
-                tokens = nltk.word_tokenize(text)
-            except Exception:
-                tokens = re.findall(r"\b[\w']+\b|[^\s\w]", text)
         except Exception:
             tokens = re.findall(r"\b[\w']+\b|[^\s\w]", text)
     else:
@@ -151,28 +145,14 @@ def print_structure_analysis(result):
     print(f"vader scores: pos={vs['pos']:.3f}, neu={vs['neu']:.3f}, neg={vs['neg']:.3f}, compound={vs['compound']:.3f}")
 
 # new: summary generator (sentence-level and overall)
-def _ensure_nltk_resource(name):
-    if not NLTK_AVAILABLE:
-        return False
-    try:
-        nltk.data.find(name)
-        return True
-    except LookupError:
-        try:
-            print(f"NLTK resource {name} not found — downloading...")
-            nltk.download(name.split('/')[-1], quiet=True)
-            return True
-        except Exception:
-            return False
-
 def get_nearest_noun(tokens, target_index):
     """
     Return nearest noun token to target_index using POS tags if available,
     otherwise simple heuristic (previous/next alphabetic token).
     """
-    if NLTK_AVAILABLE and _ensure_nltk_resource('taggers/averaged_perceptron_tagger'):
+    if NLTK_AVAILABLE:
         try:
-            tags = nltk.pos_tag(tokens)
+            tags = RESOURCES.pos_tag(tokens) or []
             # search outward from target_index
             for dist in range(0, max(len(tokens), 5)):
                 for idx in (target_index - dist, target_index + dist):
@@ -190,12 +170,27 @@ def get_nearest_noun(tokens, target_index):
             return tokens[idx]
     return None
 
+# The sentence-pair checks below are quadratic in the number of sentences.
+CONTEXT_BUDGET = AnalysisBudget(max_chars=20000, max_sentences=200, max_tokens=None)
+
 # new: expanded contextual detector for fighting, theft, rule-breaking, emergencies, bullying, weapons, etc.
-def detect_contextual_issue(text):
+def detect_contextual_issue(text, budget=CONTEXT_BUDGET):
     """
     Heuristic detector returning None or a dict:
       {'override':'negative', 'reason': str, 'tags': [...], 'severity': 'low|medium|high'}
+
+    Text over the budget is sampled (head and tail kept); a detection made on
+    a sample also has 'approximate': True.
     """
+    report = None
+    if budget is not None:
+        text, report = budget.sample(text)
+    issue = _detect_contextual_issue(text)
+    if issue is not None and report is not None:
+        issue["approximate"] = True
+    return issue
+
+def _detect_contextual_issue(text):
     t = text.lower()
     sents = split_sentences(t)
 
@@ -431,6 +426,8 @@ def _severity_to_adjusted_compound(sev):
     return {"low": -0.30, "medium": -0.60, "high": -0.90}.get(sev, -0.60)
 
 def main():
+    # Interactive use may fetch missing NLTK data once, up front.
+    RESOURCES.load(download=True)
     analyzer = SentimentAnalyzer()
     if len(sys.argv) > 1:
         text = " ".join(sys.argv[1:])
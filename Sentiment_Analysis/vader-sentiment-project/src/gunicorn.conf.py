@@ -0,0 +1,30 @@
+"""
+Gunicorn settings for the support server.
+
+Analysis is CPU-bound, so throughput scales with worker processes rather
+than threads. ``preload_app`` builds the app (and warms the analyzer) once
+in the master; forked workers then share the lexicon pages copy-on-write.
+
+With ``SUPPORT_THREADS`` above 1 each worker is a gthread worker, and the
+app's admission control (which reads the same setting) can queue, shed and
+degrade analysis requests within a worker.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("SUPPORT_BIND", "127.0.0.1:5000")
+workers = int(os.environ.get("SUPPORT_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("SUPPORT_THREADS", 1))
+worker_class = "gthread" if threads > 1 else "sync"
+preload_app = True
+timeout = 30
+loglevel = "warning"
+accesslog = None
+
+
+def when_ready(server):
+    # Move everything allocated during preload into the permanent generation
+    # so the collector never touches (and copies) those pages in the workers.
+    gc.freeze()
@@ -0,0 +1,351 @@
+"""
+Load generator for the support server.
+
+Replays a weighted mix of API calls and reports throughput, error rate and
+latency percentiles per route as JSON, so runs can be compared across
+versions:
+
+    # in-process (Flask test client, temporary database)
+    python loadgen.py --in-process --duration 20 --concurrency 8 --output before.json
+
+    # against a running server, open-loop at 50 requests/second
+    python loadgen.py --url http://127.0.0.1:5000 --rate 50 --duration 30
+
+Fixed concurrency (closed loop) runs N workers that each send the next
+request as soon as the previous one returns. Fixed arrival rate (open loop)
+starts requests on a schedule regardless of how fast the server answers;
+latency is measured from the scheduled start, so queueing delay is counted
+instead of hidden.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+DEFAULT_MIX = "submit=4,analyze=3,stats=2,list=1"
+PERCENTILES = (50, 90, 95, 99)
+
+# name -> (method, path, needs a message)
+ROUTES = {
+    "submit": ("POST", "/api/tickets", True),
+    "analyze": ("POST", "/api/analyze", True),
+    "stats": ("GET", "/api/stats", False),
+    "list": ("GET", "/api/tickets", False),
+}
+
+_OPENINGS = ["Hi team,", "Hello,", "URGENT:", "", "Quick question -", "I'm really upset."]
+_PROBLEMS = [
+    "the system is down and I cannot log in",
+    "my refund still hasn't arrived after two weeks",
+    "the dashboard is very slow today",
+    "someone hacked my account and changed the password",
+    "the export button does nothing",
+    "I was charged twice for the same order",
+    "the mobile app crashes when I open settings",
+]
+_ENDINGS = ["Please help!!", "Thanks in advance.", "Fix this ASAP!", "Love the product otherwise :)", "", "???"]
+
+
+def synthetic_corpus(size=200, seed=0):
+    """Reproducible ticket-like messages built from canned phrases."""
+    rng = random.Random(seed)
+    return [
+        " ".join(p for p in (rng.choice(_OPENINGS), rng.choice(_PROBLEMS).capitalize() + ".", rng.choice(_ENDINGS)) if p)
+        for _ in range(size)
+    ]
+
+
+def load_corpus(path):
+    """
+    Messages from a recorded file: JSONL with a "message" (or "text") field,
+    or plain text with one message per line.
+    """
+    messages = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                record = json.loads(line)
+                line = record.get("message") or record.get("text") or ""
+            if line:
+                messages.append(line)
+    if not messages:
+        raise ValueError(f"No messages in corpus {path}")
+    return messages
+
+
+def parse_mix(spec):
+    """'submit=4,stats=1' -> {'submit': 4.0, 'stats': 1.0}."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES:
+            raise ValueError(f"Unknown route {name!r}; expected one of {', '.join(ROUTES)}")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("The mix needs at least one route with a positive weight")
+    return mix
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def build_request(name, message):
+    method, path, needs_message = ROUTES[name]
+    body = None
+    if needs_message:
+        payload = {"text": message} if name == "analyze" else {"message": message, "customer_name": "loadgen"}
+        body = json.dumps(payload).encode("utf-8")
+    return method, path, body
+
+
+# ============ TRANSPORTS ============
+
+class InProcessTransport:
+    """Calls the Flask app through its test client (one client per thread)."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        resp = client.open(path, method=method, data=body, content_type="application/json")
+        resp.get_data()
+        return resp.status_code
+
+
+class HTTPTransport:
+    """Keep-alive HTTP/1.1 connection per thread to a running server."""
+
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def request(self, method, path, body):
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        try:
+            conn = self._conn()
+            conn.request(method, self.prefix + path, body=body, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            return resp.status
+        except (OSError, http.client.HTTPException):
+            # Drop the connection so the next request reconnects.
+            self._local.conn = None
+            raise
+
+
+# ============ RUNNER ============
+
+class Recorder:
+    """Thread-safe per-route latency and error collection."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, name, latency, status):
+        with self._lock:
+            self.latencies[name].append(latency)
+            self.statuses[name][str(status)] += 1
+            if not isinstance(status, int) or status >= 400:
+                self.errors[name] += 1
+
+    def report(self, elapsed):
+        def summarize(latencies, errors, statuses):
+            latencies = sorted(latencies)
+            count = len(latencies)
+            summary = {
+                "requests": count,
+                "errors": errors,
+                "error_rate": round(errors / count, 4) if count else 0.0,
+                "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+                "latency_ms": {
+                    "mean": round(sum(latencies) / count * 1000, 3) if count else None,
+                    **{f"p{p}": round(percentile(latencies, p) * 1000, 3) if count else None for p in PERCENTILES},
+                    "max": round(latencies[-1] * 1000, 3) if count else None,
+                },
+            }
+            if statuses is not None:
+                summary["status_codes"] = dict(statuses)
+            return summary
+
+        with self._lock:
+            routes = {name: summarize(self.latencies[name], self.errors[name], self.statuses[name])
+                      for name in sorted(self.latencies)}
+            everything = [v for values in self.latencies.values() for v in values]
+            overall = summarize(everything, sum(self.errors.values()), None)
+        return overall, routes
+
+
+def run_load(transport, mix, corpus, concurrency=8, rate=None, duration=10.0, max_requests=None, seed=0):
+    """
+    Drive transport with the weighted route mix.
+
+    rate: requests per second for an open-loop run; None runs closed-loop
+          with `concurrency` workers.
+    duration / max_requests: stop after whichever limit is reached first.
+
+    Returns (overall, routes, elapsed_seconds).
+    """
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    recorder = Recorder()
+    lock = threading.Lock()
+    rng = random.Random(seed)
+    issued = [0]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def next_call():
+        """Next (route, message), or None when a limit is reached."""
+        with lock:
+            if max_requests is not None and issued[0] >= max_requests:
+                return None
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            issued[0] += 1
+            return rng.choices(names, weights)[0], rng.choice(corpus)
+
+    def execute(name, message, started):
+        method, path, body = build_request(name, message)
+        try:
+            status = transport.request(method, path, body)
+        except Exception as e:
+            status = type(e).__name__
+        recorder.record(name, time.perf_counter() - started, status)
+
+    start = time.perf_counter()
+    if rate is None:
+        def worker():
+            while True:
+                call = next_call()
+                if call is None:
+                    return
+                execute(*call, time.perf_counter())
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        interval = 1.0 / rate
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            scheduled = start
+            while True:
+                call = next_call()
+                if call is None:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(execute, *call, scheduled)
+                scheduled += interval
+    elapsed = time.perf_counter() - start
+    overall, routes = recorder.report(elapsed)
+    return overall, routes, elapsed
+
+
+def in_process_app(storage="sqlite", db_path=None):
+    """Support server app for in-process runs (temporary database unless db_path is given)."""
+    from support_server import create_app
+    if storage == "sqlite" and db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="loadgen-"), "tickets.db")
+    return create_app({"STORAGE": storage, "DB_PATH": db_path, "WARM_UP": True})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the support server and report latency percentiles.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--in-process", action="store_true", help="drive the Flask app through its test client")
+    target.add_argument("--url", help="base URL of a running server, e.g. http://127.0.0.1:5000")
+    parser.add_argument("--storage", default="sqlite", choices=("sqlite", "memory"),
+                        help="storage engine for --in-process runs")
+    parser.add_argument("--db", help="database path for --in-process runs (default: a temporary file)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted routes (default: {DEFAULT_MIX})")
+    parser.add_argument("--corpus", help="recorded messages (JSONL with a message field, or one per line)")
+    parser.add_argument("--corpus-size", type=int, default=200, help="synthetic corpus size")
+    parser.add_argument("--concurrency", type=int, default=8, help="workers (closed loop) or max in flight (open loop)")
+    parser.add_argument("--rate", type=float, help="fixed arrival rate in requests/second (open loop)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--label", help="free-form label stored in the report (e.g. a git revision)")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.corpus_size, args.seed)
+    if args.in_process:
+        transport = InProcessTransport(in_process_app(args.storage, args.db))
+        target_desc = f"in-process ({args.storage})"
+    else:
+        transport = HTTPTransport(args.url)
+        target_desc = args.url
+
+    overall, routes, elapsed = run_load(
+        transport, mix, corpus,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        duration=args.duration,
+        max_requests=args.requests,
+        seed=args.seed,
+    )
+    report = {
+        "label": args.label,
+        "target": target_desc,
+        "mode": "open-loop" if args.rate else "closed-loop",
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "mix": mix,
+        "corpus": args.corpus or f"synthetic:{len(corpus)}",
+        "elapsed_seconds": round(elapsed, 3),
+        "python": platform.python_version(),
+        "overall": overall,
+        "routes": routes,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,501 @@
+"""
+Asyncio (ASGI) variant of the support server.
+
+Exposes the same routes as support_server.py, but analysis for
+POST /api/analyze and POST /api/tickets is micro-batched: requests arriving
+within BATCH_MAX_WAIT_MS of each other are scored together on one executor
+thread instead of one thread per request.
+
+Run with any ASGI server, e.g.:
+    uvicorn --factory support_asgi:create_app --port 5000
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import traceback
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from vader_sentiment import compact, export, resources
+from vader_sentiment.analyzer import create_analyzer
+from vader_sentiment.batching import MicroBatcher
+from vader_sentiment.ticket_prioritizer import TicketPrioritizer
+from vader_sentiment.storage import create_store
+
+from support_server import (
+    DEFAULT_CONFIG as WSGI_DEFAULT_CONFIG, apply_customer_profile, build_dedup_index,
+    claim_next, lexicon_profile_arg, match_duplicate, priority_data_from_ticket,
+    record_signature,
+    stored_signature, warm_up,
+)
+
+DEFAULT_CONFIG = dict(WSGI_DEFAULT_CONFIG, **{
+    "BATCH_MAX_SIZE": 32,
+    "BATCH_MAX_WAIT_MS": 5,
+    "BATCH_MAX_IN_FLIGHT": 1,
+})
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+VALID_STATUSES = ['new', 'in-progress', 'resolved']
+
+logger = logging.getLogger("support_asgi")
+
+
+def load_config(config=None):
+    """DEFAULT_CONFIG, then SUPPORT_* environment variables, then the explicit mapping."""
+    cfg = dict(DEFAULT_CONFIG)
+    for key, value in os.environ.items():
+        if key.startswith("SUPPORT_"):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+            cfg[key[len("SUPPORT_"):]] = value
+    if config:
+        cfg.update(config)
+    return cfg
+
+
+def create_app(config=None):
+    """Build the ASGI application (use as ``uvicorn --factory``)."""
+    return SupportASGIApp(load_config(config))
+
+
+class Request:
+    """Request body plus parsed query string (first value per key)."""
+
+    __slots__ = ("body", "args")
+
+    def __init__(self, body, query_string):
+        self.body = body
+        self.args = {k: v[0] for k, v in parse_qs(query_string.decode("latin-1")).items()}
+
+    def json(self):
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+class Streaming:
+    """Handler payload for a chunked response: an iterator of text chunks plus extra headers."""
+
+    __slots__ = ("chunks", "headers")
+
+    def __init__(self, chunks, headers=None):
+        self.chunks = chunks
+        self.headers = headers or {}
+
+
+class SupportASGIApp:
+    """Minimal ASGI application serving the support API."""
+
+    def __init__(self, config):
+        self.config = config
+        self.debug = bool(config["DEBUG"])
+        logger.setLevel(config["LOG_LEVEL"])
+
+        resources.load_from_config(config)
+        self.analyzer = create_analyzer(config)
+        self.prioritizer = TicketPrioritizer(self.analyzer)
+        self.store = create_store(config)
+        self.scoring_version = self.prioritizer.scoring_version()
+        self.dedup = build_dedup_index(config, self.store)
+        self.lease_seconds = float(config["QUEUE_LEASE_SECONDS"])
+        if config["WARM_UP"]:
+            warm_up(self.analyzer, self.prioritizer)
+
+        self.batcher = MicroBatcher(
+            self._score_batch,
+            max_batch_size=int(config["BATCH_MAX_SIZE"]),
+            max_wait=float(config["BATCH_MAX_WAIT_MS"]) / 1000.0,
+            max_in_flight=int(config["BATCH_MAX_IN_FLIGHT"]),
+        )
+        self.routes = [
+            ("GET", re.compile(r"^/$"), self.index),
+            ("GET", re.compile(r"^/api/tickets$"), self.get_tickets),
+            ("POST", re.compile(r"^/api/tickets$"), self.submit_ticket),
+            ("GET", re.compile(r"^/api/tickets/search$"), self.search_tickets),
+            ("GET", re.compile(r"^/api/tickets/clusters$"), self.get_duplicate_clusters),
+            ("GET", re.compile(r"^/api/tickets/aging$"), self.get_aging_queue),
+            ("GET", re.compile(r"^/api/tickets/export$"), self.export_tickets),
+            ("GET", re.compile(r"^/api/tickets/(?P<ticket_id>\d+)$"), self.get_ticket),
+            ("DELETE", re.compile(r"^/api/tickets/(?P<ticket_id>\d+)$"), self.delete_ticket),
+            ("PATCH", re.compile(r"^/api/tickets/(?P<ticket_id>\d+)/status$"), self.update_ticket_status),
+            ("GET", re.compile(r"^/api/stats$"), self.get_stats),
+            ("GET", re.compile(r"^/api/trends$"), self.get_trends),
+            ("POST", re.compile(r"^/api/queue/next$"), self.claim_next_ticket),
+            ("POST", re.compile(r"^/api/queue/(?P<ticket_id>\d+)/release$"), self.release_ticket),
+            ("POST", re.compile(r"^/api/analyze$"), self.analyze_text),
+        ]
+
+    # ============ BATCHED ANALYSIS ============
+
+    def _score_batch(self, items):
+        """
+        Executor-side batch handler. items: list of (text, with_analysis, lexicon_profile).
+        Identical texts within a batch are analyzed once per lexicon profile.
+        """
+        results = []
+        memo = {}
+        for text, with_analysis, profile in items:
+            try:
+                if (text, profile) not in memo:
+                    analysis = self.analyzer.analyze(text, compact=True, profile=profile)
+                    memo[text, profile] = (analysis, self.prioritizer.prioritize(text, analysis=analysis))
+                analysis, priority_data = memo[text, profile]
+                results.append((analysis if with_analysis else None, dict(priority_data)))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    # ============ ASGI PLUMBING ============
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        method = scope["method"]
+        path = scope["path"]
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            kwargs = {k: int(v) for k, v in match.groupdict().items()}
+            req = Request(await self._read_body(receive), scope.get("query_string", b""))
+            status, payload, content_type = await handler(req, **kwargs)
+            await self._respond(send, status, payload, content_type)
+            return
+        if allowed:
+            await self._respond(send, 405, {"error": "Method not allowed"})
+        else:
+            await self._respond(send, 404, {"error": "Not found"})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.batcher.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.batcher.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive):
+        chunks = []
+        more = True
+        while more:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more = message.get("more_body", False)
+        return b"".join(chunks)
+
+    async def _respond(self, send, status, payload, content_type="application/json"):
+        if isinstance(payload, Streaming):
+            await self._stream(send, status, payload, content_type)
+            return
+        if not isinstance(payload, bytes):
+            payload = compact.dumps(payload).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", content_type.encode("latin-1")),
+                (b"content-length", str(len(payload)).encode("latin-1")),
+                (b"access-control-allow-origin", b"*"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    async def _stream(self, send, status, payload, content_type):
+        """Send a Streaming payload as a chunked response, pulling chunks off the event loop."""
+        loop = asyncio.get_running_loop()
+        headers = [(b"content-type", content_type.encode("latin-1")), (b"access-control-allow-origin", b"*")]
+        headers.extend((k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in payload.headers.items())
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        chunks = iter(payload.chunks)
+        while True:
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            if chunk is None:
+                break
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    def _error(self, message, status=500):
+        body = {"error": message}
+        if self.debug:
+            body["traceback"] = traceback.format_exc()
+        return status, body, "application/json"
+
+    async def _store_call(self, fn, *args, **kwargs):
+        """Run a blocking storage call off the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: fn(*args, **kwargs))
+
+    # ============ ROUTES ============
+
+    async def index(self, req):
+        """Serve the dashboard."""
+        html = (TEMPLATE_DIR / "support_dashboard.html").read_bytes()
+        return 200, html, "text/html; charset=utf-8"
+
+    async def get_tickets(self, req):
+        """Get all tickets, grouped by priority."""
+        try:
+            grouped = await self._store_call(self.store.get_tickets_by_priority)
+            stats = await self._store_call(self.store.get_stats)
+            return 200, {'success': True, 'tickets': grouped, 'stats': stats}, "application/json"
+        except Exception as e:
+            logger.exception("Error fetching tickets")
+            return self._error(str(e))
+
+    async def search_tickets(self, req):
+        """Full-text search over ticket messages."""
+        query = req.args.get("q", "").strip()
+        if not query:
+            return 400, {"error": "Query parameter 'q' is required"}, "application/json"
+        try:
+            limit = min(int(req.args.get("limit", 50)), 500)
+            offset = int(req.args.get("offset", 0))
+        except ValueError:
+            return 400, {"error": "limit and offset must be integers"}, "application/json"
+        try:
+            results = await self._store_call(
+                self.store.search, query,
+                status=req.args.get("status") or None,
+                priority=req.args.get("priority") or None,
+                limit=limit, offset=offset,
+            )
+            return 200, {'success': True, 'query': query, 'count': len(results), 'tickets': results}, "application/json"
+        except Exception as e:
+            logger.exception("Error searching tickets")
+            return self._error(str(e))
+
+    async def get_aging_queue(self, req):
+        """Tickets oldest-most-urgent first, each with its aged_score."""
+        try:
+            limit = min(int(req.args.get("limit", 50)), 500)
+        except ValueError:
+            return 400, {"error": "limit must be an integer"}, "application/json"
+        try:
+            tickets = await self._store_call(self.store.get_aging_queue,
+                                             status=req.args.get("status", "new") or None, limit=limit)
+            return 200, {'success': True, 'aging_per_hour': self.store.aging_per_hour, 'count': len(tickets),
+                         'tickets': tickets}, "application/json"
+        except Exception as e:
+            logger.exception("Error fetching aging queue")
+            return self._error(str(e))
+
+    async def get_duplicate_clusters(self, req):
+        """Original tickets with their near-duplicates, largest clusters first."""
+        try:
+            limit = min(int(req.args.get("limit", 50)), 500)
+        except ValueError:
+            return 400, {"error": "limit must be an integer"}, "application/json"
+        try:
+            clusters = await self._store_call(
+                self.store.get_duplicate_clusters, status=req.args.get("status") or None, limit=limit)
+            return 200, {'success': True, 'count': len(clusters), 'clusters': clusters}, "application/json"
+        except Exception as e:
+            logger.exception("Error fetching duplicate clusters")
+            return self._error(str(e))
+
+    async def export_tickets(self, req):
+        """
+        Stream tickets as CSV or JSONL (format=csv|jsonl), optionally filtered.
+        include_archived=1 also streams archived tickets.
+        """
+        fmt = req.args.get("format", "csv").lower()
+        if fmt not in export.EXPORT_FORMATS:
+            return 400, {"error": f"Invalid format. Must be one of: {', '.join(export.EXPORT_FORMATS)}"}, "application/json"
+        chunks = export.export_tickets(
+            self.store, fmt,
+            status=req.args.get("status") or None,
+            priority=req.args.get("priority") or None,
+            ticket_type=req.args.get("ticket_type") or None,
+            include_archived=req.args.get("include_archived", "").lower() in ("1", "true", "yes"),
+        )
+        headers = {"Content-Disposition": f'attachment; filename="tickets.{fmt}"'}
+        return 200, Streaming(chunks, headers), export.EXPORT_FORMATS[fmt]
+
+    async def get_ticket(self, req, ticket_id):
+        """Get a single ticket by ID."""
+        try:
+            ticket = await self._store_call(self.store.get_ticket, ticket_id)
+            if not ticket:
+                return 404, {'error': 'Ticket not found'}, "application/json"
+            return 200, {'success': True, 'ticket': ticket}, "application/json"
+        except Exception as e:
+            logger.exception("Error fetching ticket")
+            return self._error(str(e))
+
+    async def submit_ticket(self, req):
+        """Submit a new support ticket or suggestion."""
+        data = req.json()
+        message = data.get("message", "").strip()
+        customer_name = data.get("customer_name", "Anonymous").strip()
+        ticket_type = data.get("ticket_type", "support").strip().lower()
+        category = data.get("category", "").strip() or None
+
+        if not message:
+            return 400, {"error": "Message cannot be empty"}, "application/json"
+        if ticket_type not in ('support', 'suggestion', 'recommendation'):
+            return 400, {"error": "Invalid ticket_type. Must be: support, suggestion, or recommendation"}, "application/json"
+        try:
+            lexicon_profile = lexicon_profile_arg(self.analyzer, data.get("lexicon_profile"))
+        except ValueError as e:
+            return 400, {"error": str(e)}, "application/json"
+
+        try:
+            scoring_version = self.prioritizer.profile_scoring_version(self.scoring_version, lexicon_profile)
+            signature, original = await self._store_call(
+                match_duplicate, self.dedup, self.store, message, ticket_type, scoring_version, lexicon_profile)
+            duplicate_of = original['id'] if original else None
+            if original:
+                priority_data = self.prioritizer.remove_profile_boost(priority_data_from_ticket(original))
+            else:
+                _, priority_data = await self.batcher.submit((message, False, lexicon_profile))
+                self.prioritizer.adjust_for_ticket_type(priority_data, ticket_type)
+            await self._store_call(apply_customer_profile, self.prioritizer, self.store, customer_name,
+                                   priority_data)
+            ticket_id = await self._store_call(
+                self.store.add_ticket, message, customer_name, priority_data,
+                ticket_type=ticket_type, category=category, scoring_version=scoring_version,
+                duplicate_of=duplicate_of, signature=stored_signature(self.dedup, signature),
+                lexicon_profile=lexicon_profile
+            )
+            record_signature(self.dedup, ticket_id, signature, duplicate_of)
+            ticket = await self._store_call(self.store.get_ticket, ticket_id)
+            return 201, {
+                'success': True,
+                'ticket_id': ticket_id,
+                'ticket_type': ticket_type,
+                'duplicate_of': duplicate_of,
+                'priority_data': priority_data,
+                'ticket': ticket
+            }, "application/json"
+        except Exception as e:
+            logger.exception("Error creating ticket")
+            return self._error(str(e))
+
+    async def update_ticket_status(self, req, ticket_id):
+        """Update ticket status."""
+        status = req.json().get("status", "").strip()
+        if status not in VALID_STATUSES:
+            return 400, {"error": f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}"}, "application/json"
+        try:
+            updated = await self._store_call(self.store.update_ticket_status, ticket_id, status)
+            ticket = await self._store_call(self.store.get_ticket, ticket_id)
+            if not updated:
+                if ticket is None:
+                    return 404, {'error': 'Ticket not found'}, "application/json"
+                return 409, {'error': 'Ticket is archived'}, "application/json"
+            return 200, {'success': True, 'ticket': ticket}, "application/json"
+        except Exception as e:
+            logger.exception("Error updating ticket")
+            return self._error(str(e))
+
+    async def delete_ticket(self, req, ticket_id):
+        """Delete a ticket."""
+        try:
+            await self._store_call(self.store.delete_ticket, ticket_id)
+            if self.dedup is not None:
+                self.dedup.remove(ticket_id)
+            return 200, {'success': True, 'message': 'Ticket deleted'}, "application/json"
+        except Exception as e:
+            logger.exception("Error deleting ticket")
+            return self._error(str(e))
+
+    async def get_stats(self, req):
+        """Get dashboard statistics."""
+        try:
+            stats = await self._store_call(self.store.get_stats)
+            return 200, {
+                'success': True,
+                'stats': stats,
+                'analysis_cache': self.analyzer.sentence_cache.stats(),
+                'persistent_cache': self.analyzer.persistent_cache.stats() if self.analyzer.persistent_cache else None,
+                'queue': await self._store_call(self.store.queue_stats),
+                'nltk': resources.status(),
+                'lexicons': self.analyzer.lexicons.status() if self.analyzer.lexicons else None,
+                # The micro-batcher bounds analysis work here; there is no admission controller.
+                'admission': None,
+                'queries': self.store.query_log.stats() if getattr(self.store, 'query_log', None) else None,
+                'writer': self.store.writer.stats() if getattr(self.store, 'writer', None) else None
+            }, "application/json"
+        except Exception as e:
+            logger.exception("Error fetching stats")
+            return self._error(str(e))
+
+    async def get_trends(self, req):
+        """Sentiment and priority trends per time bucket."""
+        bucket = req.args.get("bucket", "day")
+        if bucket.isdigit():
+            bucket = int(bucket)
+        try:
+            trends = await self._store_call(
+                self.store.get_trends,
+                start=req.args.get("start") or None,
+                end=req.args.get("end") or None,
+                bucket=bucket,
+            )
+        except ValueError as e:
+            return 400, {'error': str(e)}, "application/json"
+        except Exception as e:
+            logger.exception("Error fetching trends")
+            return self._error(str(e))
+        return 200, {'success': True, 'bucket': bucket, 'trends': trends}, "application/json"
+
+    async def claim_next_ticket(self, req):
+        """Lease the highest-priority new ticket to an agent."""
+        data = req.json()
+        lease_seconds = data.get("lease_seconds")
+        if lease_seconds is not None and (not isinstance(lease_seconds, (int, float)) or lease_seconds <= 0):
+            return 400, {"error": "lease_seconds must be a positive number"}, "application/json"
+        try:
+            lease, ticket = await self._store_call(
+                claim_next, self.store, lease_seconds or self.lease_seconds, agent=data.get("agent"))
+            return 200, {'success': True, 'lease': lease, 'ticket': ticket}, "application/json"
+        except Exception as e:
+            logger.exception("Error claiming ticket")
+            return self._error(str(e))
+
+    async def release_ticket(self, req, ticket_id):
+        """Return a leased ticket to the queue."""
+        if not await self._store_call(self.store.release_ticket, ticket_id, req.json().get("token", "")):
+            return 409, {'error': 'Lease not held'}, "application/json"
+        return 200, {'success': True}, "application/json"
+
+    async def analyze_text(self, req):
+        """Analyze text and return priority without storing."""
+        data = req.json()
+        text = data.get("text", "").strip()
+        wire = req.args.get("format") or data.get("format") or "verbose"
+        if not text:
+            return 400, {"error": "Text cannot be empty"}, "application/json"
+        if wire not in ("verbose", "compact"):
+            return 400, {"error": "Invalid format. Must be: verbose or compact"}, "application/json"
+        try:
+            lexicon_profile = lexicon_profile_arg(self.analyzer, data.get("lexicon_profile"))
+        except ValueError as e:
+            return 400, {"error": str(e)}, "application/json"
+        try:
+            analysis, priority_data = await self.batcher.submit((text, True, lexicon_profile))
+            payload = {'success': True, 'analysis': analysis, 'priority_data': priority_data}
+            return 200, compact.dumps(payload, wire=wire).encode("utf-8"), "application/json"
+        except Exception as e:
+            logger.exception("Error analyzing text")
+            return self._error(str(e))
@@ -1,40 +1,325 @@
 """
 Flask API server for ticket management and prioritization.
 Run with: python support_server.py
+
+For production, build the app with ``create_app()`` and serve it from a
+pre-forking server (see ``wsgi.py`` and ``gunicorn.conf.py``).
 """
 
+import functools
+import os
 import traceback
 import logging
-from flask import Flask, render_template, request, jsonify
+from types import SimpleNamespace
+from flask import Flask, Blueprint, current_app, g, render_template, request, jsonify, stream_with_context
 from flask_cors import CORS
 import webbrowser
 
 # Import support prioritization modules
-from vader_sentiment import SentimentAnalyzer
+from vader_sentiment import SentimentAnalyzer, compact
+from vader_sentiment import dedup, export, resources
+from vader_sentiment.admission import AdmissionController, Overloaded
+from vader_sentiment.analyzer import DEFAULT_CONFIG as ANALYZER_CONFIG, create_analyzer
 from vader_sentiment.ticket_prioritizer import TicketPrioritizer
-from vader_sentiment.ticket_store import TicketStore
+from vader_sentiment.storage import create_store
+
+DEFAULT_CONFIG = {
+    "DB_PATH": "support_tickets.db",
+    # "sqlite" (DB_PATH) or "memory" (nothing persisted; for tests and demos)
+    "STORAGE": "sqlite",
+    # SQLite statement timing: statements at least SLOW_QUERY_MS slow are
+    # logged with their EXPLAIN QUERY PLAN, and QUERY_EXPLAIN_ALL checks every
+    # distinct statement's plan once for full-table scans. None/False = off.
+    "SLOW_QUERY_MS": None,
+    "QUERY_EXPLAIN_ALL": False,
+    # SQLite writes through one group-commit thread: concurrent inserts,
+    # status updates and deletes share a transaction, waiting at most
+    # GROUP_COMMIT_DELAY_MS for company. SQLITE_SYNCHRONOUS is the writer's
+    # PRAGMA synchronous ("FULL" keeps per-ticket durability; "NORMAL" may
+    # lose the last commits on power loss). Off by default: single-threaded
+    # workers have nothing to batch.
+    "GROUP_COMMIT": False,
+    "GROUP_COMMIT_DELAY_MS": 2,
+    "GROUP_COMMIT_MAX_BATCH": 256,
+    "SQLITE_SYNCHRONOUS": "FULL",
+    # SLA aging for GET /api/tickets/aging: priority_score gained per hour
+    # of waiting. None keeps the rate stored in the database (0.01 if new).
+    "AGING_PER_HOUR": None,
+    # SQLite messages of at least this many UTF-8 bytes (pasted logs, stack
+    # traces) are stored zlib-compressed; list views return a 280-character
+    # preview. None/0 stores every message as is.
+    "MESSAGE_COMPRESS_BYTES": 4096,
+    "DEBUG": False,
+    "LOG_LEVEL": "WARNING",
+    "WARM_UP": True,
+    # Extra NLTK data directory (punkt, tagger) and whether startup may try
+    # to download missing resources into it. Requests never download.
+    "NLTK_DATA_DIR": None,
+    "NLTK_DOWNLOAD": False,
+    # Analysis limits, sentence cache, lexicon profiles and the persistent
+    # analysis cache (see vader_sentiment.analyzer.DEFAULT_CONFIG).
+    **ANALYZER_CONFIG,
+    # Near-duplicate detection: minimum estimated Jaccard similarity of
+    # character shingles (0 disables), and how many recent tickets are indexed.
+    "DEDUP_THRESHOLD": 0.8,
+    "DEDUP_WINDOW": 50000,
+    "QUEUE_LEASE_SECONDS": 300,
+    # Request threads per worker process; gunicorn.conf.py reads the same
+    # SUPPORT_THREADS and runs gthread workers when it is above 1.
+    "THREADS": 1,
+    # Admission control for analysis routes (POST /api/tickets, /api/analyze):
+    # requests beyond MAX_CONCURRENT wait in a queue of MAX_QUEUE; a full
+    # queue answers 429 and a wait past the timeout 503, with Retry-After.
+    # "auto" admits half of THREADS (at least 1), leaving the other threads
+    # to queue for a slot or serve reads. None turns admission control off.
+    "ADMISSION_MAX_CONCURRENT": "auto",
+    "ADMISSION_MAX_QUEUE": 32,
+    "ADMISSION_QUEUE_TIMEOUT_SECONDS": 2.0,
+    "ADMISSION_RETRY_AFTER_SECONDS": 1,
+    # Degrade to cheaper analysis (no summary or tone context) while this
+    # many requests are queued or the recent p95 latency is this high
+    # (None disables each trigger).
+    "DEGRADE_QUEUE_DEPTH": None,
+    "DEGRADE_P95_MS": None,
+}
+
+WARM_UP_TEXT = "Thanks for the quick reply! The system was down and I'm frustrated, please help."
+
+api = Blueprint("support_api", __name__)
+
+
+def create_app(config=None):
+    """
+    Build the support server application.
+
+    config: optional mapping overriding DEFAULT_CONFIG. Any key may also be
+    set through the environment with a ``SUPPORT_`` prefix, e.g.
+    ``SUPPORT_DB_PATH=/var/lib/support/tickets.db``.
+
+    The analyzer, prioritizer and store are created here (not at import
+    time) and warmed once, so a pre-forking server that loads the app in
+    its master process shares the loaded lexicon with every worker.
+    """
+    app = Flask(__name__, template_folder="templates", static_folder="static")
+    app.config.update(DEFAULT_CONFIG)
+    app.config.from_prefixed_env("SUPPORT")
+    if config:
+        app.config.update(config)
+    app.debug = bool(app.config["DEBUG"])
+    app.logger.setLevel(app.config["LOG_LEVEL"])
+    CORS(app)
+
+    resources.load_from_config(app.config)
+    analyzer = create_analyzer(app.config)
+    prioritizer = TicketPrioritizer(analyzer)
+    store = create_store(app.config)
+    app.extensions["support"] = SimpleNamespace(
+        analyzer=analyzer,
+        prioritizer=prioritizer,
+        store=store,
+        scoring_version=prioritizer.scoring_version(),
+        dedup=build_dedup_index(app.config, store),
+        lease_seconds=float(app.config["QUEUE_LEASE_SECONDS"]),
+        admission=build_admission(app.config),
+    )
+
+    if app.config["WARM_UP"]:
+        warm_up(analyzer, prioritizer)
+
+    app.register_blueprint(api)
+    return app
+
+
+def build_admission(config):
+    """
+    AdmissionController from config, or None when admission control is off.
+
+    Limits are per process, and a request can only queue for a slot while
+    another thread of the same worker holds it. With one thread per worker
+    (gunicorn's sync default) gunicorn's backlog does the queueing instead:
+    429, 503 and the queue-depth trigger then never fire, and only
+    DEGRADE_P95_MS applies.
+    """
+    max_concurrent = config.get("ADMISSION_MAX_CONCURRENT")
+    if max_concurrent is None:
+        return None
+    if max_concurrent == "auto":
+        max_concurrent = max(1, int(config["THREADS"]) // 2)
+
+    def optional(key, cast):
+        value = config.get(key)
+        return None if value is None else cast(value)
+
+    return AdmissionController(
+        max_concurrent=int(max_concurrent),
+        max_queue=int(config["ADMISSION_MAX_QUEUE"]),
+        queue_timeout=float(config["ADMISSION_QUEUE_TIMEOUT_SECONDS"]),
+        retry_after=float(config["ADMISSION_RETRY_AFTER_SECONDS"]),
+        degrade_queue_depth=optional("DEGRADE_QUEUE_DEPTH", int),
+        degrade_p95_ms=optional("DEGRADE_P95_MS", float),
+    )
+
+
+def analyze_for_priority(analyzer, prioritizer, text, profile=None, degraded=False):
+    """
+    (analysis, priority_data) for text. Degraded analysis skips the summary
+    and tone context; priority then rests on sentiment and keywords alone.
+    """
+    analysis = analyzer.analyze(text, compact=True, profile=profile,
+                                include_summary=not degraded, include_context=not degraded)
+    return analysis, prioritizer.prioritize(text, analysis=analysis)
+
+
+def build_dedup_index(config, store):
+    """NearDuplicateIndex seeded with the newest stored signatures, or None if DEDUP_THRESHOLD is 0."""
+    threshold = float(config["DEDUP_THRESHOLD"] or 0)
+    if threshold <= 0:
+        return None
+    index = dedup.NearDuplicateIndex(threshold=threshold, max_entries=int(config["DEDUP_WINDOW"]))
+    for ticket_id, root_id, blob in store.recent_signatures(index.hasher.scheme, index.max_entries):
+        index.add(ticket_id, signature=dedup.signature_from_bytes(blob), root=root_id)
+    return index
+
+
+def lexicon_profile_arg(analyzer, value):
+    """Lexicon profile name from a request body (None for the base lexicon); ValueError if unknown."""
+    if value in (None, ""):
+        return None
+    if not isinstance(value, str):
+        raise ValueError("lexicon_profile must be a string")
+    analyzer.check_profile(value)
+    return value
+
+
+def match_duplicate(index, store, message, ticket_type, scoring_version, lexicon_profile=None):
+    """
+    (signature, original) for a new message. original is the stored root
+    ticket when the message near-duplicates a recent ticket of the same type
+    and lexicon profile stamped with scoring_version (which, for a profile,
+    includes its overlay version), otherwise None.
+    Archived roots never match; they and the entry that led to them are
+    dropped from the index as they are found.
+    """
+    if index is None:
+        return None, None
+    signature = index.signature(message)
+    while True:
+        match = index.find(signature=signature)
+        if match is None:
+            return signature, None
+        original = store.get_ticket(match[1])
+        if not original or 'archived_at' not in original:
+            break
+        index.remove(match[0])
+        index.remove(match[1])
+    if (not original or original.get('ticket_type') != ticket_type
+            or original.get('scoring_version') != scoring_version
+            or original.get('lexicon_profile') != lexicon_profile):
+        return signature, None
+    return signature, original
+
+
+def priority_data_from_ticket(ticket):
+    """Rebuild TicketPrioritizer output from a stored ticket row."""
+    return {
+        'priority': ticket['priority'],
+        'priority_score': ticket['priority_score'],
+        'emotion': ticket['emotion'],
+        'compound': ticket['compound'],
+        'intensity': ticket['intensity'],
+        'urgency_flagged': bool(ticket['urgency_flagged']),
+        'flagged_keywords': ticket.get('flagged_keywords') or [],
+        'reason': ticket['reason'],
+        'profile_boost': ticket.get('profile_boost'),
+    }
+
+
+def apply_customer_profile(prioritizer, store, customer_name, priority_data):
+    """Boost priority_data for a repeat frustrated customer; call before the ticket is stored."""
+    return prioritizer.adjust_for_customer_profile(priority_data, store.get_customer_profile(customer_name))
+
+
+def record_signature(index, ticket_id, signature, duplicate_of):
+    """Add a stored ticket to the near-duplicate index."""
+    if index is not None and signature is not None:
+        index.add(ticket_id, signature=signature, root=duplicate_of)
+
+
+def stored_signature(index, signature):
+    """(scheme, bytes) for TicketStorage.add_ticket, or None."""
+    if index is None or signature is None:
+        return None
+    return index.hasher.scheme, dedup.signature_to_bytes(signature)
+
+
+def claim_next(store, lease_seconds, agent=None):
+    """
+    (lease, ticket) for the highest-priority waiting ticket, or (None, None).
+    The store holds the leases, so every worker process sees the same queue.
+    """
+    lease = store.claim_next_ticket(agent=agent, lease_seconds=lease_seconds)
+    if lease is None:
+        return None, None
+    return lease, store.get_ticket(lease['ticket_id'])
+
+
+def warm_up(analyzer, prioritizer):
+    """Run one full analysis so lazy imports and lexicon lookups are paid up front."""
+    analyzer.analyze(WARM_UP_TEXT)
+    prioritizer.prioritize(WARM_UP_TEXT)
+
+
+def _services():
+    return current_app.extensions["support"]
+
 
-logging.basicConfig(level=logging.DEBUG)
+def _error_response(message, status=500):
+    """Error payload; the traceback is only exposed when the app runs in debug mode."""
+    body = {"error": message}
+    if current_app.debug:
+        body["traceback"] = traceback.format_exc()
+    return jsonify(body), status
 
-app = Flask(__name__, template_folder="templates", static_folder="static")
-CORS(app)
 
-# Initialize analyzer and prioritizer
-analyzer = SentimentAnalyzer()
-prioritizer = TicketPrioritizer(analyzer)
-store = TicketStore(db_path="support_tickets.db")
+def admission_controlled(view):
+    """Run view under the app's AdmissionController; g.degraded tells it to analyze cheaply."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        admission = _services().admission
+        if admission is None:
+            g.degraded = False
+            return view(*args, **kwargs)
+        try:
+            slot = admission.acquire()
+        except Overloaded as e:
+            response = jsonify({"error": str(e)})
+            response.status_code = e.status
+            response.headers["Retry-After"] = e.retry_after_header
+            return response
+        try:
+            g.degraded = slot.degraded
+            return view(*args, **kwargs)
+        finally:
+            admission.release(slot)
+    return wrapper
+
+
+def _wire_response(payload, wire, status=200):
+    """JSON response via compact.dumps; wire is "verbose" or "compact"."""
+    return current_app.response_class(compact.dumps(payload, wire=wire), status=status, mimetype="application/json")
 
 # ============ ROUTES ============
 
-@app.route("/")
+@api.route("/")
 def index():
     """Serve the dashboard."""
     return render_template("support_dashboard.html")
 
-@app.route("/api/tickets", methods=["GET"])
+@api.route("/api/tickets", methods=["GET"])
 def get_tickets():
     """Get all tickets, grouped by priority."""
-    app.logger.debug("GET /api/tickets")
+    current_app.logger.debug("GET /api/tickets")
+    store = _services().store
     try:
         grouped = store.get_tickets_by_priority()
         stats = store.get_stats()
@@ -44,26 +329,108 @@ def get_tickets():
             'stats': stats
         })
     except Exception as e:
-        app.logger.exception("Error fetching tickets")
+        current_app.logger.exception("Error fetching tickets")
+        return jsonify({'error': str(e)}), 500
+
+@api.route("/api/tickets/search", methods=["GET"])
+def search_tickets():
+    """Full-text search over ticket messages."""
+    current_app.logger.debug("GET /api/tickets/search")
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+    try:
+        limit = min(int(request.args.get("limit", 50)), 500)
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    try:
+        results = _services().store.search(
+            query,
+            status=request.args.get("status") or None,
+            priority=request.args.get("priority") or None,
+            limit=limit,
+            offset=offset,
+        )
+        return jsonify({'success': True, 'query': query, 'count': len(results), 'tickets': results})
+    except Exception as e:
+        current_app.logger.exception("Error searching tickets")
+        return jsonify({'error': str(e)}), 500
+
+@api.route("/api/tickets/aging", methods=["GET"])
+def get_aging_queue():
+    """Tickets oldest-most-urgent first, each with its aged_score."""
+    current_app.logger.debug("GET /api/tickets/aging")
+    try:
+        limit = min(int(request.args.get("limit", 50)), 500)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    store = _services().store
+    try:
+        tickets = store.get_aging_queue(status=request.args.get("status", "new") or None, limit=limit)
+        return jsonify({'success': True, 'aging_per_hour': store.aging_per_hour, 'count': len(tickets),
+                        'tickets': tickets})
+    except Exception as e:
+        current_app.logger.exception("Error fetching aging queue")
+        return jsonify({'error': str(e)}), 500
+
+@api.route("/api/tickets/export", methods=["GET"])
+def export_tickets():
+    """
+    Stream tickets as CSV or JSONL (format=csv|jsonl), optionally filtered.
+    include_archived=1 also streams archived tickets.
+    """
+    current_app.logger.debug("GET /api/tickets/export")
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in export.EXPORT_FORMATS:
+        return jsonify({"error": f"Invalid format. Must be one of: {', '.join(export.EXPORT_FORMATS)}"}), 400
+    chunks = export.export_tickets(
+        _services().store, fmt,
+        status=request.args.get("status") or None,
+        priority=request.args.get("priority") or None,
+        ticket_type=request.args.get("ticket_type") or None,
+        include_archived=request.args.get("include_archived", "").lower() in ("1", "true", "yes"),
+    )
+    return current_app.response_class(
+        stream_with_context(chunks),
+        content_type=export.EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="tickets.{fmt}"'},
+    )
+
+@api.route("/api/tickets/clusters", methods=["GET"])
+def get_duplicate_clusters():
+    """Original tickets with their near-duplicates, largest clusters first."""
+    current_app.logger.debug("GET /api/tickets/clusters")
+    try:
+        limit = min(int(request.args.get("limit", 50)), 500)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    try:
+        clusters = _services().store.get_duplicate_clusters(status=request.args.get("status") or None, limit=limit)
+        return jsonify({'success': True, 'count': len(clusters), 'clusters': clusters})
+    except Exception as e:
+        current_app.logger.exception("Error fetching duplicate clusters")
         return jsonify({'error': str(e)}), 500
 
-@app.route("/api/tickets/<int:ticket_id>", methods=["GET"])
+@api.route("/api/tickets/<int:ticket_id>", methods=["GET"])
 def get_ticket(ticket_id):
     """Get a single ticket by ID."""
-    app.logger.debug(f"GET /api/tickets/{ticket_id}")
+    current_app.logger.debug(f"GET /api/tickets/{ticket_id}")
     try:
-        ticket = store.get_ticket(ticket_id)
+        ticket = _services().store.get_ticket(ticket_id)
         if not ticket:
             return jsonify({'error': 'Ticket not found'}), 404
         return jsonify({'success': True, 'ticket': ticket})
     except Exception as e:
-        app.logger.exception("Error fetching ticket")
+        current_app.logger.exception("Error fetching ticket")
         return jsonify({'error': str(e)}), 500
 
-@app.route("/api/tickets", methods=["POST"])
+@api.route("/api/tickets", methods=["POST"])
+@admission_controlled
 def submit_ticket():
     """Submit a new support ticket or suggestion."""
-    app.logger.debug("POST /api/tickets")
+    current_app.logger.debug("POST /api/tickets")
+    services = _services()
     data = request.get_json() or {}
     message = data.get("message", "").strip()
     customer_name = data.get("customer_name", "Anonymous").strip()
@@ -76,47 +443,66 @@ def submit_ticket():
     # Validate ticket type
     if ticket_type not in ('support', 'suggestion', 'recommendation'):
         return jsonify({"error": "Invalid ticket_type. Must be: support, suggestion, or recommendation"}), 400
+    try:
+        lexicon_profile = lexicon_profile_arg(services.analyzer, data.get("lexicon_profile"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     try:
-        # Prioritize the ticket
-        priority_data = prioritizer.prioritize(message)
+        scoring_version = services.prioritizer.profile_scoring_version(services.scoring_version, lexicon_profile)
+        # Near-duplicates of a recent ticket reuse its analysis
+        signature, original = match_duplicate(services.dedup, services.store, message, ticket_type,
+                                              scoring_version, lexicon_profile)
+        duplicate_of = original['id'] if original else None
+        if original:
+            # Reuse the original's analysis without its customer's boost
+            priority_data = services.prioritizer.remove_profile_boost(priority_data_from_ticket(original))
+        else:
+            # Prioritize the ticket
+            _, priority_data = analyze_for_priority(services.analyzer, services.prioritizer, message,
+                                                    lexicon_profile, g.degraded)
         
-        # For suggestions/recommendations, lower the priority by default (unless they're very strong)
-        if ticket_type in ('suggestion', 'recommendation'):
-            if priority_data['priority'] == 'normal':
-                priority_data['priority_score'] *= 0.5  # Reduce score for suggestions
-            # Keep critical/high but adjust reason
-            priority_data['reason'] = f"[{ticket_type.upper()}] {priority_data['reason']}"
+            # For suggestions/recommendations, lower the priority by default (unless they're very strong)
+            services.prioritizer.adjust_for_ticket_type(priority_data, ticket_type)
+        apply_customer_profile(services.prioritizer, services.store, customer_name, priority_data)
         
         # Store the ticket
-        ticket_id = store.add_ticket(
+        ticket_id = services.store.add_ticket(
             message, 
             customer_name, 
             priority_data,
             ticket_type=ticket_type,
-            category=category
+            category=category,
+            scoring_version=scoring_version,
+            duplicate_of=duplicate_of,
+            signature=stored_signature(services.dedup, signature),
+            lexicon_profile=lexicon_profile
         )
+        record_signature(services.dedup, ticket_id, signature, duplicate_of)
         
-        app.logger.info(f"Created {ticket_type} #{ticket_id}: {priority_data['priority']}")
+        current_app.logger.info(f"Created {ticket_type} #{ticket_id}: {priority_data['priority']}")
         
         # Return the ticket with priority info
-        ticket = store.get_ticket(ticket_id)
+        ticket = services.store.get_ticket(ticket_id)
         return jsonify({
             'success': True,
             'ticket_id': ticket_id,
             'ticket_type': ticket_type,
+            'duplicate_of': duplicate_of,
+            'degraded': g.degraded,
             'priority_data': priority_data,
             'ticket': ticket
         }), 201
     except Exception as e:
-        app.logger.exception("Error creating ticket")
-        tb = traceback.format_exc()
-        return jsonify({"error": str(e), "traceback": tb}), 500
+        current_app.logger.exception("Error creating ticket")
+        return _error_response(str(e))
 
-@app.route("/api/tickets/<int:ticket_id>/status", methods=["PATCH"])
+@api.route("/api/tickets/<int:ticket_id>/status", methods=["PATCH"])
 def update_ticket_status(ticket_id):
     """Update ticket status."""
-    app.logger.debug(f"PATCH /api/tickets/{ticket_id}/status")
+    current_app.logger.debug(f"PATCH /api/tickets/{ticket_id}/status")
+    services = _services()
+    store = services.store
     data = request.get_json() or {}
     status = data.get("status", "").strip()
     
@@ -125,66 +511,143 @@ def update_ticket_status(ticket_id):
         return jsonify({"error": f"Invalid status. Must be one of: {', '.join(valid_statuses)}"}), 400
     
     try:
-        store.update_ticket_status(ticket_id, status)
+        if not store.update_ticket_status(ticket_id, status):
+            if store.get_ticket(ticket_id) is None:
+                return jsonify({'error': 'Ticket not found'}), 404
+            return jsonify({'error': 'Ticket is archived'}), 409
         ticket = store.get_ticket(ticket_id)
         return jsonify({'success': True, 'ticket': ticket})
     except Exception as e:
-        app.logger.exception("Error updating ticket")
+        current_app.logger.exception("Error updating ticket")
         return jsonify({'error': str(e)}), 500
 
-@app.route("/api/tickets/<int:ticket_id>", methods=["DELETE"])
+@api.route("/api/tickets/<int:ticket_id>", methods=["DELETE"])
 def delete_ticket(ticket_id):
     """Delete a ticket."""
-    app.logger.debug(f"DELETE /api/tickets/{ticket_id}")
+    current_app.logger.debug(f"DELETE /api/tickets/{ticket_id}")
+    services = _services()
     try:
-        store.delete_ticket(ticket_id)
+        services.store.delete_ticket(ticket_id)
+        if services.dedup is not None:
+            services.dedup.remove(ticket_id)
         return jsonify({'success': True, 'message': 'Ticket deleted'})
     except Exception as e:
-        app.logger.exception("Error deleting ticket")
+        current_app.logger.exception("Error deleting ticket")
         return jsonify({'error': str(e)}), 500
 
-@app.route("/api/stats", methods=["GET"])
+@api.route("/api/stats", methods=["GET"])
 def get_stats():
     """Get dashboard statistics."""
-    app.logger.debug("GET /api/stats")
+    current_app.logger.debug("GET /api/stats")
     try:
-        stats = store.get_stats()
-        return jsonify({'success': True, 'stats': stats})
+        services = _services()
+        stats = services.store.get_stats()
+        return jsonify({
+            'success': True,
+            'stats': stats,
+            'analysis_cache': services.analyzer.sentence_cache.stats(),
+            'persistent_cache': services.analyzer.persistent_cache.stats() if services.analyzer.persistent_cache else None,
+            'queue': services.store.queue_stats(),
+            'nltk': resources.status(),
+            'lexicons': services.analyzer.lexicons.status() if services.analyzer.lexicons else None,
+            'admission': services.admission.stats() if services.admission else None,
+            'queries': services.store.query_log.stats() if getattr(services.store, 'query_log', None) else None,
+            'writer': services.store.writer.stats() if getattr(services.store, 'writer', None) else None
+        })
+    except Exception as e:
+        current_app.logger.exception("Error fetching stats")
+        return jsonify({'error': str(e)}), 500
+
+@api.route("/api/queue/next", methods=["POST"])
+def claim_next_ticket():
+    """Lease the highest-priority new ticket to an agent."""
+    current_app.logger.debug("POST /api/queue/next")
+    services = _services()
+    data = request.get_json(silent=True) or {}
+    agent = data.get("agent")
+    lease_seconds = data.get("lease_seconds")
+    if lease_seconds is not None and (not isinstance(lease_seconds, (int, float)) or lease_seconds <= 0):
+        return jsonify({"error": "lease_seconds must be a positive number"}), 400
+    try:
+        lease, ticket = claim_next(services.store, lease_seconds or services.lease_seconds, agent=agent)
+        return jsonify({'success': True, 'lease': lease, 'ticket': ticket})
     except Exception as e:
-        app.logger.exception("Error fetching stats")
+        current_app.logger.exception("Error claiming ticket")
         return jsonify({'error': str(e)}), 500
 
-@app.route("/api/analyze", methods=["POST"])
+@api.route("/api/queue/<int:ticket_id>/release", methods=["POST"])
+def release_ticket(ticket_id):
+    """Return a leased ticket to the queue."""
+    current_app.logger.debug(f"POST /api/queue/{ticket_id}/release")
+    token = (request.get_json(silent=True) or {}).get("token", "")
+    if not _services().store.release_ticket(ticket_id, token):
+        return jsonify({'error': 'Lease not held'}), 409
+    return jsonify({'success': True})
+
+@api.route("/api/trends", methods=["GET"])
+def get_trends():
+    """Sentiment and priority trends per time bucket."""
+    current_app.logger.debug("GET /api/trends")
+    bucket = request.args.get("bucket", "day")
+    if bucket.isdigit():
+        bucket = int(bucket)
+    try:
+        trends = _services().store.get_trends(
+            start=request.args.get("start") or None,
+            end=request.args.get("end") or None,
+            bucket=bucket,
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.exception("Error fetching trends")
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'success': True, 'bucket': bucket, 'trends': trends})
+
+@api.route("/api/analyze", methods=["POST"])
+@admission_controlled
 def analyze_text():
     """Analyze text and return priority without storing."""
-    app.logger.debug("POST /api/analyze")
+    current_app.logger.debug("POST /api/analyze")
+    services = _services()
     data = request.get_json() or {}
     text = data.get("text", "").strip()
+    wire = request.args.get("format") or data.get("format") or "verbose"
     
     if not text:
         return jsonify({"error": "Text cannot be empty"}), 400
+    if wire not in ("verbose", "compact"):
+        return jsonify({"error": "Invalid format. Must be: verbose or compact"}), 400
+    try:
+        lexicon_profile = lexicon_profile_arg(services.analyzer, data.get("lexicon_profile"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     try:
-        analysis = analyzer.analyze(text)
-        priority_data = prioritizer.prioritize(text)
+        analysis, priority_data = analyze_for_priority(services.analyzer, services.prioritizer, text,
+                                                       lexicon_profile, g.degraded)
         
-        return jsonify({
+        return _wire_response({
             'success': True,
+            'degraded': g.degraded,
             'analysis': analysis,
             'priority_data': priority_data
-        })
+        }, wire)
     except Exception as e:
-        app.logger.exception("Error analyzing text")
-        tb = traceback.format_exc()
-        return jsonify({"error": str(e), "traceback": tb}), 500
+        current_app.logger.exception("Error analyzing text")
+        return _error_response(str(e))
 
 # ============ MAIN ============
 
 if __name__ == "__main__":
+    # Local development only: debug mode, verbose logging and a browser tab.
+    logging.basicConfig(level=logging.DEBUG)
+    app = create_app({"DEBUG": True, "LOG_LEVEL": "DEBUG"})
     url = "http://127.0.0.1:5000"
     print(f"\nStarting Support Prioritization Server...")
     print(f"Open in browser: {url}")
-    print(f"Tickets database: support_tickets.db\n")
+    print(f"Tickets database: {app.config['DB_PATH']}\n")
     
-    webbrowser.open_new_tab(url)
+    if not os.environ.get("WERKZEUG_RUN_MAIN"):
+        webbrowser.open_new_tab(url)
     app.run(host="127.0.0.1", port=5000, debug=True)
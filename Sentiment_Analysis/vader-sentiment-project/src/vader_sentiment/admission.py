@@ -0,0 +1,141 @@
+"""
+Admission control for analysis-heavy requests.
+
+At most max_concurrent requests run at once; up to max_queue more wait for
+a slot. Beyond that a request is turned away at once (Overloaded, 429), and
+one that waits longer than queue_timeout gives up (Overloaded, 503), both
+with a Retry-After hint. Rejecting early keeps latency bounded for the
+requests that are admitted, including the dashboard's.
+
+The optional degradation policy marks a slot as degraded when the queue is
+at least degrade_queue_depth deep or the p95 of recent request latencies
+is at least degrade_p95_ms. Callers then run cheaper analysis (no summary
+or tone context) so triage keeps up during a spike.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+DEFAULT_MAX_CONCURRENT = 8
+DEFAULT_MAX_QUEUE = 32
+DEFAULT_QUEUE_TIMEOUT = 2.0
+DEFAULT_RETRY_AFTER = 1.0
+DEFAULT_LATENCY_WINDOW = 200
+
+
+class Overloaded(Exception):
+    """Request not admitted; status is 429 (queue full) or 503 (queue wait timed out)."""
+
+    def __init__(self, message, status, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self):
+        """Retry-After value in whole seconds."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class Slot:
+    """An admitted request: when it arrived and whether to run degraded."""
+
+    __slots__ = ("arrived", "degraded")
+
+    def __init__(self, arrived, degraded):
+        self.arrived = arrived
+        self.degraded = degraded
+
+
+class AdmissionController:
+    """
+    Bounded concurrency with a bounded wait queue.
+
+    max_concurrent: requests running at once
+    max_queue: requests allowed to wait for a slot (0 rejects when all are busy)
+    queue_timeout: seconds a request may wait before it is rejected
+    retry_after: seconds suggested to rejected clients
+    degrade_queue_depth / degrade_p95_ms: degradation thresholds (None disables each)
+    latency_window: recent requests the p95 is taken over
+    """
+
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT, max_queue=DEFAULT_MAX_QUEUE,
+                 queue_timeout=DEFAULT_QUEUE_TIMEOUT, retry_after=DEFAULT_RETRY_AFTER,
+                 degrade_queue_depth=None, degrade_p95_ms=None, latency_window=DEFAULT_LATENCY_WINDOW,
+                 clock=time.monotonic):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.degrade_queue_depth = degrade_queue_depth
+        self.degrade_p95_ms = degrade_p95_ms
+        self.clock = clock
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.degraded = 0
+        self.rejected = {429: 0, 503: 0}
+        self._latencies = deque(maxlen=latency_window)
+        self._p95_ms = None
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """A Slot for one request; raises Overloaded if none is available in time."""
+        arrived = self.clock()
+        with self._cond:
+            if self.active >= self.max_concurrent:
+                if self.waiting >= self.max_queue:
+                    self.rejected[429] += 1
+                    raise Overloaded("Server busy: request queue is full", 429, self.retry_after)
+                self.waiting += 1
+                try:
+                    deadline = time.monotonic() + self.queue_timeout
+                    while self.active >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.rejected[503] += 1
+                            raise Overloaded("Server busy: timed out waiting for capacity", 503,
+                                             self.retry_after)
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+            degraded = self._should_degrade()
+            if degraded:
+                self.degraded += 1
+            return Slot(arrived, degraded)
+
+    def release(self, slot):
+        """Free slot's place and record the request's latency (queue wait included)."""
+        elapsed_ms = (self.clock() - slot.arrived) * 1000.0
+        with self._cond:
+            self.active -= 1
+            self._latencies.append(elapsed_ms)
+            ordered = sorted(self._latencies)
+            self._p95_ms = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+            self._cond.notify()
+
+    def _should_degrade(self):
+        if self.degrade_queue_depth is not None and self.waiting >= self.degrade_queue_depth:
+            return True
+        return self.degrade_p95_ms is not None and self._p95_ms is not None and self._p95_ms >= self.degrade_p95_ms
+
+    def stats(self):
+        with self._cond:
+            return {
+                'active': self.active,
+                'waiting': self.waiting,
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'degraded': self.degraded,
+                'rejected': {str(k): v for k, v in self.rejected.items()},
+                'p95_ms': round(self._p95_ms, 1) if self._p95_ms is not None else None,
+            }
@@ -1,9 +1,117 @@
+import copy
+import threading
+
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from . import structure, summarizer
+from . import compact as _compact, structure, summarizer, wordscore
+from .budget import AnalysisBudget
+from .cache import CachedVader, SentenceCache, shared_cache
+from .lexicon import LexiconRegistry
+from .persistent_cache import PersistentAnalysisCache, analysis_version
+
+# Analyzer settings shared by the servers and offline jobs (rescore), so a
+# ticket is scored the same way wherever it is scored.
+DEFAULT_CONFIG = {
+    # Per-call analysis limits (None = unlimited). Longer texts are analyzed
+    # from a head/tail sample and marked "approximate".
+    "ANALYSIS_MAX_CHARS": 20000,
+    "ANALYSIS_MAX_SENTENCES": 200,
+    "ANALYSIS_MAX_TOKENS": 5000,
+    "ANALYSIS_DEADLINE_SECONDS": 2.0,
+    "SENTENCE_CACHE_SIZE": 20000,
+    # Directory of <profile>.json lexicon overlays selectable per request
+    # with "lexicon_profile"; files are re-read when they change.
+    "LEXICON_DIR": None,
+    "LEXICON_RELOAD_SECONDS": 2.0,
+    "ANALYSIS_CACHE_PATH": None,
+    "ANALYSIS_CACHE_MAX_MB": 256,
+}
+
+
+def _mark_budget(result, report, deadline):
+    """Flag a result produced under a sampled text or an expired deadline."""
+    if report is None and (deadline is None or not deadline.exceeded):
+        return result
+    report = dict(report) if report else {"reasons": []}
+    if deadline is not None and deadline.exceeded:
+        report["reasons"] = report["reasons"] + ["deadline"]
+    result["approximate"] = True
+    result["budget"] = report
+    return result
+
 
 class SentimentAnalyzer:
-    def __init__(self):
-        self.vader = SentimentIntensityAnalyzer()
+    def __init__(self, sentence_cache=None, persistent_cache=None, lexicons=None, budget=None):
+        """
+        sentence_cache: SentenceCache shared by VADER and structure scoring.
+        None uses the process-wide cache.shared_cache(); False disables caching.
+        persistent_cache: optional PersistentAnalysisCache for whole analyze() results.
+        lexicons: optional lexicon.LexiconRegistry of overlays selectable
+                  with analyze(profile=...).
+        budget: default budget.AnalysisBudget for analyze(); None is unlimited.
+        """
+        if sentence_cache is None:
+            sentence_cache = shared_cache()
+        elif sentence_cache is False:
+            sentence_cache = None
+        self.sentence_cache = sentence_cache
+        vader = SentimentIntensityAnalyzer()
+        self._base_vader = vader
+        self.vader = CachedVader(vader, sentence_cache) if sentence_cache is not None else vader
+        self.lexicons = lexicons
+        self._profile_vaders = {}
+        self._profile_lock = threading.Lock()
+        self.budget = budget
+        self.persistent_cache = None
+        if persistent_cache is not None:
+            self.attach_persistent_cache(persistent_cache)
+
+    def analysis_version(self):
+        """Hash of the lexicon and keyword tables; changes whenever results could."""
+        return analysis_version(self.vader.lexicon)
+
+    def attach_persistent_cache(self, cache):
+        """Serve analyze() from cache, bound (and purged) to this analyzer's version."""
+        cache.set_version(self.analysis_version())
+        self.persistent_cache = cache
+
+    def check_profile(self, profile):
+        """Raise ValueError unless profile is None or a loaded lexicon profile."""
+        if profile is not None:
+            self._vader_for(profile)
+
+    def profile_tag(self, profile):
+        """'name@version' of a lexicon profile's current overlay, None for the base lexicon."""
+        return self._vader_for(profile)[1]
+
+    def _vader_for(self, profile):
+        """
+        (vader, tag) for a lexicon profile. The profile's VADER is a shallow
+        copy of the base one whose lexicon is a LayeredLexicon, rebuilt only
+        when the overlay's version changes. tag is None for the base lexicon.
+        """
+        if profile is None:
+            return self.vader, None
+        if self.lexicons is None:
+            raise ValueError(f"Unknown lexicon profile {profile!r} (no lexicon directory configured)")
+        entry = self.lexicons.get(profile)
+        cached = self._profile_vaders.get(profile)
+        if cached is not None and cached[0] == entry.version:
+            return cached[1], entry.tag
+        vader = copy.copy(self._base_vader)
+        vader.lexicon = entry.layer(self._base_vader.lexicon)
+        if self.sentence_cache is not None:
+            vader = CachedVader(vader, self.sentence_cache, key=f"vader:{entry.tag}")
+        with self._profile_lock:
+            self._profile_vaders[profile] = (entry.version, vader)
+        return vader, entry.tag
+
+    def score_words(self, tokens, profile=None):
+        """
+        polarity_scores() for each token, resolved from the lexicon in one
+        pass (see vader_sentiment.wordscore). Same dicts, much cheaper.
+        """
+        vader, _ = self._vader_for(profile)
+        return wordscore.score_words(tokens, vader)
 
     def detect_mode(self, text):
         """
@@ -19,22 +127,76 @@ class SentimentAnalyzer:
             return "word"
         return "sentence"
 
-    def analyze(self, text, mode=None, structured=True):
+    def analyze(self, text, mode=None, structured=True, compact=False, profile=None, budget=None,
+                include_summary=True, include_context=True):
+        """
+        Analyze text in word, sentence or paragraph mode.
+
+        compact: keep per-word structure scores as TokenTables (see
+        vader_sentiment.compact); serialize with compact.dumps().
+        profile: name of a lexicon profile to score with instead of the
+        base lexicon; ValueError if it is not loaded.
+        budget: AnalysisBudget for this call instead of the analyzer's.
+        Text over its size limits is sampled, and the result then carries
+        "approximate": True and a "budget" report.
+        include_summary / include_context: False skips that stage (the key
+        is then None), for cheaper analysis under load.
+        """
+        vader, tag = self._vader_for(profile)
+        budget = budget or self.budget
+        report = deadline = None
+        if budget is not None:
+            text, report = budget.sample(text)
+            deadline = budget.deadline()
+        if self.persistent_cache is not None:
+            kind = f"analyze:{mode or 'auto'}:{int(bool(structured))}"
+            if tag is not None:
+                kind += f":{tag}"
+            if not (include_summary and include_context):
+                kind += f":s{int(bool(include_summary))}c{int(bool(include_context))}"
+            result = self.persistent_cache.get(kind, text, loads=_compact.loads)
+            if result is None:
+                result = self._analyze(text, mode, structured, True, vader, deadline, include_summary, include_context)
+                # Results cut short by the deadline depend on timing; don't keep them.
+                if deadline is None or not deadline.exceeded:
+                    self.persistent_cache.put(kind, text, result, dumps=lambda r: _compact.dumps(r, wire="exact"))
+            result = _mark_budget(result, report, deadline)
+            return result if compact else _compact.to_verbose(result)
+        return _mark_budget(self._analyze(text, mode, structured, compact, vader, deadline,
+                                          include_summary, include_context), report, deadline)
+
+    def _analyze(self, text, mode, structured, compact, vader, deadline=None, include_summary=True,
+                 include_context=True):
         if mode is None:
             mode = self.detect_mode(text)
-        result = {"mode": mode, "overall": self.vader.polarity_scores(text)}
+        result = {"mode": mode, "overall": vader.polarity_scores(text)}
+        # Tone/context feeds prioritization, so it runs before the optional
+        # per-segment detail when a deadline may cut the call short.
+        context = None
+        if include_context:
+            context = summarizer.detect_tone_context(text, vader, deadline=deadline, overall_scores=result["overall"])
         segments = []
 
         if mode == "word":
-            segs = structure.split_words(text)
-        elif mode == "sentence":
+            # Single tokens need no structure pass: score them from the lexicon in bulk.
+            tokens = structure.split_words(text)
+            result["segments"] = [{"text": t, "vader": scores, "structure": None}
+                                  for t, scores in zip(tokens, wordscore.score_words(tokens, vader))]
+            result["summary"] = (summarizer.generate_word_summary(result["segments"], result["overall"])
+                                 if include_summary else None)
+            result["context"] = context
+            return result
+        if mode == "sentence":
             segs = structure.split_sentences(text)
         else:
             segs = [text.strip()]
 
         for s in segs:
-            vader_scores = self.vader.polarity_scores(s)
-            struct = structure.analyze_with_structure(s, self.vader) if structured and mode != "word" else None
+            if deadline is not None and deadline.expired():
+                break
+            # VADER's cost grows quadratically with token count; don't score the whole text twice.
+            vader_scores = dict(result["overall"]) if s == text else vader.polarity_scores(s)
+            struct = structure.analyze_with_structure(s, vader, compact=compact) if structured else None
             segments.append({
                 "text": s,
                 "vader": vader_scores,
@@ -42,7 +204,32 @@ class SentimentAnalyzer:
             })
 
         result["segments"] = segments
-        result["summary"] = summarizer.generate_summary(text, self.vader, mode=mode)
+        result["summary"] = None
+        if include_summary:
+            result["summary"] = summarizer.generate_summary(text, vader, mode=mode, deadline=deadline,
+                                                            overall_scores=result["overall"])
         # new: attach tone/context
-        result["context"] = summarizer.detect_tone_context(text, self.vader)
-        return result
\ No newline at end of file
+        result["context"] = context
+        return result
+
+
+def create_analyzer(config):
+    """
+    SentimentAnalyzer with the caches, lexicon profiles and analysis budget
+    from config (keys as in DEFAULT_CONFIG; missing keys take its values).
+    LEXICON_RELOAD_SECONDS None never re-reads the overlays.
+    """
+    config = dict(DEFAULT_CONFIG, **config)
+    lexicons = None
+    if config["LEXICON_DIR"]:
+        reload_seconds = config["LEXICON_RELOAD_SECONDS"]
+        lexicons = LexiconRegistry(config["LEXICON_DIR"],
+                                   reload_interval=None if reload_seconds is None else float(reload_seconds))
+    analyzer = SentimentAnalyzer(sentence_cache=SentenceCache(maxsize=int(config["SENTENCE_CACHE_SIZE"])),
+                                 lexicons=lexicons, budget=AnalysisBudget.from_config(config))
+    if config["ANALYSIS_CACHE_PATH"]:
+        analyzer.attach_persistent_cache(PersistentAnalysisCache(
+            config["ANALYSIS_CACHE_PATH"],
+            max_bytes=int(config["ANALYSIS_CACHE_MAX_MB"]) * 1024 * 1024,
+        ))
+    return analyzer
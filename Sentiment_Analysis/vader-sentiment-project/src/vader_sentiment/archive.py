@@ -0,0 +1,149 @@
+"""
+Archival of resolved tickets.
+
+Resolved tickets are most of the tickets table, yet every dashboard
+query, count and sort pays for them. An Archiver thread periodically
+calls store.archive_resolved(), which moves tickets resolved more than
+older_than_days ago into the archive in batch_size-ticket transactions,
+so writers are never blocked for long. With vacuum_pages set, up to that
+many freed pages are then returned to the filesystem with an incremental
+vacuum.
+
+Archived tickets stay reachable by id (get_ticket, delete_ticket) and in
+the trend rollups; see TicketStore.archive_resolved().
+
+Run exactly one archiver per database, as its own process:
+
+    python -m vader_sentiment.archive --db support_tickets.db --older-than-days 30
+
+The servers never start one: a pre-forking server builds its app in the
+master, and a thread writing to SQLite there would never run in the
+workers. Use --once to run a single pass from cron instead.
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+
+from .ticket_store import TicketStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 3600.0
+DEFAULT_BATCH_SIZE = 500
+
+
+class Archiver:
+    """
+    Thread running archive passes every interval seconds.
+
+    store: a storage.TicketStorage
+    older_than_days: archive tickets resolved at least this many days ago
+    batch_size: tickets moved per transaction
+    vacuum_pages: free pages released after a pass that moved tickets (None: no vacuum)
+    """
+
+    def __init__(self, store, older_than_days, interval=DEFAULT_INTERVAL, batch_size=DEFAULT_BATCH_SIZE,
+                 vacuum_pages=None):
+        if older_than_days < 0:
+            raise ValueError("older_than_days must not be negative")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.store = store
+        self.older_than_days = older_than_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.runs = 0
+        self.archived = 0
+        self.pages_released = 0
+        self.errors = 0
+        self.last_duration_ms = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self):
+        """One archive pass (and vacuum); returns the number of tickets moved."""
+        start = time.perf_counter()
+        moved = self.store.archive_resolved(self.older_than_days, batch_size=self.batch_size)
+        released = 0
+        if moved and self.vacuum_pages is not None:
+            released = self.store.incremental_vacuum(self.vacuum_pages)
+        self.runs += 1
+        self.archived += moved
+        self.pages_released += released
+        self.last_duration_ms = round((time.perf_counter() - start) * 1000.0, 1)
+        if moved:
+            logger.info("Archived %d resolved tickets (%d pages released) in %.1f ms", moved, released,
+                        self.last_duration_ms)
+        return moved
+
+    def start(self):
+        """Run passes in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="ticket-archiver", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self, report=None):
+        """Run passes in the calling thread until stop(); report(stats) is called after each pass."""
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                self.errors += 1
+                logger.exception("Archive pass failed")
+            if report is not None:
+                report(self.stats())
+            self._stop.wait(self.interval)
+
+    def stats(self):
+        return {
+            'older_than_days': self.older_than_days,
+            'runs': self.runs,
+            'archived': self.archived,
+            'pages_released': self.pages_released,
+            'errors': self.errors,
+            'last_duration_ms': self.last_duration_ms,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old resolved tickets to the archive table.")
+    parser.add_argument("--db", default="support_tickets.db", help="ticket database path")
+    parser.add_argument("--older-than-days", type=float, required=True,
+                        help="archive tickets resolved at least this many days ago")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="seconds between passes")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="tickets per transaction")
+    parser.add_argument("--vacuum-pages", type=int, help="free pages to release after a pass that moved tickets")
+    parser.add_argument("--once", action="store_true", help="run one pass and exit")
+    args = parser.parse_args(argv)
+
+    store = TicketStore(db_path=args.db)
+    archiver = Archiver(store, older_than_days=args.older_than_days, interval=args.interval,
+                        batch_size=args.batch_size, vacuum_pages=args.vacuum_pages)
+
+    def report(stats):
+        print(json.dumps(stats), flush=True)
+
+    try:
+        if args.once:
+            archiver.run_once()
+            report(archiver.stats())
+        else:
+            archiver.run(report=report)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
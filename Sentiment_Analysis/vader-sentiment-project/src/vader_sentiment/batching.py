@@ -0,0 +1,134 @@
+"""
+Micro-batching of concurrent requests for asyncio services.
+
+Requests that arrive within ``max_wait`` seconds of each other are grouped
+(up to ``max_batch_size``) and handed to a synchronous batch handler that
+runs in an executor, so one worker thread scores the whole batch instead of
+many threads contending for the GIL.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MicroBatcher:
+    """
+    Collect concurrent ``submit()`` calls into batches.
+
+    handler: callable taking a list of items and returning a list of results
+             in the same order. An item whose result is an Exception instance
+             raises that exception in its caller only.
+    max_batch_size: flush as soon as this many items are pending.
+    max_wait: seconds to wait for more items after the first one arrives;
+              this bounds the latency added by batching.
+    max_in_flight: number of batches that may run in the executor at once.
+    executor: concurrent.futures executor; a private thread pool sized to
+              ``max_in_flight`` is created when omitted.
+    """
+
+    def __init__(self, handler, max_batch_size=32, max_wait=0.005, max_in_flight=1, executor=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_in_flight = max_in_flight
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="microbatch")
+        self._queue = None
+        self._slots = None
+        self._task = None
+        self._running = set()
+        self.batches = 0
+        self.items = 0
+
+    def start(self):
+        """Start the collector task on the running event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._task = asyncio.get_running_loop().create_task(self._collect())
+
+    async def stop(self):
+        """
+        Cancel the collector and wait for batches already in the executor.
+
+        Callers in a running batch get their results; callers still queued
+        receive CancelledError.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, fut = self._queue.get_nowait()
+                if not fut.done():
+                    fut.cancel()
+        if self._own_executor:
+            self.executor.shutdown(wait=False)
+
+    async def submit(self, item):
+        """Queue one item and wait for its result."""
+        self.start()
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, fut))
+        return await fut
+
+    @property
+    def mean_batch_size(self):
+        return self.items / self.batches if self.batches else 0.0
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    # Still take whatever is already queued without waiting.
+                    if self._queue.empty():
+                        break
+                    batch.append(self._queue.get_nowait())
+                    continue
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._slots.acquire()
+            # The loop only keeps weak references to tasks.
+            task = loop.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        items = [item for item, _ in batch]
+        self.batches += 1
+        self.items += len(items)
+        try:
+            results = await loop.run_in_executor(self.executor, self.handler, items)
+        except asyncio.CancelledError:
+            for _, fut in batch:
+                fut.cancel()
+            raise
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        for (_, fut), result in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(result, Exception):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
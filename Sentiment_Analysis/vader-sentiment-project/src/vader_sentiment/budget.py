@@ -0,0 +1,191 @@
+"""
+Per-call cost limits for analysis.
+
+A pasted log file or document should not pin a worker. AnalysisBudget caps
+the characters, sentences and whitespace tokens that reach the analysis
+code, plus an optional wall-clock deadline:
+
+- Over a size limit, the text is sampled deterministically: the first and
+  last halves of the allowance are kept and the middle is dropped, first
+  by characters (cut on whitespace), then by whole sentences, then by
+  tokens. The same input and budget always give the same sample.
+- The deadline is a backstop for slow machines. Analysis stages check it
+  between sentences and skip the rest once it has passed.
+
+Analysis results produced under either kind of limit carry
+``"approximate": True`` and a ``"budget"`` report.
+"""
+
+import time
+
+from . import structure
+
+
+def _head_tail(items, keep):
+    """The first ceil(keep/2) and last floor(keep/2) items."""
+    if keep >= len(items):
+        return list(items)
+    head = (keep + 1) // 2
+    return list(items[:head]) + list(items[len(items) - (keep - head):])
+
+
+def _sentence_spans(text):
+    """(start, end) offsets of structure.split_sentences' sentences in stripped text."""
+    spans = []
+    start = 0
+    for match in structure.SENTENCE_BREAK.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+
+def _join_spans(text, spans):
+    """The spans of text with their original separators; a space stands in for dropped sentences."""
+    pieces = []
+    prev_end = None
+    for start, end in spans:
+        if pieces:
+            gap = text[prev_end:start]
+            pieces.append(gap if not gap.strip() else " ")
+        pieces.append(text[start:end])
+        prev_end = end
+    return "".join(pieces)
+
+
+class Deadline:
+    """Wall-clock deadline; `seconds` None never expires."""
+
+    __slots__ = ("at", "clock", "exceeded")
+
+    def __init__(self, seconds=None, clock=time.monotonic):
+        self.clock = clock
+        self.at = clock() + seconds if seconds is not None else None
+        self.exceeded = False
+
+    def expired(self):
+        if self.at is not None and not self.exceeded and self.clock() >= self.at:
+            self.exceeded = True
+        return self.exceeded
+
+
+class AnalysisBudget:
+    """
+    Limits for one analysis call. Any limit may be None (unlimited).
+
+    max_chars: characters analyzed (head and tail halves kept)
+    max_sentences: sentences analyzed
+    max_tokens: whitespace-separated tokens analyzed
+    deadline_seconds: wall-clock time before remaining stages are skipped
+    """
+
+    def __init__(self, max_chars=20000, max_sentences=200, max_tokens=5000, deadline_seconds=None,
+                 clock=time.monotonic):
+        for name, value in (("max_chars", max_chars), ("max_sentences", max_sentences), ("max_tokens", max_tokens)):
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be at least 1 or None")
+        self.max_chars = max_chars
+        self.max_sentences = max_sentences
+        self.max_tokens = max_tokens
+        self.deadline_seconds = deadline_seconds
+        self.clock = clock
+
+    @classmethod
+    def from_config(cls, config):
+        """AnalysisBudget from the ANALYSIS_* limits, or None if all are unset."""
+        def limit(key, cast):
+            value = config.get(key)
+            return cast(value) if value is not None else None
+
+        limits = {
+            "max_chars": limit("ANALYSIS_MAX_CHARS", int),
+            "max_sentences": limit("ANALYSIS_MAX_SENTENCES", int),
+            "max_tokens": limit("ANALYSIS_MAX_TOKENS", int),
+            "deadline_seconds": limit("ANALYSIS_DEADLINE_SECONDS", float),
+        }
+        if all(v is None for v in limits.values()):
+            return None
+        return cls(**limits)
+
+    def deadline(self):
+        """A new Deadline for one call."""
+        return Deadline(self.deadline_seconds, self.clock)
+
+    def sample(self, text):
+        """
+        (text, report) where text fits the size limits. report is None when
+        nothing was dropped, otherwise a dict with 'reasons' and counts.
+        """
+        reasons = []
+        original_chars = len(text)
+        if self.max_chars is not None and len(text) > self.max_chars:
+            text = self._sample_chars(text)
+            reasons.append("chars")
+
+        sents = None
+        if self.max_sentences is not None or self.max_tokens is not None:
+            body = text.strip()
+            sents = _sentence_spans(body)
+            total = len(sents)
+            if self.max_sentences is not None and total > self.max_sentences:
+                sents = _head_tail(sents, self.max_sentences)
+                reasons.append("sentences")
+            if self.max_tokens is not None:
+                counts = [len(body[start:end].split()) for start, end in sents]
+                if sum(counts) > self.max_tokens:
+                    kept = self._sample_tokens(sents, counts)
+                    if kept is None:
+                        # Not even the first sentence fits: keep its head and tail tokens.
+                        start, end = sents[0]
+                        body = " ".join(_head_tail(body[start:end].split(), self.max_tokens))
+                        kept = [(0, len(body))]
+                    sents = kept
+                    reasons.append("tokens")
+
+        if not reasons:
+            return text, None
+        if sents is not None:
+            # Original separators are kept, so newlines survive sampling.
+            text = _join_spans(body, sents)
+        report = {
+            "reasons": reasons,
+            "original_chars": original_chars,
+            "analyzed_chars": len(text),
+        }
+        if sents is not None:
+            report["analyzed_sentences"] = len(sents)
+            report["omitted_sentences"] = total - len(sents)
+        return text, report
+
+    def _sample_chars(self, text):
+        head = text[:(self.max_chars + 1) // 2]
+        tail = text[len(text) - self.max_chars // 2:]
+        # Do not split words at the cut points.
+        if " " in head.strip():
+            head = head.rsplit(None, 1)[0]
+        if " " in tail.strip():
+            tail = tail.split(None, 1)[1]
+        return f"{head.rstrip()} {tail.lstrip()}".strip()
+
+    def _sample_tokens(self, sents, counts):
+        """
+        Alternately take sentences from the front and the back while they
+        fit. None when not even the first sentence fits.
+        """
+        front, back = 0, len(sents)
+        used = 0
+        take_front = True
+        while front < back:
+            i = front if take_front else back - 1
+            if used + counts[i] > self.max_tokens:
+                break
+            used += counts[i]
+            if take_front:
+                front += 1
+            else:
+                back -= 1
+            take_front = not take_front
+        if front == 0 and back == len(sents):
+            return None
+        return sents[:front] + sents[back:]
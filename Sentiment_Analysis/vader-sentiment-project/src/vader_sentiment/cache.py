@@ -0,0 +1,114 @@
+"""
+Bounded, thread-safe sentence-level cache for VADER and structure scores.
+
+Support tickets repeat the same greetings, signatures and pasted macros, so
+scores are cached on the exact sentence text and shared by every analysis
+that goes through the same SentimentAnalyzer (or the process-wide default
+cache).
+"""
+
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 20000
+# Texts longer than this are scored without caching so one huge input
+# cannot pin a large key in memory.
+DEFAULT_MAX_KEY_LENGTH = 2000
+
+
+class SentenceCache:
+    """LRU cache with hit/miss statistics."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, max_key_length=DEFAULT_MAX_KEY_LENGTH):
+        self.maxsize = maxsize
+        self.max_key_length = max_key_length
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, text, compute):
+        """
+        Return the cached value for (key, text), computing it on a miss.
+
+        key: namespace for the kind of score (e.g. "vader", "structure").
+        text: the exact text the value was computed from.
+        compute: zero-argument callable producing the value.
+        """
+        if len(text) > self.max_key_length or self.maxsize <= 0:
+            return compute()
+        k = (key, text)
+        with self._lock:
+            try:
+                value = self._data[k]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._data.move_to_end(k)
+                self.hits += 1
+                return value
+        # Computed outside the lock; a concurrent miss on the same text
+        # just computes the same value twice.
+        value = compute()
+        with self._lock:
+            self._data[k] = value
+            self._data.move_to_end(k)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class CachedVader:
+    """
+    Wraps a vaderSentiment SentimentIntensityAnalyzer so polarity_scores()
+    goes through a SentenceCache. Other attributes (lexicon, ...) pass through.
+
+    key: cache namespace; analyzers with different lexicons need different keys.
+    """
+
+    def __init__(self, vader, sentence_cache, key="vader"):
+        self.vader = vader
+        self.sentence_cache = sentence_cache
+        self.key = key
+        self.lexicon = vader.lexicon
+
+    def polarity_scores(self, text):
+        scores = self.sentence_cache.get_or_compute(self.key, text, lambda: self.vader.polarity_scores(text))
+        return dict(scores)
+
+    def __getattr__(self, name):
+        return getattr(self.vader, name)
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """Process-wide default SentenceCache."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = SentenceCache()
+        return _shared_cache
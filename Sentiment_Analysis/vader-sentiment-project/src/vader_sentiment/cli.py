@@ -2,10 +2,16 @@ def main():
     import sys
     from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
+    if len(sys.argv) > 1 and sys.argv[1] == "features":
+        from .features import main as features_main
+        features_main(sys.argv[2:])
+        return
+
     analyzer = SentimentIntensityAnalyzer()
 
     if len(sys.argv) < 2:
         print("Usage: python cli.py <text>")
+        print("       python cli.py features (--db DB | --input FILE) --out DIR")
         sys.exit(1)
 
     text = ' '.join(sys.argv[1:])
@@ -0,0 +1,171 @@
+"""
+Compact per-word analysis records and a fast JSON serializer.
+
+``structure.score_tokens`` fills a TokenTable: parallel arrays of words,
+base/adjusted valences and a bit field of notes, instead of one dict (plus a
+list of formatted note strings) per word. The verbose
+``{"word","base","adjusted","notes"}`` dicts are only built when a result
+is serialized in the verbose wire format.
+"""
+
+import json
+from array import array
+from enum import IntFlag
+
+
+class Note(IntFlag):
+    """Per-word scoring notes, stored as bits in TokenTable.flags."""
+    LEXICON = 1
+    LEXICON_STRIPPED = 2
+    BOOSTER = 4
+    NEGATION = 8
+    PUNCT = 16
+
+
+class TokenTable:
+    """Array-backed per-word scores for one sentence."""
+
+    __slots__ = ("words", "base", "adjusted", "flags", "punct_factor")
+
+    def __init__(self, punct_factor=1.0):
+        self.words = []
+        self.base = array("d")
+        self.adjusted = array("d")
+        self.flags = array("B")
+        self.punct_factor = punct_factor
+
+    def append(self, word, base, adjusted, flags):
+        self.words.append(word)
+        self.base.append(base)
+        self.adjusted.append(adjusted)
+        self.flags.append(flags)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __bool__(self):
+        return bool(self.words)
+
+    def notes(self, i):
+        """Formatted note strings for word i, as the verbose format reports them."""
+        flags = self.flags[i]
+        notes = []
+        if flags & Note.LEXICON:
+            notes.append("lexicon")
+        elif flags & Note.LEXICON_STRIPPED:
+            notes.append("lexicon(stripped)")
+        if flags & Note.BOOSTER:
+            notes.append(f"booster({self.words[i-1].lower()})")
+        if flags & Note.NEGATION:
+            notes.append("negation")
+        if flags & Note.PUNCT:
+            notes.append(f"punct({self.punct_factor:.2f})")
+        return notes
+
+    def to_verbose(self):
+        """List of {"word","base","adjusted","notes"} dicts (the original format)."""
+        return [
+            {"word": w, "base": self.base[i], "adjusted": self.adjusted[i], "notes": self.notes(i)}
+            for i, w in enumerate(self.words)
+        ]
+
+    def to_wire(self, precision=4):
+        """
+        Column-oriented form: one list per field, notes as Note bit codes.
+        precision=None keeps full float precision.
+        """
+        if precision is None:
+            return {
+                "w": self.words,
+                "b": self.base.tolist(),
+                "a": self.adjusted.tolist(),
+                "f": self.flags.tolist(),
+                "p": self.punct_factor,
+            }
+        return {
+            "w": self.words,
+            "b": [round(v, precision) for v in self.base],
+            "a": [round(v, precision) for v in self.adjusted],
+            "f": self.flags.tolist(),
+            "p": round(self.punct_factor, precision),
+        }
+
+    @classmethod
+    def from_wire(cls, data):
+        """Rebuild a table from its to_wire() form."""
+        table = cls(data["p"])
+        table.words = list(data["w"])
+        table.base = array("d", data["b"])
+        table.adjusted = array("d", data["a"])
+        table.flags = array("B", data["f"])
+        return table
+
+
+def _verbose_default(obj):
+    if isinstance(obj, TokenTable):
+        return obj.to_verbose()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _compact_default(obj):
+    if isinstance(obj, TokenTable):
+        return obj.to_wire()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_VERBOSE_ENCODER = json.JSONEncoder(default=_verbose_default, ensure_ascii=False,
+                                    check_circular=False, separators=(",", ":"))
+_COMPACT_ENCODER = json.JSONEncoder(default=_compact_default, ensure_ascii=False,
+                                    check_circular=False, separators=(",", ":"))
+
+
+def _exact_default(obj):
+    if isinstance(obj, TokenTable):
+        return obj.to_wire(precision=None)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_EXACT_ENCODER = json.JSONEncoder(default=_exact_default, ensure_ascii=False,
+                                  check_circular=False, separators=(",", ":"))
+
+_WIRE_KEYS = frozenset(("w", "b", "a", "f", "p"))
+
+
+def dumps(result, wire="verbose"):
+    """
+    Serialize an analysis result to a JSON string.
+
+    wire: "verbose" renders TokenTables as the original per-word dicts;
+          "compact" renders them column-oriented with Note codes;
+          "exact" is the compact layout without float rounding, for
+          round-tripping through loads().
+    """
+    if wire == "compact":
+        return _COMPACT_ENCODER.encode(result)
+    if wire == "verbose":
+        return _VERBOSE_ENCODER.encode(result)
+    if wire == "exact":
+        return _EXACT_ENCODER.encode(result)
+    raise ValueError(f"Unknown wire format: {wire!r}")
+
+
+def _wire_hook(obj):
+    if obj.keys() == _WIRE_KEYS:
+        return TokenTable.from_wire(obj)
+    return obj
+
+
+def loads(s):
+    """Parse JSON written by dumps(wire="exact"|"compact"), restoring TokenTables."""
+    return json.loads(s, object_hook=_wire_hook)
+
+
+def to_verbose(result):
+    """Return a copy of result with every TokenTable expanded to verbose dicts."""
+    if isinstance(result, TokenTable):
+        return result.to_verbose()
+    if isinstance(result, dict):
+        return {k: to_verbose(v) for k, v in result.items()}
+    if isinstance(result, list):
+        return [to_verbose(v) for v in result]
+    return result
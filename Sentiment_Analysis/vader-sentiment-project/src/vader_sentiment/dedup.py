@@ -0,0 +1,188 @@
+"""
+Near-duplicate ticket detection with MinHash + locality-sensitive hashing.
+
+Each message is reduced to a fixed-size MinHash signature over character
+shingles. Signatures are split into bands; two messages land in the same
+bucket of some band with high probability when their Jaccard similarity is
+above the configured threshold, so a lookup only compares against a few
+candidates instead of every indexed ticket.
+"""
+
+import re
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    np = None
+    NUMPY_AVAILABLE = False
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.8
+# Only the head of very long messages is shingled.
+MAX_SHINGLE_CHARS = 10000
+
+_MAX_HASH = (1 << 32) - 1
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize(text):
+    """Lowercase and collapse punctuation/whitespace so trivial edits don't matter."""
+    return _NON_WORD.sub(" ", text[:MAX_SHINGLE_CHARS].lower()).strip()
+
+
+def shingle_hashes(text, size=DEFAULT_SHINGLE_SIZE):
+    """32-bit hashes of the character shingles of normalized text."""
+    norm = normalize(text)
+    if len(norm) <= size:
+        return {zlib.crc32(norm.encode("utf-8"))}
+    return {zlib.crc32(norm[i:i + size].encode("utf-8")) for i in range(len(norm) - size + 1)}
+
+
+def choose_bands(num_perm, threshold):
+    """(bands, rows) with bands * rows == num_perm whose LSH threshold is closest to threshold."""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        approx = (1.0 / bands) ** (1.0 / rows)
+        if best is None or abs(approx - threshold) < best[0]:
+            best = (abs(approx - threshold), bands, rows)
+    return best[1], best[2]
+
+
+class MinHasher:
+    """Deterministic MinHash signatures (the same seed gives the same signatures in every process)."""
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        # Simple LCG so the permutations do not depend on the random module's
+        # state. Parameters stay below 2**32 so (a * x + b) fits in uint64.
+        state = seed
+        params = []
+        for _ in range(2 * num_perm):
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            params.append((state >> 32) % _MAX_HASH)
+        self.a = [p or 1 for p in params[:num_perm]]
+        self.b = params[num_perm:]
+        if NUMPY_AVAILABLE:
+            self._np_a = np.array(self.a, dtype=np.uint64)
+            self._np_b = np.array(self.b, dtype=np.uint64)
+
+    @property
+    def scheme(self):
+        """Identifier of the signature parameters, stored alongside persisted signatures."""
+        return f"minhash-{self.num_perm}-{self.shingle_size}-{self.seed}"
+
+    def signature(self, text):
+        hashes = shingle_hashes(text, self.shingle_size)
+        if NUMPY_AVAILABLE:
+            x = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+            sig = ((np.outer(self._np_a, x) + self._np_b[:, None]) % np.uint64(_MAX_HASH)).min(axis=1)
+            return array("Q", sig.tolist())
+        return array("Q", (min((a * x + b) % _MAX_HASH for x in hashes) for a, b in zip(self.a, self.b)))
+
+
+def signature_to_bytes(sig):
+    return sig.tobytes()
+
+
+def signature_from_bytes(blob):
+    sig = array("Q")
+    sig.frombytes(blob)
+    return sig
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index of recent ticket signatures.
+
+    threshold: minimum estimated Jaccard similarity to report a duplicate.
+    max_entries: only the most recent tickets are kept (outage floods are
+                 recent); the oldest are evicted first.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, max_entries=50000):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (signature, root, band_keys)
+        self._buckets = [dict() for _ in range(self.bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _band_keys(self, sig):
+        r = self.rows
+        return [hash(tuple(sig[i * r:(i + 1) * r])) for i in range(self.bands)]
+
+    def signature(self, text):
+        return self.hasher.signature(text)
+
+    def add(self, key, text=None, signature=None, root=None):
+        """
+        Index a ticket. root: id of the cluster's original ticket (defaults to key).
+        Returns the signature.
+        """
+        sig = signature if signature is not None else self.signature(text)
+        band_keys = self._band_keys(sig)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (sig, root if root is not None else key, band_keys)
+            for band, bk in zip(self._buckets, band_keys):
+                band.setdefault(bk, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return sig
+
+    def remove(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key):
+        _, _, band_keys = self._entries.pop(key)
+        for band, bk in zip(self._buckets, band_keys):
+            members = band.get(bk)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del band[bk]
+
+    def query(self, text=None, signature=None, limit=5):
+        """[(key, root, similarity)] of indexed tickets at or above the threshold, most similar first."""
+        sig = signature if signature is not None else self.signature(text)
+        with self._lock:
+            candidates = set()
+            for band, bk in zip(self._buckets, self._band_keys(sig)):
+                candidates.update(band.get(bk, ()))
+            scored = []
+            for key in candidates:
+                other, root, _ = self._entries[key]
+                sim = similarity(sig, other)
+                if sim >= self.threshold:
+                    scored.append((key, root, sim))
+        scored.sort(key=lambda t: (-t[2], t[0]))
+        return scored[:limit]
+
+    def find(self, text=None, signature=None):
+        """Best (key, root, similarity) match or None."""
+        matches = self.query(text, signature=signature, limit=1)
+        return matches[0] if matches else None
@@ -0,0 +1,71 @@
+"""
+Streaming ticket export.
+
+The writers take any iterable of ticket dicts (e.g. TicketStorage.iter_tickets)
+and yield text chunks of roughly flush_every rows, so an export of any size
+is produced with a bounded amount of memory on the server.
+"""
+
+import csv
+import io
+import json
+
+EXPORT_COLUMNS = (
+    'id', 'created_at', 'updated_at', 'status', 'ticket_type', 'category', 'customer_name', 'priority',
+    'priority_score', 'emotion', 'compound', 'intensity', 'urgency_flagged', 'flagged_keywords', 'reason',
+    'scoring_version', 'duplicate_of', 'message',
+)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def iter_csv(tickets, columns=EXPORT_COLUMNS, flush_every=500):
+    """CSV with a header row; list fields (flagged_keywords) are JSON-encoded."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    rows = 0
+    for ticket in tickets:
+        writer.writerow([
+            json.dumps(value) if isinstance(value, list) else value
+            for value in (ticket.get(column) for column in columns)
+        ])
+        rows += 1
+        if rows % flush_every == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def iter_jsonl(tickets, columns=EXPORT_COLUMNS, flush_every=500):
+    """One JSON object per line."""
+    lines = []
+    for ticket in tickets:
+        lines.append(json.dumps({column: ticket.get(column) for column in columns}, ensure_ascii=False))
+        if len(lines) >= flush_every:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def export_tickets(store, fmt='csv', status=None, priority=None, ticket_type=None, batch_size=500,
+                   include_archived=False):
+    """
+    Text chunks of a filtered export in fmt ('csv' or 'jsonl').
+
+    Rows are read from the store batch_size at a time and written out in
+    chunks of the same size. include_archived adds archived tickets and an
+    'archived_at' column (empty for live tickets).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    tickets = store.iter_tickets(status=status, priority=priority, ticket_type=ticket_type, batch_size=batch_size,
+                                 include_archived=include_archived)
+    columns = EXPORT_COLUMNS + ('archived_at',) if include_archived else EXPORT_COLUMNS
+    writer = iter_csv if fmt == 'csv' else iter_jsonl
+    return writer(tickets, columns=columns, flush_every=batch_size)
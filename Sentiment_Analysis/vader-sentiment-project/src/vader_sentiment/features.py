@@ -0,0 +1,256 @@
+"""
+Dense numeric feature matrices for model training.
+
+Each message becomes one row of FEATURE_COLUMNS (VADER scores, structure
+score, emotion scores, keyword-group hits, punctuation and negation counts).
+Rows are streamed straight into ``.npy`` files, so building a matrix holds
+one row in memory at a time, and the result can be opened memory-mapped:
+
+    python -m vader_sentiment.features --db support_tickets.db --out features/
+
+    features/features.npy   float32, shape (rows, len(columns))
+    features/ids.npy        int64 ticket ids (line numbers for --input)
+    features/schema.json    column names, dtype, row count, analysis version
+
+Loading needs numpy (``load_feature_matrix``); writing does not.
+"""
+
+import argparse
+import ast
+import json
+import os
+import struct
+import sys
+from array import array
+
+from .analyzer import SentimentAnalyzer
+from .compact import Note
+from .structure import NEGATIONS
+from .summarizer import EMOTION_LEXICON
+from .ticket_prioritizer import TicketPrioritizer
+from .ticket_store import TicketStore
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Bump when a column's meaning changes.
+SCHEMA_VERSION = 1
+
+EMOTIONS = tuple(EMOTION_LEXICON)
+KEYWORD_GROUPS = (
+    ("urgent", TicketPrioritizer.URGENT_KEYWORDS),
+    ("severe", TicketPrioritizer.SEVERE_KEYWORDS),
+    ("anger", TicketPrioritizer.ANGER_KEYWORDS),
+)
+FEATURE_COLUMNS = (
+    "vader_neg", "vader_neu", "vader_pos", "vader_compound",
+    "structure_score", "sentences", "tokens", "lexicon_words", "boosted_words",
+    "negations", "negated_words", "exclamations", "questions", "allcaps_words",
+    *(f"emotion_{e}" for e in EMOTIONS),
+    *(f"kw_{name}" for name, _ in KEYWORD_GROUPS),
+    "approximate",
+)
+
+FEATURES_FILE = "features.npy"
+IDS_FILE = "ids.npy"
+SCHEMA_FILE = "schema.json"
+
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+# Fixed header size, so the final row count can be written over the placeholder.
+_NPY_HEADER_LEN = 128
+_BYTE_ORDER = "<" if sys.byteorder == "little" else ">"
+
+
+def extract_features(text, analyzer, profile=None):
+    """One row of FEATURE_COLUMNS for text, as a list of floats."""
+    analysis = analyzer.analyze(text, mode="sentence", compact=True, profile=profile)
+    overall = analysis["overall"]
+    structure_score = 0.0
+    tokens = lexicon_words = boosted = negations = negated = allcaps = 0
+    for seg in analysis["segments"]:
+        struct = seg["structure"]
+        if struct is None:
+            continue
+        table = struct["words"]
+        structure_score += struct["structure_score"]
+        tokens += len(table)
+        for word, flags in zip(table.words, table.flags):
+            lexicon_words += bool(flags & (Note.LEXICON | Note.LEXICON_STRIPPED))
+            boosted += bool(flags & Note.BOOSTER)
+            negations += word.lower() in NEGATIONS
+            negated += bool(flags & Note.NEGATION)
+            allcaps += len(word) > 1 and word.isupper()
+    emotion_scores = analysis["context"].get("emotion_scores", {})
+    text_lower = text.lower()
+    row = [
+        overall["neg"], overall["neu"], overall["pos"], overall["compound"],
+        structure_score, len(analysis["segments"]), tokens, lexicon_words, boosted,
+        negations, negated, text.count("!"), text.count("?"), allcaps,
+    ]
+    row.extend(emotion_scores.get(e, 0.0) for e in EMOTIONS)
+    row.extend(sum(1 for kw in keywords if kw in text_lower) for _, keywords in KEYWORD_GROUPS)
+    row.append(1.0 if analysis.get("approximate") else 0.0)
+    return [float(v) for v in row]
+
+
+def _npy_header(descr, shape):
+    header = repr({"descr": descr, "fortran_order": False, "shape": shape})
+    pad = _NPY_HEADER_LEN - len(_NPY_MAGIC) - 2 - len(header) - 1
+    if pad < 0:
+        raise ValueError(f"shape {shape} does not fit in the .npy header")
+    header = header + " " * pad + "\n"
+    return _NPY_MAGIC + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class NpyWriter:
+    """
+    Append-only writer for a 1-D or 2-D ``.npy`` array of fixed-width numbers.
+
+    typecode: array module typecode ('f' float32, 'd' float64, 'q' int64)
+    width: values per row, or None for a 1-D array
+    The header is rewritten with the real row count by close().
+    """
+
+    DESCR = {"f": "f4", "d": "f8", "q": "i8"}
+
+    def __init__(self, path, typecode="f", width=None, flush_every=1024):
+        self.path = path
+        self.typecode = typecode
+        self.width = width
+        self.flush_every = flush_every
+        self.rows = 0
+        self._buf = array(typecode)
+        self._f = open(path, "wb")
+        self._f.write(_npy_header(self._descr(), self._shape()))
+
+    def _descr(self):
+        return _BYTE_ORDER + self.DESCR[self.typecode]
+
+    def _shape(self):
+        return (self.rows,) if self.width is None else (self.rows, self.width)
+
+    def append(self, row):
+        if self.width is None:
+            self._buf.append(row)
+        else:
+            if len(row) != self.width:
+                raise ValueError(f"expected {self.width} values, got {len(row)}")
+            self._buf.extend(row)
+        self.rows += 1
+        if self.rows % self.flush_every == 0:
+            self._flush()
+
+    def _flush(self):
+        self._buf.tofile(self._f)
+        self._buf = array(self.typecode)
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._flush()
+        self._f.seek(0)
+        self._f.write(_npy_header(self._descr(), self._shape()))
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_npy_header(path):
+    """(descr, shape, data offset) of a .npy file written by NpyWriter."""
+    with open(path, "rb") as f:
+        prefix = f.read(len(_NPY_MAGIC) + 2)
+        if prefix[:6] != _NPY_MAGIC[:6]:
+            raise ValueError(f"{path}: not a .npy file")
+        (length,) = struct.unpack("<H", prefix[8:10])
+        header = ast.literal_eval(f.read(length).decode("latin1"))
+    return header["descr"], header["shape"], len(prefix) + length
+
+
+def build_feature_matrix(records, directory, analyzer=None, flush_every=1024, progress=None):
+    """
+    Write features for (id, text) records into directory; returns the schema dict.
+
+    Files are written under temporary names and renamed when complete, so a
+    reader never sees a half-built matrix.
+    """
+    analyzer = analyzer or SentimentAnalyzer()
+    os.makedirs(directory, exist_ok=True)
+    features_tmp = os.path.join(directory, FEATURES_FILE + ".tmp")
+    ids_tmp = os.path.join(directory, IDS_FILE + ".tmp")
+    with NpyWriter(features_tmp, "f", len(FEATURE_COLUMNS), flush_every) as features, \
+            NpyWriter(ids_tmp, "q", None, flush_every) as ids:
+        for record_id, text in records:
+            features.append(extract_features(text or "", analyzer))
+            ids.append(record_id)
+            if progress is not None and features.rows % flush_every == 0:
+                progress(features.rows)
+        rows = features.rows
+    schema = {
+        "schema_version": SCHEMA_VERSION,
+        "analysis_version": analyzer.analysis_version(),
+        "columns": list(FEATURE_COLUMNS),
+        "dtype": "float32",
+        "rows": rows,
+        "features": FEATURES_FILE,
+        "ids": IDS_FILE,
+    }
+    os.replace(features_tmp, os.path.join(directory, FEATURES_FILE))
+    os.replace(ids_tmp, os.path.join(directory, IDS_FILE))
+    with open(os.path.join(directory, SCHEMA_FILE), "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=2)
+    return schema
+
+
+def load_feature_matrix(directory, mmap=True):
+    """(features, ids, schema); the arrays are read-only memory maps unless mmap is False."""
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("numpy is required to load feature matrices")
+    with open(os.path.join(directory, SCHEMA_FILE), encoding="utf-8") as f:
+        schema = json.load(f)
+    mode = "r" if mmap else None
+    features = np.load(os.path.join(directory, schema["features"]), mmap_mode=mode)
+    ids = np.load(os.path.join(directory, schema["ids"]), mmap_mode=mode)
+    return features, ids, schema
+
+
+def _iter_lines(path):
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            if line.strip():
+                yield lineno, line.rstrip("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a numeric feature matrix for model training.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--db", help="ticket database path (rows are tickets, ids are ticket ids)")
+    source.add_argument("--input", help="text file with one message per line (ids are line numbers)")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--status", help="only tickets with this status (--db)")
+    parser.add_argument("--ticket-type", help="only tickets of this type (--db)")
+    parser.add_argument("--include-archived", action="store_true", help="also archived tickets (--db)")
+    parser.add_argument("--batch-size", type=int, default=1024, help="rows read and flushed at a time")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        store = TicketStore(db_path=args.db)
+        tickets = store.iter_tickets(status=args.status, ticket_type=args.ticket_type, batch_size=args.batch_size,
+                                     include_archived=args.include_archived)
+        records = ((t["id"], t["message"]) for t in tickets)
+    else:
+        records = _iter_lines(args.input)
+    schema = build_feature_matrix(records, args.out, flush_every=args.batch_size,
+                                  progress=lambda n: print(f"{n} rows", flush=True))
+    print(json.dumps({"rows": schema["rows"], "columns": len(schema["columns"]), "out": args.out}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Single-writer group commit for the SQLite ticket store.
+
+With one connection per request, every insert takes the database write
+lock and pays its own commit (an fsync). GroupCommitWriter owns one
+connection on a dedicated thread instead. Callers submit a write as a
+function of a cursor and get a concurrent.futures.Future. The thread
+takes everything queued (waiting up to max_delay for more, at most
+max_batch writes), runs it in one transaction and commits once.
+
+Each write runs inside its own SAVEPOINT, so one failing write is rolled
+back and reported on its own future without affecting the rest of the
+batch. Futures complete only after COMMIT returns: a caller never sees a
+ticket id that could still be lost at the configured durability level.
+
+synchronous is SQLite's PRAGMA synchronous for the writer connection:
+'FULL' (default) syncs every commit, so group commit durability equals
+per-ticket commits; 'NORMAL' in WAL mode survives application crashes but
+may lose the last commits on power loss.
+
+The thread does not survive os.fork(): under a preloading server (the
+gunicorn master builds the app, then forks workers) each child gets a
+fresh queue and starts its own writer thread on its first submit.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_DELAY = 0.002
+DEFAULT_MAX_BATCH = 256
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+_STOP = object()
+
+# Writers to reset in a forked child; see _reset_after_fork.
+_writers = weakref.WeakSet()
+
+
+class WriterClosed(RuntimeError):
+    """The writer thread is stopped and accepts no more writes."""
+
+
+class GroupCommitWriter:
+    """
+    Writer thread that batches cursor functions into shared transactions.
+
+    connect: zero-argument function returning a new sqlite3 connection
+    max_delay: seconds to wait for more writes after the first one of a batch
+    max_batch: most writes per transaction
+    synchronous: PRAGMA synchronous for the writer connection
+    wal: switch the database to WAL mode so readers never wait for the writer
+    """
+
+    def __init__(self, connect, max_delay=DEFAULT_MAX_DELAY, max_batch=DEFAULT_MAX_BATCH, synchronous='FULL',
+                 wal=True):
+        synchronous = str(synchronous).upper()
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of {', '.join(SYNCHRONOUS_MODES)}")
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.connect = connect
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.synchronous = synchronous
+        self.wal = wal
+        self.batches = 0
+        self.writes = 0
+        self.failed = 0
+        self.largest_batch = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._thread = None
+        self._start()
+        _writers.add(self)
+
+    def _start(self):
+        """Start the writer thread and wait until its connection is open."""
+        self._ready = threading.Event()
+        self._startup_error = None
+        self._thread = threading.Thread(target=self._run, name="ticket-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._startup_error is not None:
+            self._thread = None
+            raise self._startup_error
+
+    def _reset_after_fork(self):
+        """In a forked child: drop the parent's queue and thread; submit() starts a new one."""
+        self.batches = self.writes = self.failed = self.largest_batch = 0
+        self._queue = queue.Queue()
+        self._close_lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(cursor, *args, **kwargs); the Future gets its return value once committed."""
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise WriterClosed("ticket writer is closed")
+            if self._thread is None:
+                self._start()
+            self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def close(self, timeout=None):
+        """Commit everything already submitted, then stop the thread."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is None:
+                return
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'writes': self.writes,
+            'failed': self.failed,
+            'largest_batch': self.largest_batch,
+            'avg_batch': round(self.writes / self.batches, 2) if self.batches else 0.0,
+            'pending': self._queue.qsize(),
+            'synchronous': self.synchronous,
+        }
+
+    def _open(self):
+        conn = self.connect()
+        conn.isolation_level = None  # transactions are managed explicitly
+        if self.wal:
+            conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        return conn
+
+    def _run(self):
+        try:
+            conn = self._open()
+        except Exception as e:
+            self._startup_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+        conn.close()
+
+    def _commit(self, conn, batch):
+        outcomes = []
+        c = conn.cursor()
+        try:
+            c.execute('BEGIN IMMEDIATE')
+            for fn, args, kwargs, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                c.execute('SAVEPOINT write')
+                try:
+                    outcomes.append((future, fn(c, *args, **kwargs), None))
+                except Exception as e:
+                    c.execute('ROLLBACK TO write')
+                    outcomes.append((future, None, e))
+                c.execute('RELEASE write')
+            c.execute('COMMIT')
+        except Exception as e:
+            logger.exception("Group commit of %d writes failed", len(batch))
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for _, _, _, future in batch:
+                if future.running():
+                    future.set_exception(e)
+            self.failed += len(batch)
+            return
+        finally:
+            c.close()
+        self.batches += 1
+        self.writes += len(outcomes)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for future, value, error in outcomes:
+            if error is None:
+                future.set_result(value)
+            else:
+                self.failed += 1
+                future.set_exception(error)
+
+
+def _reset_writers_after_fork():
+    for writer in list(_writers):
+        writer._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_writers_after_fork)
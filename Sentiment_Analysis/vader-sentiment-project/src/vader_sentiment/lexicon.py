@@ -0,0 +1,223 @@
+"""
+Layered VADER lexicons for per-team vocabularies.
+
+A lexicon profile is a small overlay of word -> valence on top of the
+shared base lexicon. Lookups check the overlay and fall through to the
+base, so each profile costs memory in proportion to its overlay while the
+7k-entry base is loaded once. Profiles are JSON files in one directory,
+named after the profile:
+
+    lexicons/billing.json    {"chargeback": -2.5, "refund": -0.8, "credit": null}
+
+A null valence removes the word for that profile. LexiconRegistry notices
+changed, added and deleted files (checked at most every reload_interval
+seconds), builds a new overlay and swaps it in. Nothing is mutated in
+place, so a request that already resolved a profile keeps a consistent
+view of it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+PROFILE_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+PROFILE_SUFFIX = ".json"
+DEFAULT_RELOAD_INTERVAL = 2.0
+# VADER valences are rated on a -4..+4 scale.
+MAX_VALENCE = 4.0
+
+_MISSING = object()
+_REMOVED = object()
+
+
+class LayeredLexicon(Mapping):
+    """Read-only view of base with overlay applied (one dict probe per layer)."""
+
+    __slots__ = ("base", "overlay", "_len")
+
+    def __init__(self, base, overlay):
+        self.base = base
+        self.overlay = overlay
+        added = sum(1 for w, v in overlay.items() if v is not _REMOVED and w not in base)
+        removed = sum(1 for w, v in overlay.items() if v is _REMOVED and w in base)
+        self._len = len(base) + added - removed
+
+    def __getitem__(self, word):
+        value = self.overlay.get(word, _MISSING)
+        if value is _MISSING:
+            return self.base[word]
+        if value is _REMOVED:
+            raise KeyError(word)
+        return value
+
+    def __contains__(self, word):
+        value = self.overlay.get(word, _MISSING)
+        if value is _MISSING:
+            return word in self.base
+        return value is not _REMOVED
+
+    def __iter__(self):
+        for word, value in self.overlay.items():
+            if value is not _REMOVED:
+                yield word
+        for word in self.base:
+            if word not in self.overlay:
+                yield word
+
+    def __len__(self):
+        return self._len
+
+
+def parse_overlay(data, source="overlay"):
+    """
+    {word: valence or None} -> overlay dict for LayeredLexicon.
+    Words are lowercased like VADER's lookups. Raises ValueError on bad input.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"{source}: expected a JSON object of word -> valence")
+    overlay = {}
+    for word, valence in data.items():
+        word = word.strip().lower()
+        if not word:
+            raise ValueError(f"{source}: empty word")
+        if valence is None:
+            overlay[word] = _REMOVED
+            continue
+        if isinstance(valence, bool) or not isinstance(valence, (int, float)) or abs(valence) > MAX_VALENCE:
+            raise ValueError(f"{source}: valence for {word!r} must be a number in [-4, 4] or null")
+        overlay[word] = float(valence)
+    return overlay
+
+
+def overlay_version(overlay):
+    """Short hash of an overlay's contents."""
+    h = hashlib.sha256()
+    for word in sorted(overlay):
+        value = overlay[word]
+        h.update(f"{word}\t{'-' if value is _REMOVED else repr(value)}\n".encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+class LexiconProfile:
+    """One loaded overlay: name, overlay dict, version and the file stamp it came from."""
+
+    __slots__ = ("name", "overlay", "version", "path", "stamp")
+
+    def __init__(self, name, overlay, path=None, stamp=None):
+        self.name = name
+        self.overlay = overlay
+        self.version = overlay_version(overlay)
+        self.path = path
+        self.stamp = stamp
+
+    @property
+    def tag(self):
+        """'name@version', used in cache keys."""
+        return f"{self.name}@{self.version}"
+
+    def layer(self, base):
+        return LayeredLexicon(base, self.overlay)
+
+
+class LexiconRegistry:
+    """
+    Lexicon profiles loaded from `directory` and kept in sync with it.
+
+    reload_interval: minimum seconds between directory scans; 0 scans on
+                     every lookup, None never rescans after construction.
+    A file that fails to parse is logged and the previous version of that
+    profile (if any) stays active.
+    """
+
+    def __init__(self, directory, reload_interval=DEFAULT_RELOAD_INTERVAL, clock=time.monotonic):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.clock = clock
+        self.errors = {}
+        self.reloads = 0
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self.reload()
+
+    def _scan(self):
+        """{name: (path, (mtime_ns, size))} for profile files in the directory."""
+        found = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return found
+        for entry in entries:
+            name, suffix = os.path.splitext(entry.name)
+            if suffix != PROFILE_SUFFIX or not PROFILE_NAME.match(name) or not entry.is_file():
+                continue
+            st = entry.stat()
+            found[name] = (entry.path, (st.st_mtime_ns, st.st_size))
+        return found
+
+    def reload(self):
+        """Rescan the directory now; returns the names of profiles that changed."""
+        with self._lock:
+            changed = []
+            profiles = dict(self._profiles)
+            found = self._scan()
+            for name in list(profiles):
+                if name not in found:
+                    del profiles[name]
+                    self.errors.pop(name, None)
+                    changed.append(name)
+            for name, (path, stamp) in found.items():
+                current = profiles.get(name)
+                if current is not None and current.stamp == stamp:
+                    continue
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        overlay = parse_overlay(json.load(f), source=path)
+                except (OSError, ValueError) as e:
+                    if self.errors.get(name) != str(e):
+                        logger.warning("Keeping previous lexicon profile %r: %s", name, e)
+                    self.errors[name] = str(e)
+                    continue
+                self.errors.pop(name, None)
+                profiles[name] = LexiconProfile(name, overlay, path=path, stamp=stamp)
+                changed.append(name)
+            # Swap, never mutate: readers holding the old dict are unaffected.
+            self._profiles = profiles
+            if changed:
+                self.reloads += 1
+            if self.reload_interval is not None:
+                self._next_check = self.clock() + self.reload_interval
+            return changed
+
+    def _maybe_reload(self):
+        if self.reload_interval is not None and self.clock() >= self._next_check:
+            self.reload()
+
+    def get(self, name):
+        """The current LexiconProfile called name; ValueError if there is none."""
+        self._maybe_reload()
+        profile = self._profiles.get(name)
+        if profile is None:
+            raise ValueError(f"Unknown lexicon profile {name!r}")
+        return profile
+
+    def names(self):
+        self._maybe_reload()
+        return sorted(self._profiles)
+
+    def status(self):
+        profiles = self._profiles
+        return {
+            'directory': self.directory,
+            'profiles': {name: {'version': p.version, 'entries': len(p.overlay)}
+                         for name, p in sorted(profiles.items())},
+            'errors': dict(self.errors),
+            'reloads': self.reloads,
+        }
@@ -0,0 +1,417 @@
+"""
+In-memory ticket storage with the same semantics as the SQLite TicketStore.
+
+Tickets live in an id-ordered dict with secondary indexes on status,
+priority and duplicate_of, and hourly rollups are updated on every write
+like the SQLite triggers do. Nothing is persisted; use it for tests,
+benchmarks and ephemeral demo instances.
+"""
+
+import bisect
+import copy
+import itertools
+import json
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from .storage import (
+    DEFAULT_AGING_PER_HOUR, DEFAULT_ORDER_BY, ROLLUP_BUCKET_SECONDS, ROLLUP_DIMENSIONS, TicketStorage, aging_key,
+    aging_rate, build_trends, parse_order_by, profile_key, trend_bucket_size, update_profile,
+)
+from .ticket_store import TicketStore, _to_epoch
+from .work_queue import WorkQueue
+
+# Same columns, in the same order, as a SQLite ticket row.
+COLUMNS = (
+    'id', 'customer_name', 'message', 'ticket_type', 'category', 'priority', 'priority_score', 'emotion',
+    'compound', 'intensity', 'urgency_flagged', 'flagged_keywords', 'reason', 'status', 'created_at',
+    'updated_at', 'scoring_version', 'duplicate_of', 'lexicon_profile', 'aging_key',
+    'message_codec', 'resolved_at', 'profile_boost',
+)
+
+def _sort_key(value):
+    # SQLite sorts NULLs before any other value.
+    return (value is not None, value)
+
+
+class MemoryTicketStore(TicketStorage):
+    """Process-local ticket storage; see module docstring."""
+
+    def __init__(self, aging_per_hour=DEFAULT_AGING_PER_HOUR):
+        self.aging_per_hour = aging_rate(aging_per_hour)
+        self._tickets = {}
+        self._archive = {}
+        self._ids = itertools.count(1)
+        self._by_status = defaultdict(set)
+        self._by_priority = defaultdict(set)
+        self._duplicates = defaultdict(set)
+        self._signatures = {}
+        self._rollups = defaultdict(lambda: [0, 0.0])
+        self._checkpoints = {}
+        self._profiles = {}
+        self._queue = WorkQueue()
+        self._lock = threading.RLock()
+
+    # ============ INDEX MAINTENANCE ============
+
+    def _index(self, row, sign, rollups=True):
+        """Add (sign=1) or remove (sign=-1) a row from the secondary indexes and (optionally) rollups."""
+        ticket_id = row['id']
+        for index, key in ((self._by_status, row['status']), (self._by_priority, row['priority']),
+                           (self._duplicates, row['duplicate_of'])):
+            if key is None:
+                continue
+            if sign > 0:
+                index[key].add(ticket_id)
+            else:
+                index[key].discard(ticket_id)
+                if not index[key]:
+                    del index[key]
+        if rollups:
+            self._rollup(row, sign)
+
+    def _rollup(self, row, sign):
+        bucket = _to_epoch(row['created_at']) // ROLLUP_BUCKET_SECONDS * ROLLUP_BUCKET_SECONDS
+        compound = row['compound'] or 0.0
+        for dim in ROLLUP_DIMENSIONS:
+            value = row[dim] if row[dim] is not None else 'none'
+            entry = self._rollups[(bucket, dim, value)]
+            entry[0] += sign
+            entry[1] += sign * compound
+
+    def _update(self, ticket_id, **changes):
+        row = self._tickets[ticket_id]
+        self._index(row, -1)
+        row.update(changes)
+        self._rekey(row)
+        self._index(row, 1)
+
+    def _rekey(self, row):
+        """Recompute a row's aging_key, as the SQLite aging triggers do."""
+        row['aging_key'] = aging_key(row['priority_score'], _to_epoch(row['created_at']), self.aging_per_hour)
+
+    @staticmethod
+    def _public(row):
+        d = copy.copy(row)
+        d['flagged_keywords'] = json.loads(d['flagged_keywords']) if d['flagged_keywords'] else d['flagged_keywords']
+        if d['urgency_flagged']:
+            d['urgency_flagged'] = True
+        return d
+
+    # ============ TICKETS ============
+
+    def add_ticket(self, message, customer_name=None, priority_data=None, ticket_type='support', category=None,
+                   scoring_version=None, duplicate_of=None, signature=None, lexicon_profile=None):
+        """Add a new ticket; arguments as TicketStore.add_ticket(). Returns the ticket id."""
+        p = priority_data or {}
+        now = datetime.now().isoformat()
+        with self._lock:
+            ticket_id = next(self._ids)
+            row = dict.fromkeys(COLUMNS)
+            row.update(
+                id=ticket_id,
+                customer_name=customer_name,
+                message=message,
+                ticket_type=ticket_type,
+                category=category,
+                priority=p.get('priority', 'normal'),
+                priority_score=p.get('priority_score', 0.0),
+                emotion=p.get('emotion'),
+                compound=p.get('compound', 0.0),
+                intensity=p.get('intensity', 'neutral'),
+                urgency_flagged=1 if p.get('urgency_flagged') else 0,
+                flagged_keywords=json.dumps(p.get('flagged_keywords', [])),
+                reason=p.get('reason', ''),
+                status='new',
+                created_at=now,
+                updated_at=now,
+                scoring_version=scoring_version,
+                duplicate_of=duplicate_of,
+                lexicon_profile=lexicon_profile,
+                profile_boost=p.get('profile_boost'),
+            )
+            self._rekey(row)
+            self._tickets[ticket_id] = row
+            self._index(row, 1)
+            self._queue.push(ticket_id, row['priority_score'])
+            if signature is not None:
+                self._signatures[ticket_id] = signature
+            key = profile_key(customer_name)
+            if key is not None:
+                self._profiles[key] = dict(update_profile(self._profiles.get(key), p, now), customer_name=key)
+        return ticket_id
+
+    def get_ticket(self, ticket_id):
+        with self._lock:
+            row = self._tickets.get(ticket_id) or self._archive.get(ticket_id)
+            return self._public(row) if row else None
+
+    def _select(self, status=None, priority=None):
+        """Rows matching the filters, using the smallest applicable index."""
+        sets = []
+        if status:
+            sets.append(self._by_status.get(status, set()))
+        if priority:
+            sets.append(self._by_priority.get(priority, set()))
+        if not sets:
+            return list(self._tickets.values())
+        ids = set.intersection(*sorted(sets, key=len))
+        return [self._tickets[i] for i in ids]
+
+    @staticmethod
+    def _order(rows, order_by):
+        """Sort rows by a storage.ORDERINGS clause like the SQLite engine's ORDER BY."""
+        terms = parse_order_by(order_by)
+        # Stable sorts from the last key to the first; id breaks ties like rowid order.
+        rows = sorted(rows, key=lambda r: r['id'])
+        for column, descending in reversed(terms):
+            rows.sort(key=lambda r: _sort_key(r[column]), reverse=descending)
+        return rows
+
+    def get_all_tickets(self, status=None, priority=None, order_by=DEFAULT_ORDER_BY, limit=None):
+        with self._lock:
+            rows = self._order(self._select(status, priority), order_by)
+            return [self._public(r) for r in rows[:limit]]
+
+    def set_aging_rate(self, per_hour):
+        with self._lock:
+            self.aging_per_hour = aging_rate(per_hour)
+            for row in self._tickets.values():
+                self._rekey(row)
+
+    def iter_tickets(self, status=None, priority=None, ticket_type=None, batch_size=500, include_archived=False):
+        with self._lock:
+            ids = list(self._tickets)  # ids are assigned in increasing order
+            if include_archived:
+                ids = sorted(ids + list(self._archive))
+
+        def lookup(ticket_id):
+            return self._tickets.get(ticket_id) or (self._archive.get(ticket_id) if include_archived else None)
+
+        for start in range(0, len(ids), batch_size):
+            with self._lock:
+                batch = [self._public(r) for r in map(lookup, ids[start:start + batch_size])
+                         if r is not None
+                         and (not status or r['status'] == status)
+                         and (not priority or r['priority'] == priority)
+                         and (not ticket_type or r['ticket_type'] == ticket_type)]
+            yield from batch
+
+    def update_ticket_status(self, ticket_id, status):
+        with self._lock:
+            row = self._tickets.get(ticket_id)
+            if row is None:
+                return False
+            now = datetime.now().isoformat()
+            resolved_at = (row['resolved_at'] or now) if status == 'resolved' else None
+            self._update(ticket_id, status=status, updated_at=now, resolved_at=resolved_at)
+            self._queue.discard(ticket_id)
+            if status == 'new':
+                self._queue.push(ticket_id, row['priority_score'])
+            return True
+
+    def delete_ticket(self, ticket_id):
+        with self._lock:
+            row = self._tickets.pop(ticket_id, None)
+            if row is not None:
+                self._index(row, -1)
+                self._signatures.pop(ticket_id, None)
+                self._queue.discard(ticket_id)
+            else:
+                row = self._archive.pop(ticket_id, None)
+                if row is not None:
+                    self._rollup(row, -1)
+
+    def archive_resolved(self, older_than_days, batch_size=500, now=None):
+        """Move old resolved tickets to the archive; see TicketStore.archive_resolved()."""
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=older_than_days)).isoformat()
+        moved = 0
+        while True:
+            # One batch per lock hold, like the SQLite engine's per-batch transactions.
+            with self._lock:
+                ids = sorted((self._tickets[i]['resolved_at'], i) for i in self._by_status.get('resolved', ())
+                             if self._tickets[i]['resolved_at'] < cutoff)[:batch_size]
+                for _, ticket_id in ids:
+                    row = self._tickets.pop(ticket_id)
+                    self._index(row, -1, rollups=False)
+                    self._signatures.pop(ticket_id, None)
+                    row['archived_at'] = now.isoformat()
+                    self._archive[ticket_id] = row
+            moved += len(ids)
+            if len(ids) < batch_size:
+                return moved
+
+    def get_stats(self):
+        with self._lock:
+            total = len(self._tickets)
+            compounds = [r['compound'] for r in self._tickets.values() if r['compound'] is not None]
+            avg_compound = sum(compounds) / len(compounds) if compounds else 0.0
+            return {
+                'total_tickets': total,
+                'new': len(self._by_status.get('new', ())),
+                'in_progress': len(self._by_status.get('in-progress', ())),
+                'critical': len(self._by_priority.get('critical', ())),
+                'high': len(self._by_priority.get('high', ())),
+                'avg_sentiment': round(avg_compound, 3)
+            }
+
+    def search(self, query, status=None, priority=None, limit=50, offset=0):
+        """
+        Case-insensitive substring match of every query term, like the SQLite
+        engine's fallback when FTS5 is unavailable (no stemming or ranking).
+        """
+        terms = [t.casefold() for t in TicketStore._query_terms(query) if t]
+        if not terms:
+            return []
+        with self._lock:
+            rows = [r for r in self._select(status, priority)
+                    if all(t in r['message'].casefold() for t in terms)]
+            rows = self._order(rows, 'priority_score DESC, id ASC')[offset:offset + limit]
+            return [dict(self._public(r), rank=0.0, snippet=None) for r in rows]
+
+    def get_trends(self, start=None, end=None, bucket='day'):
+        """Trends from the hourly rollups; arguments as TicketStore.get_trends()."""
+        size = trend_bucket_size(bucket)
+        start, end = _to_epoch(start), _to_epoch(end)
+        totals = defaultdict(lambda: [0, 0.0])
+        with self._lock:
+            for (hour, dim, value), (count, compound_sum) in self._rollups.items():
+                if start is not None and hour < start - start % ROLLUP_BUCKET_SECONDS:
+                    continue
+                if end is not None and hour >= end:
+                    continue
+                entry = totals[(hour // size * size, dim, value)]
+                entry[0] += count
+                entry[1] += compound_sum
+        rows = sorted((b, dim, value, count, compound_sum)
+                      for (b, dim, value), (count, compound_sum) in totals.items() if count != 0)
+        return build_trends(rows)
+
+    # ============ CUSTOMER PROFILES ============
+
+    def get_customer_profile(self, customer_name):
+        key = profile_key(customer_name)
+        with self._lock:
+            profile = self._profiles.get(key) if key is not None else None
+            return copy.deepcopy(profile) if profile else None
+
+    # ============ WORK QUEUE / DEDUP SUPPORT ============
+
+    def get_priority_scores(self, status='new'):
+        with self._lock:
+            return [(i, self._tickets[i]['priority_score']) for i in self._by_status.get(status, ())]
+
+    def claim_next_ticket(self, agent=None, lease_seconds=300):
+        """Lease from a process-local WorkQueue heap (nothing else shares this store)."""
+        return self._queue.claim(agent=agent, lease_seconds=lease_seconds)
+
+    def release_ticket(self, ticket_id, token):
+        return self._queue.release(ticket_id, token)
+
+    def queue_stats(self):
+        stats = self._queue.stats()
+        return {'waiting': stats['waiting'], 'leased': stats['leased']}
+
+    def recent_signatures(self, scheme, limit):
+        with self._lock:
+            rows = []
+            for ticket_id in sorted(self._signatures, reverse=True):
+                sig_scheme, blob = self._signatures[ticket_id]
+                if sig_scheme != scheme:
+                    continue
+                root = self._tickets[ticket_id]['duplicate_of'] or ticket_id
+                rows.append((ticket_id, root, blob))
+                if len(rows) >= limit:
+                    break
+            rows.reverse()
+            return rows
+
+    def get_duplicate_clusters(self, status=None, limit=50):
+        with self._lock:
+            clusters = []
+            for root_id, dup_ids in self._duplicates.items():
+                root = self._tickets.get(root_id)
+                if root is None:
+                    continue
+                if status:
+                    dup_ids = {i for i in dup_ids if self._tickets[i]['status'] == status}
+                if not dup_ids:
+                    continue
+                clusters.append(dict(self._public(root), duplicate_count=len(dup_ids),
+                                     duplicate_ids=sorted(dup_ids)))
+        clusters.sort(key=lambda c: (-c['duplicate_count'], -(c['priority_score'] or 0.0)))
+        return clusters[:limit]
+
+    # ============ RE-SCORING ============
+
+    def iter_ticket_chunks(self, chunk_size=500, after_id=0, stale_version=None):
+        # Ids are handed out in increasing order, so _tickets already iterates in
+        # id order: copy its keys (no sort), bisect to after_id and walk forward,
+        # taking the lock once per chunk_size ids examined. A fresh copy is only
+        # taken when the current one runs out, to pick up tickets added meanwhile.
+        versions = stale_version if isinstance(stale_version, dict) else {None: stale_version}
+        ids, pos = [], 0
+        while True:
+            rows = []
+            while len(rows) < chunk_size:
+                if pos == len(ids):
+                    with self._lock:
+                        ids = list(self._tickets)
+                    pos = bisect.bisect_right(ids, after_id)
+                    if pos == len(ids):
+                        break
+                with self._lock:
+                    for ticket_id in ids[pos:pos + chunk_size]:
+                        pos += 1
+                        after_id = ticket_id
+                        row = self._tickets.get(ticket_id)
+                        if row is None:
+                            continue
+                        if (stale_version is not None and row['scoring_version'] is not None
+                                and row['scoring_version'] == versions.get(row['lexicon_profile'], versions[None])):
+                            continue
+                        rows.append((ticket_id, row['message'], row['ticket_type'], row['lexicon_profile'],
+                                     row['profile_boost']))
+                        if len(rows) >= chunk_size:
+                            break
+            if not rows:
+                return
+            yield rows
+
+    def update_priorities(self, updates, scoring_version=None, checkpoint=None):
+        now = datetime.now().isoformat()
+        count = 0
+        with self._lock:
+            for ticket_id, p in updates:
+                count += 1
+                if ticket_id not in self._tickets:
+                    continue
+                self._update(
+                    ticket_id,
+                    priority=p.get('priority', 'normal'),
+                    priority_score=p.get('priority_score', 0.0),
+                    emotion=p.get('emotion'),
+                    compound=p.get('compound', 0.0),
+                    intensity=p.get('intensity', 'neutral'),
+                    urgency_flagged=1 if p.get('urgency_flagged') else 0,
+                    flagged_keywords=json.dumps(p.get('flagged_keywords', [])),
+                    reason=p.get('reason', ''),
+                    scoring_version=p.get('scoring_version', scoring_version),
+                    updated_at=now,
+                )
+                if self._tickets[ticket_id]['status'] == 'new':
+                    self._queue.push(ticket_id, self._tickets[ticket_id]['priority_score'])
+            if checkpoint is not None:
+                job, last_id = checkpoint
+                self._checkpoints[job] = last_id
+        return count
+
+    def get_checkpoint(self, job):
+        with self._lock:
+            return self._checkpoints.get(job, 0)
+
+    def clear_checkpoint(self, job):
+        with self._lock:
+            self._checkpoints.pop(job, None)
@@ -0,0 +1,176 @@
+"""
+Persistent, process-shared analysis cache stored in SQLite.
+
+Entries are keyed by a SHA-256 of (analysis version, kind, text). The
+analysis version is a hash of the VADER lexicon and the keyword tables the
+analysis depends on, so tuning any of them makes old entries unreachable;
+they are purged the next time a cache is bound to the new version.
+
+The database runs in WAL mode so many reader processes (server workers,
+batch jobs) can share it with concurrent writers.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from . import structure, summarizer
+from .resources import RESOURCES
+
+# Bump when the shape of cached analysis results changes.
+# 2: analysis budgets (approximate/budget fields, whole-text score reused).
+# 3: word mode scored by wordscore, summarized by generate_word_summary.
+CACHE_FORMAT = 3
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Reads refresh an entry's last_access at most this often (seconds), so hot
+# entries stay cached without turning every read into a write.
+TOUCH_INTERVAL = 300
+# Check the total size every this many writes.
+EVICT_CHECK_EVERY = 256
+
+
+def analysis_version(lexicon):
+    """Hash of everything that changes analysis output for a given text."""
+    h = hashlib.sha256()
+    h.update(f"format={CACHE_FORMAT}\n".encode())
+    for word in sorted(lexicon):
+        h.update(f"{word}\t{lexicon[word]!r}\n".encode("utf-8"))
+    h.update(repr(sorted(structure.BOOSTERS.items())).encode())
+    h.update(repr(sorted(structure.NEGATIONS)).encode())
+    h.update(repr(structure.NEGATION_SCALAR).encode())
+    h.update(repr(sorted((k, sorted(v)) for k, v in summarizer.EMOTION_LEXICON.items())).encode())
+    # Tokenization and noun lookup differ between NLTK and fallback modes.
+    h.update(repr(RESOURCES.modes()).encode())
+    return h.hexdigest()[:16]
+
+
+class PersistentAnalysisCache:
+    """
+    SQLite-backed cache of JSON-serializable values.
+
+    path: database file (created if missing).
+    max_bytes: approximate cap on the total size of stored values; the least
+               recently used entries are evicted beyond it.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = None
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.init_db()
+
+    def _conn(self):
+        # One connection per thread and per process: connections opened in a
+        # pre-fork master must not be reused by the forked workers.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def init_db(self):
+        conn = self._conn()
+        conn.execute('''CREATE TABLE IF NOT EXISTS analysis_cache (
+            key TEXT PRIMARY KEY,
+            version TEXT NOT NULL,
+            value TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            last_access REAL NOT NULL
+        )''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_analysis_cache_access ON analysis_cache(last_access)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_analysis_cache_version ON analysis_cache(version)')
+
+    def set_version(self, version):
+        """Bind the cache to an analysis version and purge entries of any other version."""
+        self.version = version
+        self._conn().execute('DELETE FROM analysis_cache WHERE version != ?', (version,))
+
+    def _key(self, kind, text):
+        h = hashlib.sha256()
+        h.update(f"{self.version}\0{kind}\0".encode())
+        h.update(text.encode("utf-8", "surrogatepass"))
+        return h.hexdigest()
+
+    def get(self, kind, text, loads=json.loads):
+        """Cached value for (kind, text), or None."""
+        key = self._key(kind, text)
+        conn = self._conn()
+        row = conn.execute('SELECT value, last_access FROM analysis_cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        now = time.time()
+        if now - row[1] > TOUCH_INTERVAL:
+            conn.execute('UPDATE analysis_cache SET last_access = ? WHERE key = ?', (now, key))
+        return loads(row[0])
+
+    def put(self, kind, text, value, dumps=json.dumps):
+        data = dumps(value)
+        conn = self._conn()
+        conn.execute('INSERT OR REPLACE INTO analysis_cache (key, version, value, size, last_access) VALUES (?, ?, ?, ?, ?)',
+                     (self._key(kind, text), self.version, data, len(data), time.time()))
+        self._writes += 1
+        if self._writes % EVICT_CHECK_EVERY == 0:
+            self.evict()
+
+    def get_or_compute(self, kind, text, compute, dumps=json.dumps, loads=json.loads):
+        value = self.get(kind, text, loads=loads)
+        if value is None:
+            value = compute()
+            self.put(kind, text, value, dumps=dumps)
+        return value
+
+    def evict(self):
+        """Drop least recently used entries until the total size is under max_bytes."""
+        conn = self._conn()
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM analysis_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        # Free an extra 10% so eviction does not run on every check.
+        to_free = total - int(self.max_bytes * 0.9)
+        freed = removed = 0
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute('SELECT key, size FROM analysis_cache ORDER BY last_access LIMIT 10000').fetchall()
+            doomed = []
+            for key, size in rows:
+                if freed >= to_free:
+                    break
+                doomed.append((key,))
+                freed += size
+            conn.executemany('DELETE FROM analysis_cache WHERE key = ?', doomed)
+            removed = len(doomed)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return removed
+
+    def clear(self):
+        self._conn().execute('DELETE FROM analysis_cache')
+
+    def stats(self):
+        count, total = self._conn().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache').fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'entries': count,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
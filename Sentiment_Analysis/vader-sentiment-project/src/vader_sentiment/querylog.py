@@ -0,0 +1,239 @@
+"""
+Statement timing and slow-query capture for the SQLite ticket store.
+
+A TicketStore built with a QueryLog opens its connections through
+QueryLog.connect(), whose cursors time every statement. The recorded time
+covers execute() plus fetching the rows. Each distinct statement (by SQL
+text) accumulates calls, total and max milliseconds, and rows. A
+statement slower than slow_ms is logged with its EXPLAIN QUERY PLAN.
+Plans that scan a whole table, or sort in a temporary b-tree, are flagged.
+With explain_all the plan of every distinct statement is checked once,
+whatever its speed.
+
+Without a QueryLog the store uses plain sqlite3 connections and pays
+nothing.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+import weakref
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_MS = 100.0
+# Distinct statements tracked; further new ones are timed but not aggregated.
+MAX_STATEMENTS = 500
+RECENT_SLOW = 50
+
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+# Schema lookups scan these tiny tables by design.
+_SCHEMA_TABLES = frozenset({"sqlite_master", "sqlite_schema", "sqlite_temp_master"})
+
+
+def _normalize(sql):
+    return " ".join(sql.split())
+
+
+def plan_problems(plan):
+    """'full_scan' and/or 'temp_sort' findings in EXPLAIN QUERY PLAN detail lines."""
+    problems = []
+    for detail in plan:
+        words = detail.split()
+        # "SCAN tickets" (or "SCAN TABLE tickets" on older SQLite) without an index.
+        if (words and words[0] == "SCAN" and "USING" not in words and "VIRTUAL" not in words
+                and not _SCHEMA_TABLES.intersection(words)):
+            if "full_scan" not in problems:
+                problems.append("full_scan")
+        if detail.startswith("USE TEMP B-TREE FOR ORDER BY") and "temp_sort" not in problems:
+            problems.append("temp_sort")
+    return problems
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's time and row count to its connection's QueryLog."""
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._pending = None
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self._pending = [sql, parameters, time.perf_counter() - start, 0]
+        if self.description is None:
+            self._pending[3] = max(self.rowcount, 0)
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._pending = [sql, None, time.perf_counter() - start, max(self.rowcount, 0)]
+        self._finish()
+        return self
+
+    def _timed(self, fetch, *args):
+        start = time.perf_counter()
+        result = fetch(*args)
+        if self._pending is not None:
+            self._pending[2] += time.perf_counter() - start
+        return result
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if self._pending is not None:
+            if row is None:
+                self._finish()
+            else:
+                self._pending[3] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._timed(super().fetchmany, size)
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            if len(rows) < size:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._pending is not None:
+            self._pending[3] += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, parameters, seconds, rows = pending
+            self.connection.query_log.record(self.connection, sql, parameters, seconds, rows)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors are InstrumentedCursors; set query_log after connecting."""
+
+    query_log = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cursors = weakref.WeakSet()
+
+    def cursor(self, factory=InstrumentedCursor):
+        cursor = super().cursor(factory)
+        if isinstance(cursor, InstrumentedCursor):
+            self._cursors.add(cursor)
+        return cursor
+
+    def close(self):
+        # Statements whose rows were never fully fetched are recorded now.
+        for cursor in list(self._cursors):
+            cursor._finish()
+        self._cursors = weakref.WeakSet()
+        super().close()
+
+
+class QueryLog:
+    """
+    Per-statement timing shared by every connection of one store.
+
+    slow_ms: statements at least this slow are logged with their plan (None never)
+    explain_all: check the plan of every distinct statement once, flagging scans
+    """
+
+    def __init__(self, slow_ms=DEFAULT_SLOW_MS, explain_all=False, max_statements=MAX_STATEMENTS):
+        self.slow_ms = slow_ms
+        self.explain_all = explain_all
+        self.max_statements = max_statements
+        self._stats = {}
+        self._plans = {}
+        self._recent_slow = deque(maxlen=RECENT_SLOW)
+        self._lock = threading.Lock()
+
+    def connect(self, db_path, **kwargs):
+        conn = sqlite3.connect(db_path, factory=InstrumentedConnection, **kwargs)
+        conn.query_log = self
+        return conn
+
+    def _plan(self, conn, key, sql, parameters):
+        """EXPLAIN QUERY PLAN detail lines for sql, cached by statement text."""
+        plan = self._plans.get(key)
+        if plan is None and parameters is not None and key.upper().startswith(_EXPLAINABLE):
+            try:
+                raw = sqlite3.Connection.cursor(conn, sqlite3.Cursor)
+                plan = [row[3] for row in raw.execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()]
+                raw.close()
+            except sqlite3.Error as e:
+                logger.debug("Could not explain %s: %s", key, e)
+                plan = []
+            with self._lock:
+                if len(self._plans) < self.max_statements:
+                    self._plans[key] = plan
+        return plan
+
+    def record(self, conn, sql, parameters, seconds, rows):
+        key = _normalize(sql)
+        ms = seconds * 1000.0
+        slow = self.slow_ms is not None and ms >= self.slow_ms
+        first_seen = key not in self._plans
+        plan = self._plan(conn, key, sql, parameters) if (slow or self.explain_all) else None
+        problems = plan_problems(plan) if plan else []
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None and len(self._stats) < self.max_statements:
+                entry = self._stats[key] = {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0,
+                                            'slow': 0, 'problems': []}
+            if entry is not None:
+                entry['calls'] += 1
+                entry['total_ms'] += ms
+                entry['max_ms'] = max(entry['max_ms'], ms)
+                entry['rows'] += rows
+                entry['slow'] += slow
+                entry['problems'] = sorted(set(entry['problems']) | set(problems))
+            if slow:
+                self._recent_slow.append({'sql': key, 'ms': round(ms, 2), 'rows': rows, 'plan': plan,
+                                          'problems': problems})
+        if slow:
+            logger.warning("Slow query (%.1f ms, %d rows%s): %s\n  plan: %s", ms, rows,
+                           f", {', '.join(problems)}" if problems else "", key, " | ".join(plan or []))
+        elif problems and first_seen:
+            logger.warning("Query plan %s: %s\n  plan: %s", ", ".join(problems), key, " | ".join(plan))
+
+    def stats(self, top=20):
+        """Slowest statements by total time, plus the most recent slow executions."""
+        with self._lock:
+            ranked = sorted(self._stats.items(), key=lambda kv: kv[1]['total_ms'], reverse=True)[:top]
+            return {
+                'slow_ms': self.slow_ms,
+                'statements': [
+                    {'sql': sql, **entry, 'total_ms': round(entry['total_ms'], 2),
+                     'max_ms': round(entry['max_ms'], 2)}
+                    for sql, entry in ranked
+                ],
+                'recent_slow': list(self._recent_slow),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._recent_slow.clear()
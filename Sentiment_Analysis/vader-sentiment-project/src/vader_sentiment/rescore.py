@@ -0,0 +1,194 @@
+"""
+Parallel, resumable re-prioritization of every ticket in a TicketStore.
+
+Run after tuning TicketPrioritizer thresholds or keyword sets:
+
+    python -m vader_sentiment.rescore --db support_tickets.db --workers 4 --only-stale
+
+Tickets are read in id-ordered chunks, scored in worker processes and
+written back one transaction per chunk. Each transaction also records the
+last committed id, so an interrupted run resumes where it stopped.
+"""
+
+import argparse
+import functools
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from . import resources
+from .analyzer import DEFAULT_CONFIG as ANALYZER_CONFIG, create_analyzer
+from .ticket_prioritizer import TicketPrioritizer
+from .ticket_store import TicketStore
+
+DEFAULT_JOB = "rescore"
+
+logger = logging.getLogger(__name__)
+
+_worker_prioritizer = None
+
+
+def default_prioritizer(config=None):
+    """
+    Prioritizer factory used in worker processes. The analyzer is built
+    like the server's (analyzer.create_analyzer, with the same analysis
+    budget), after loading the NLTK resources from NLTK_DATA_DIR.
+    """
+    config = dict(ANALYZER_CONFIG, **(config or {}))
+    resources.load_from_config(config)
+    return TicketPrioritizer(create_analyzer(config))
+
+
+def server_config(environ=None):
+    """
+    Analyzer settings as the support server reads them: analyzer.DEFAULT_CONFIG,
+    then SUPPORT_* environment variables (JSON values where they parse).
+    Lexicon overlays are read once, not reloaded, for the whole run.
+    """
+    config = dict(ANALYZER_CONFIG)
+    for key, value in (os.environ if environ is None else environ).items():
+        if key.startswith("SUPPORT_"):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+            config[key[len("SUPPORT_"):]] = value
+    config["LEXICON_RELOAD_SECONDS"] = None
+    return config
+
+
+def _init_worker(factory):
+    global _worker_prioritizer
+    _worker_prioritizer = factory()
+
+
+def score_chunk(rows, prioritizer=None):
+    """
+    Prioritize (id, message, ticket_type, lexicon_profile, profile_boost) rows; returns [(id, priority_data)].
+    Tickets whose lexicon profile is no longer available are scored with the base lexicon.
+    The repeat-customer boost a ticket got at ingestion is applied again. Each result
+    carries the 'scoring_version' of the profile it was scored with.
+    """
+    prioritizer = prioritizer or _worker_prioritizer
+    version = prioritizer.scoring_version()
+    out = []
+    for ticket_id, message, ticket_type, profile, boost in rows:
+        try:
+            prioritizer.analyzer.check_profile(profile)
+        except ValueError as e:
+            logger.warning("Ticket %s: %s; scoring with the base lexicon", ticket_id, e)
+            profile = None
+        priority_data = prioritizer.prioritize(message, profile=profile)
+        prioritizer.adjust_for_ticket_type(priority_data, ticket_type or 'support')
+        if boost:
+            prioritizer.apply_profile_boost(priority_data, boost)
+        priority_data['scoring_version'] = prioritizer.profile_scoring_version(version, profile)
+        out.append((ticket_id, priority_data))
+    return out
+
+
+def current_versions(prioritizer, version):
+    """{lexicon profile: scoring version} for every loaded profile, plus None: version."""
+    versions = {None: version}
+    lexicons = getattr(prioritizer.analyzer, 'lexicons', None)
+    if lexicons is not None:
+        for name in lexicons.names():
+            versions[name] = prioritizer.profile_scoring_version(version, name)
+    return versions
+
+
+def rescore_tickets(store, prioritizer=None, chunk_size=500, workers=1, only_stale=False,
+                    job=DEFAULT_JOB, restart=False, prioritizer_factory=default_prioritizer,
+                    progress=None):
+    """
+    Re-compute priority data for stored tickets.
+
+    store: TicketStorage (TicketStore or MemoryTicketStore)
+    prioritizer: used to compute the scoring version and, with workers <= 1,
+                 to score in-process; built from prioritizer_factory if omitted.
+    workers: number of scoring processes (each builds its own prioritizer
+             with prioritizer_factory); <= 1 scores in this process.
+    only_stale: skip tickets already stamped with the current scoring version
+                (for tickets with a lexicon profile, including its overlay version).
+    job: checkpoint name; a run with the same name resumes after the last
+         committed id unless restart is True.
+    progress: optional callable(summary_dict) invoked after each chunk.
+
+    Returns a summary dict.
+    """
+    prioritizer = prioritizer or prioritizer_factory()
+    version = prioritizer.scoring_version()
+    if restart:
+        store.clear_checkpoint(job)
+    start_id = store.get_checkpoint(job)
+    summary = {'job': job, 'scoring_version': version, 'resumed_after': start_id,
+               'updated': 0, 'chunks': 0, 'last_id': start_id}
+    started = time.time()
+    chunks = store.iter_ticket_chunks(chunk_size, after_id=start_id,
+                                      stale_version=current_versions(prioritizer, version) if only_stale else None)
+
+    def commit(scored):
+        if not scored:
+            return
+        last_id = scored[-1][0]
+        summary['updated'] += store.update_priorities(scored, scoring_version=version, checkpoint=(job, last_id))
+        summary['chunks'] += 1
+        summary['last_id'] = last_id
+        if progress:
+            progress(dict(summary))
+
+    if workers <= 1:
+        for rows in chunks:
+            commit(score_chunk(rows, prioritizer))
+    else:
+        # Keep a bounded window of chunks in flight and commit them in id
+        # order, so the checkpoint never skips past an uncommitted chunk.
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(prioritizer_factory,)) as pool:
+            pending = deque()
+            for rows in chunks:
+                pending.append(pool.submit(score_chunk, rows))
+                if len(pending) >= workers * 2:
+                    commit(pending.popleft().result())
+            while pending:
+                commit(pending.popleft().result())
+
+    store.clear_checkpoint(job)
+    summary['elapsed_seconds'] = round(time.time() - started, 3)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-prioritize stored tickets with the current scoring rules.")
+    parser.add_argument("--db", default="support_tickets.db", help="ticket database path")
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes")
+    parser.add_argument("--chunk-size", type=int, default=500, help="tickets per transaction")
+    parser.add_argument("--only-stale", action="store_true", help="skip tickets already at the current scoring version")
+    parser.add_argument("--job", default=DEFAULT_JOB, help="checkpoint name used to resume")
+    parser.add_argument("--restart", action="store_true", help="ignore any saved checkpoint")
+    parser.add_argument("--lexicon-dir", help="lexicon profile directory (default: SUPPORT_LEXICON_DIR)")
+    args = parser.parse_args(argv)
+
+    config = server_config()
+    if args.lexicon_dir:
+        config["LEXICON_DIR"] = args.lexicon_dir
+
+    store = TicketStore(db_path=args.db)
+    summary = rescore_tickets(
+        store,
+        prioritizer_factory=functools.partial(default_prioritizer, config),
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        only_stale=args.only_stale,
+        job=args.job,
+        restart=args.restart,
+        progress=lambda s: print(f"chunk {s['chunks']}: {s['updated']} updated, last id {s['last_id']}", flush=True),
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
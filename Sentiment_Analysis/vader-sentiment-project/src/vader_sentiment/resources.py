@@ -0,0 +1,167 @@
+"""
+NLTK resource management.
+
+The tokenizer (punkt) and POS tagger are located and loaded once, normally
+at server startup, from the configured data directories. Afterwards the
+analysis code only asks which mode is active:
+
+- tokenizer: "nltk" (nltk.word_tokenize) or "regex" (built-in fallback)
+- tagger: "nltk" (a preloaded PerceptronTagger) or "heuristic"
+  (nearest word instead of nearest noun)
+
+Nothing is downloaded or read from disk while handling a request. If
+load() was never called, the first lookup loads without downloading.
+"""
+
+import logging
+import os
+import threading
+import time
+
+try:
+    import nltk
+    NLTK_AVAILABLE = True
+except Exception:
+    nltk = None
+    NLTK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Newer NLTK releases ship the *_tab / *_eng variants; older ones the originals.
+TOKENIZER_RESOURCES = ("tokenizers/punkt_tab/english/", "tokenizers/punkt")
+TAGGER_RESOURCES = ("taggers/averaged_perceptron_tagger_eng/", "taggers/averaged_perceptron_tagger")
+
+WARM_UP_TEXT = "The system was down all morning. Please help us fix the login page."
+
+
+class NLTKResources:
+    """Which NLTK components are usable in this process, decided once."""
+
+    def __init__(self):
+        self.tokenizer = None
+        self.tagger = None
+        self.details = {}
+        self._pos_tagger = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.tokenizer is not None
+
+    def load(self, data_dir=None, download=False, warm=True):
+        """
+        Locate and load punkt and the POS tagger, then record the active modes.
+
+        data_dir: extra NLTK data directory searched first (e.g. a vendored
+                  copy on a network-isolated host).
+        download: try nltk.download() into data_dir once for anything
+                  missing. Only do this at startup.
+        warm: run one tokenize + tag pass so lazy loading is paid here.
+
+        Returns status().
+        """
+        with self._lock:
+            started = time.perf_counter()
+            details = {"nltk_installed": NLTK_AVAILABLE, "data_dir": data_dir}
+            tokenizer, tagger, pos_tagger = "regex", "heuristic", None
+            if NLTK_AVAILABLE:
+                if data_dir:
+                    data_dir = os.path.abspath(data_dir)
+                    if data_dir not in nltk.data.path:
+                        nltk.data.path.insert(0, data_dir)
+                found = self._find(TOKENIZER_RESOURCES, download, data_dir, details, "tokenizer")
+                if found:
+                    tokenizer = "nltk"
+                found = self._find(TAGGER_RESOURCES, download, data_dir, details, "tagger")
+                if found:
+                    try:
+                        pos_tagger = nltk.tag.PerceptronTagger()
+                        tagger = "nltk"
+                    except Exception as e:
+                        details["tagger_error"] = repr(e)
+                if warm:
+                    tokens = WARM_UP_TEXT.split()
+                    if tokenizer == "nltk":
+                        try:
+                            tokens = nltk.word_tokenize(WARM_UP_TEXT)
+                        except Exception as e:
+                            details["tokenizer_error"] = repr(e)
+                            tokenizer = "regex"
+                    if pos_tagger is not None:
+                        try:
+                            pos_tagger.tag(tokens)
+                        except Exception as e:
+                            details["tagger_error"] = repr(e)
+                            tagger, pos_tagger = "heuristic", None
+            details["load_seconds"] = round(time.perf_counter() - started, 4)
+            self.tokenizer, self.tagger, self._pos_tagger, self.details = tokenizer, tagger, pos_tagger, details
+            return self.status()
+
+    @staticmethod
+    def _find(candidates, download, data_dir, details, kind):
+        for name in candidates:
+            try:
+                nltk.data.find(name)
+                details[kind + "_resource"] = name
+                return True
+            except LookupError:
+                continue
+        if download:
+            for name in candidates:
+                package = name.rstrip("/").split("/")[1]
+                try:
+                    if nltk.download(package, download_dir=data_dir, quiet=True):
+                        nltk.data.find(name)
+                        details[kind + "_resource"] = name
+                        details[kind + "_downloaded"] = True
+                        return True
+                except Exception:
+                    continue
+        return False
+
+    def _ensure_loaded(self):
+        if self.tokenizer is None:
+            self.load(warm=False)
+
+    def tokenizer_ready(self):
+        """True if nltk.word_tokenize can be used without any I/O."""
+        self._ensure_loaded()
+        return self.tokenizer == "nltk"
+
+    def pos_tag(self, tokens):
+        """[(token, tag)] from the preloaded tagger, or None in heuristic mode."""
+        self._ensure_loaded()
+        if self._pos_tagger is None:
+            return None
+        return self._pos_tagger.tag(tokens)
+
+    def modes(self):
+        """(tokenizer, tagger) modes, loading on first use."""
+        self._ensure_loaded()
+        return self.tokenizer, self.tagger
+
+    def status(self):
+        return {"tokenizer": self.tokenizer, "tagger": self.tagger, **self.details}
+
+
+# Process-wide instance used by structure and summarizer.
+RESOURCES = NLTKResources()
+
+
+def load(data_dir=None, download=False, warm=True):
+    return RESOURCES.load(data_dir=data_dir, download=download, warm=warm)
+
+
+def load_from_config(config):
+    """load() with the NLTK_DATA_DIR, NLTK_DOWNLOAD and WARM_UP settings; logs the chosen modes."""
+    result = load(
+        data_dir=config.get("NLTK_DATA_DIR"),
+        download=bool(config.get("NLTK_DOWNLOAD")),
+        warm=bool(config.get("WARM_UP")),
+    )
+    logger.info("NLTK tokenizer=%s tagger=%s", result["tokenizer"], result["tagger"])
+    return result
+
+
+def status():
+    return RESOURCES.status()
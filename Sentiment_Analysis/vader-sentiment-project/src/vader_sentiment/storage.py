@@ -0,0 +1,359 @@
+"""
+Ticket storage interface.
+
+TicketStorage lists the operations the servers and batch jobs use.
+Two engines implement it: ticket_store.TicketStore (SQLite, the default)
+and memory_store.MemoryTicketStore (process-local dicts and indexes, for
+tests, benchmarks and throwaway demo instances). create_store() picks one
+from a server config.
+"""
+
+import calendar
+import re
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from datetime import datetime, timezone
+
+ROLLUP_BUCKET_SECONDS = 3600
+ROLLUP_DIMENSIONS = ('priority', 'emotion', 'status')
+TREND_BUCKETS = {'hour': 3600, 'day': 86400, 'week': 7 * 86400}
+
+STORAGE_ENGINES = ('sqlite', 'memory')
+
+# SLA aging: a waiting ticket's aged score grows by this much priority_score
+# per hour, so a 0.3 'normal' ticket outranks a fresh 0.6 'high' one after 30h.
+DEFAULT_AGING_PER_HOUR = 0.01
+AGING_ORDER_BY = 'aging_key ASC, id ASC'
+
+# get_all_tickets() orderings, each served by an index (or the rowid) in the
+# SQLite engine so no call site can trigger an unindexed sort.
+DEFAULT_ORDER_BY = 'priority_score DESC, created_at DESC'
+ORDERINGS = frozenset({
+    DEFAULT_ORDER_BY,
+    'priority_score DESC, id ASC',
+    'created_at DESC',
+    'created_at ASC',
+    'updated_at DESC',
+    'id ASC',
+    'id DESC',
+    AGING_ORDER_BY,
+})
+
+_ORDER_TERM = re.compile(r"^\s*(\w+)(?:\s+(ASC|DESC))?\s*$", re.IGNORECASE)
+
+# Weight of the newest ticket in a customer profile's compound EWMA.
+PROFILE_EWMA_ALPHA = 0.3
+# Customer names that are not a real customer and get no profile.
+ANONYMOUS_CUSTOMERS = frozenset({'', 'anonymous'})
+
+
+def trend_bucket_size(bucket):
+    """Seconds per trend bucket for 'hour'/'day'/'week' or a multiple of 3600; ValueError otherwise."""
+    size = TREND_BUCKETS.get(bucket, bucket)
+    if not isinstance(size, int) or size <= 0 or size % ROLLUP_BUCKET_SECONDS:
+        raise ValueError(f"bucket must be one of {sorted(TREND_BUCKETS)} or a positive multiple of 3600 seconds")
+    return size
+
+
+def build_trends(rows):
+    """
+    Assemble get_trends() output from (bucket_start, dimension, value, tickets, compound_sum)
+    rows already re-bucketed to the requested size.
+    """
+    buckets = {}
+    for b, dim, value, count, compound_sum in rows:
+        entry = buckets.setdefault(b, {
+            'bucket_start': datetime.fromtimestamp(b, timezone.utc).replace(tzinfo=None).isoformat(),
+            'tickets': 0,
+            'compound_sum': 0.0,
+            **{d: {} for d in ROLLUP_DIMENSIONS},
+        })
+        entry[dim][value] = count
+        if dim == 'priority':
+            entry['tickets'] += count
+            entry['compound_sum'] += compound_sum
+    trends = []
+    for b in sorted(buckets):
+        entry = buckets[b]
+        total = entry['tickets']
+        entry['avg_compound'] = round(entry.pop('compound_sum') / total, 3) if total else 0.0
+        trends.append(entry)
+    return trends
+
+
+def aging_rate(per_hour):
+    """per_hour as a float; ValueError unless it is positive."""
+    rate = float(per_hour)
+    if not rate > 0:
+        raise ValueError("aging rate must be a positive priority_score gain per hour")
+    return rate
+
+
+def aging_key(priority_score, created_epoch, per_hour):
+    """
+    Time-independent sort key for linear SLA aging: created_epoch minus the
+    hours of waiting that priority_score is worth.
+
+    A ticket's aged score at time t is
+    priority_score + per_hour * (t - created_epoch) / 3600, which is
+    per_hour / 3600 * (t - aging_key). Ascending aging_key is therefore
+    descending aged score at every t, and the key never needs refreshing.
+    The SQLite engine computes the same expression in a trigger.
+    """
+    return created_epoch - (priority_score or 0.0) * 3600.0 / per_hour
+
+
+def aged_score(ticket, per_hour, now_epoch):
+    """Aged score of a ticket dict (with aging_key) at now_epoch."""
+    return round(per_hour * (now_epoch - ticket['aging_key']) / 3600.0, 4)
+
+
+def parse_order_by(order_by):
+    """
+    'col [ASC|DESC], ...' -> ((column, descending), ...) if it is one of
+    ORDERINGS (direction defaults to ASC, case-insensitive); ValueError otherwise.
+    """
+    terms = []
+    for part in order_by.split(','):
+        match = _ORDER_TERM.match(part)
+        if not match:
+            raise ValueError(f"Unsupported order_by term: {part.strip()!r}")
+        terms.append((match.group(1).lower(), (match.group(2) or 'ASC').upper() == 'DESC'))
+    canonical = ', '.join(f"{column} {'DESC' if desc else 'ASC'}" for column, desc in terms)
+    if canonical not in ORDERINGS:
+        raise ValueError(f"Unsupported order_by {order_by!r}; expected one of: {' | '.join(sorted(ORDERINGS))}")
+    return tuple(terms)
+
+
+def profile_key(customer_name):
+    """Key of a customer's profile, or None for anonymous/missing names."""
+    if customer_name is None:
+        return None
+    name = customer_name.strip()
+    if name.casefold() in ANONYMOUS_CUSTOMERS:
+        return None
+    return name
+
+
+def update_profile(profile, priority_data, now, alpha=PROFILE_EWMA_ALPHA):
+    """
+    Fold one new ticket into a customer profile in O(1).
+
+    profile: the previous profile dict, or None for a first ticket.
+    priority_data: the ticket's TicketPrioritizer output (may be None).
+    now: the ticket's created_at (ISO string).
+
+    Returns the new profile dict (ticket_count, compound_ewma,
+    emotion_counts, last_critical_at, first_ticket_at, last_ticket_at).
+    """
+    p = priority_data or {}
+    compound = p.get('compound') or 0.0
+    emotion = p.get('emotion')
+    if profile is None:
+        profile = {'ticket_count': 0, 'compound_ewma': compound, 'emotion_counts': {},
+                   'last_critical_at': None, 'first_ticket_at': now}
+    else:
+        profile = dict(profile, emotion_counts=dict(profile['emotion_counts']))
+        profile['compound_ewma'] += alpha * (compound - profile['compound_ewma'])
+    profile['ticket_count'] += 1
+    if emotion:
+        profile['emotion_counts'][emotion] = profile['emotion_counts'].get(emotion, 0) + 1
+    if p.get('priority') == 'critical':
+        profile['last_critical_at'] = now
+    profile['last_ticket_at'] = now
+    return profile
+
+
+class TicketStorage(ABC):
+    """
+    Operations every ticket storage engine provides.
+
+    Tickets are returned as plain dicts with the columns of the SQLite
+    ``tickets`` table (flagged_keywords parsed to a list).
+    """
+
+    fts_enabled = False
+
+    @abstractmethod
+    def add_ticket(self, message, customer_name=None, priority_data=None, ticket_type='support', category=None,
+                   scoring_version=None, duplicate_of=None, signature=None, lexicon_profile=None):
+        """Store a new ticket and fold it into its customer's profile atomically; returns its id."""
+
+    def add_ticket_async(self, message, customer_name=None, priority_data=None, ticket_type='support',
+                         category=None, scoring_version=None, duplicate_of=None, signature=None,
+                         lexicon_profile=None):
+        """add_ticket() returning a Future of the ticket id; engines without a writer thread complete it at once."""
+        future = Future()
+        try:
+            future.set_result(self.add_ticket(message, customer_name, priority_data, ticket_type, category,
+                                              scoring_version, duplicate_of, signature, lexicon_profile))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def close(self):
+        """Release background resources (writer threads); the default engine has none."""
+
+    @abstractmethod
+    def archive_resolved(self, older_than_days, batch_size=500, now=None):
+        """Move tickets resolved more than older_than_days ago out of the live set; returns the number moved."""
+
+    def incremental_vacuum(self, max_pages=None):
+        """Return free pages to the filesystem; returns the number released (engines without files: 0)."""
+        return 0
+
+    @abstractmethod
+    def get_ticket(self, ticket_id):
+        """Ticket dict or None."""
+
+    @abstractmethod
+    def get_all_tickets(self, status=None, priority=None, order_by=DEFAULT_ORDER_BY, limit=None):
+        """Tickets, optionally filtered by status and priority; order_by must be in ORDERINGS."""
+
+    @abstractmethod
+    def set_aging_rate(self, per_hour):
+        """Change the SLA aging rate (see aging_key) and re-key every ticket."""
+
+    def get_aging_queue(self, status='new', limit=50, now=None):
+        """
+        Oldest-most-urgent tickets first (AGING_ORDER_BY), each with its
+        'aged_score' at now (a naive local datetime; default the current time).
+        """
+        now_epoch = calendar.timegm((now or datetime.now()).timetuple())
+        tickets = self.get_all_tickets(status=status, order_by=AGING_ORDER_BY, limit=limit)
+        for t in tickets:
+            t['aged_score'] = aged_score(t, self.aging_per_hour, now_epoch)
+        return tickets
+
+    @abstractmethod
+    def iter_tickets(self, status=None, priority=None, ticket_type=None, batch_size=500, include_archived=False):
+        """
+        Yield tickets in id order, holding at most batch_size rows in memory.
+        include_archived also yields archived tickets, which carry 'archived_at'.
+        """
+
+    @abstractmethod
+    def update_ticket_status(self, ticket_id, status):
+        """
+        Set a ticket's status ('new', 'in-progress', 'resolved'), stamping
+        resolved_at on resolution. Returns False when no live ticket has the
+        id (missing or archived).
+        """
+
+    @abstractmethod
+    def delete_ticket(self, ticket_id):
+        """Delete a ticket."""
+
+    @abstractmethod
+    def get_stats(self):
+        """Summary counts: total_tickets, new, in_progress, critical, high, avg_sentiment."""
+
+    @abstractmethod
+    def search(self, query, status=None, priority=None, limit=50, offset=0):
+        """Tickets whose message matches query, best first, with 'rank' and 'snippet'."""
+
+    @abstractmethod
+    def get_trends(self, start=None, end=None, bucket='day'):
+        """Per-bucket ticket counts and average compound (see TicketStore.get_trends)."""
+
+    @abstractmethod
+    def get_customer_profile(self, customer_name):
+        """Profile dict of a customer (see update_profile), or None."""
+
+    @abstractmethod
+    def get_priority_scores(self, status='new'):
+        """[(ticket_id, priority_score)] of tickets with this status."""
+
+    @abstractmethod
+    def claim_next_ticket(self, agent=None, lease_seconds=300):
+        """
+        Lease the highest-priority 'new' ticket (ties to the oldest) that no
+        live lease holds. Returns {'ticket_id', 'token', 'agent',
+        'expires_in'}, or None if nothing is waiting.
+        """
+
+    @abstractmethod
+    def release_ticket(self, ticket_id, token):
+        """End a lease so the ticket can be claimed again; False if token does not hold it."""
+
+    @abstractmethod
+    def queue_stats(self):
+        """{'waiting', 'leased'} counts of 'new' tickets."""
+
+    @abstractmethod
+    def recent_signatures(self, scheme, limit):
+        """[(ticket_id, root_id, signature_bytes)] of the newest signed tickets, oldest first."""
+
+    @abstractmethod
+    def get_duplicate_clusters(self, status=None, limit=50):
+        """Original tickets with 'duplicate_count' and 'duplicate_ids', largest first."""
+
+    @abstractmethod
+    def iter_ticket_chunks(self, chunk_size=500, after_id=0, stale_version=None):
+        """
+        Yield lists of (id, message, ticket_type, lexicon_profile, profile_boost) in id order.
+        stale_version is a version string, or a dict of lexicon profile -> version whose
+        None entry covers tickets without a listed profile.
+        """
+
+    @abstractmethod
+    def update_priorities(self, updates, scoring_version=None, checkpoint=None):
+        """
+        Write (ticket_id, priority_data) updates atomically; returns the number written.
+        A 'scoring_version' in priority_data overrides scoring_version for that row.
+        """
+
+    @abstractmethod
+    def get_checkpoint(self, job):
+        """Last ticket id committed by a resumable job, or 0."""
+
+    @abstractmethod
+    def clear_checkpoint(self, job):
+        """Forget a job's checkpoint."""
+
+    def get_tickets_by_priority(self):
+        """Get all tickets grouped by priority tier."""
+        all_tickets = self.get_all_tickets()
+        return {
+            'critical': [t for t in all_tickets if t['priority'] == 'critical'],
+            'high': [t for t in all_tickets if t['priority'] == 'high'],
+            'normal': [t for t in all_tickets if t['priority'] == 'normal']
+        }
+
+    def get_tickets_by_type(self):
+        """Get all tickets grouped by type (support vs suggestion/recommendation)."""
+        all_tickets = self.get_all_tickets()
+        return {
+            'support': [t for t in all_tickets if t.get('ticket_type') == 'support'],
+            'suggestion': [t for t in all_tickets if t.get('ticket_type') in ('suggestion', 'recommendation')],
+        }
+
+
+def create_store(config):
+    """
+    Storage engine selected by config["STORAGE"]: 'sqlite' (TicketStore at
+    config["DB_PATH"]) or 'memory' (MemoryTicketStore; contents are lost on exit).
+    """
+    engine = str(config.get("STORAGE") or "sqlite").lower()
+    if engine == "sqlite":
+        from .ticket_store import DEFAULT_COMPRESS_THRESHOLD, TicketStore
+        query_log = None
+        if config.get("SLOW_QUERY_MS") is not None or config.get("QUERY_EXPLAIN_ALL"):
+            from .querylog import QueryLog
+            slow_ms = config.get("SLOW_QUERY_MS")
+            query_log = QueryLog(slow_ms=None if slow_ms is None else float(slow_ms),
+                                 explain_all=bool(config.get("QUERY_EXPLAIN_ALL")))
+        compress = config.get("MESSAGE_COMPRESS_BYTES", DEFAULT_COMPRESS_THRESHOLD)
+        store = TicketStore(db_path=config["DB_PATH"], query_log=query_log,
+                            aging_per_hour=config.get("AGING_PER_HOUR"),
+                            compress_threshold=int(compress) if compress else None)
+        if config.get("GROUP_COMMIT"):
+            store.start_writer(max_delay=float(config.get("GROUP_COMMIT_DELAY_MS", 2)) / 1000.0,
+                               max_batch=int(config.get("GROUP_COMMIT_MAX_BATCH", 256)),
+                               synchronous=config.get("SQLITE_SYNCHRONOUS", "FULL"))
+        return store
+    if engine == "memory":
+        from .memory_store import MemoryTicketStore
+        aging = config.get("AGING_PER_HOUR")
+        return MemoryTicketStore(aging_per_hour=DEFAULT_AGING_PER_HOUR if aging is None else aging)
+    raise ValueError(f"Unknown STORAGE engine {engine!r}; expected one of {', '.join(STORAGE_ENGINES)}")
@@ -1,4 +1,6 @@
 import re
+from .compact import Note, TokenTable
+from .resources import RESOURCES
 try:
     import nltk
     NLTK_AVAILABLE = True
@@ -6,69 +8,90 @@ except Exception:
     nltk = None
     NLTK_AVAILABLE = False
 
+NEGATIONS = frozenset(["not","n't","no","never","none","nobody","nothing","neither","nowhere","hardly","rarely","scarcely"])
+BOOSTERS = { "very":1.5, "extremely":2.0, "really":1.4, "quite":1.2, "too":1.2, "so":1.4, "absolutely":1.8, "slightly":0.5, "barely":0.5 }
+NEGATION_SCALAR = -0.74
+
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
 def split_sentences(text):
-    parts = re.split(r'(?<=[.!?])\s+', text.strip())
+    parts = SENTENCE_BREAK.split(text.strip())
     return [p for p in parts if p]
 
 def split_words(text):
-    if NLTK_AVAILABLE:
+    # punkt availability is decided once by resources.load(); never download here.
+    if NLTK_AVAILABLE and RESOURCES.tokenizer_ready():
         try:
             return nltk.word_tokenize(text)
-        except LookupError:
-            try:
-                nltk.download('punkt', quiet=True)
-                return nltk.word_tokenize(text)
-            except Exception:
-                pass
         except Exception:
             pass
     return re.findall(r"\b[\w']+\b|[^\s\w]", text)
 
-def analyze_with_structure(sentence, analyzer, negation_window=3):
+def score_tokens(sentence, analyzer, negation_window=3):
+    """
+    Per-word structure scoring into a compact TokenTable.
+    Returns (table, structure_score).
+    """
     lex = getattr(analyzer, "lexicon", {})
     words = split_words(sentence)
     lower_words = [w.lower() for w in words]
 
-    NEGATIONS = set(["not","n't","no","never","none","nobody","nothing","neither","nowhere","hardly","rarely","scarcely"])
-    BOOSTERS = { "very":1.5, "extremely":2.0, "really":1.4, "quite":1.2, "too":1.2, "so":1.4, "absolutely":1.8, "slightly":0.5, "barely":0.5 }
-    NEGATION_SCALAR = -0.74
-
-    word_contribs = []
-    sentence_score = 0.0
     punct_factor = 1.0
     exclaims = sentence.count('!')
     questions = sentence.count('?')
     punct_factor += min(3, exclaims) * 0.08
     punct_factor += min(2, questions) * 0.03
 
+    table = TokenTable(punct_factor)
+    sentence_score = 0.0
+
     for i, w in enumerate(words):
         lw = lower_words[i]
         base = 0.0
-        notes = []
+        flags = 0
         if lw in lex:
             base = lex[lw]
-            notes.append("lexicon")
+            flags |= Note.LEXICON
         else:
             stripped = re.sub(r"^[^\w]+|[^\w]+$", "", lw)
             if stripped in lex:
                 base = lex[stripped]
-                notes.append("lexicon(stripped)")
+                flags |= Note.LEXICON_STRIPPED
         adjusted = base
         if i-1 >= 0:
             prev = lower_words[i-1]
             if prev in BOOSTERS:
                 adjusted *= BOOSTERS[prev]
-                notes.append(f"booster({prev})")
+                flags |= Note.BOOSTER
         neg_found = any(lower_words[j] in NEGATIONS for j in range(max(0, i-negation_window), i))
         if neg_found and base != 0:
             adjusted *= NEGATION_SCALAR
-            notes.append("negation")
+            flags |= Note.NEGATION
         if base != 0:
             adjusted *= punct_factor
             if punct_factor != 1.0:
-                notes.append(f"punct({punct_factor:.2f})")
+                flags |= Note.PUNCT
         sentence_score += adjusted
-        word_contribs.append({"word": w, "base": base, "adjusted": adjusted, "notes": notes})
+        table.append(w, base, adjusted, flags)
+
+    return table, sentence_score
+
+def analyze_with_structure(sentence, analyzer, negation_window=3, compact=False):
+    """
+    Structure-aware per-word analysis of one sentence.
 
+    compact: return "words" as a TokenTable instead of a list of
+    {"word","base","adjusted","notes"} dicts.
+    """
+    cache = getattr(analyzer, "sentence_cache", None)
+    if cache is not None:
+        # Tables are never mutated after scoring, so cached ones are shared.
+        # The analyzer's cache key tells lexicon profiles apart.
+        table, sentence_score = cache.get_or_compute(
+            ("structure", getattr(analyzer, "key", "vader"), negation_window), sentence,
+            lambda: score_tokens(sentence, analyzer, negation_window))
+    else:
+        table, sentence_score = score_tokens(sentence, analyzer, negation_window)
     vader_scores = analyzer.polarity_scores(sentence)
-    return {"words": word_contribs, "structure_score": sentence_score, "vader_scores": vader_scores}
\ No newline at end of file
+    words = table if compact else table.to_verbose()
+    return {"words": words, "structure_score": sentence_score, "vader_scores": vader_scores}
\ No newline at end of file
@@ -1,5 +1,6 @@
 import re
 from . import structure
+from .resources import RESOURCES
 try:
     import nltk
     NLTK_AVAILABLE = True
@@ -7,6 +8,16 @@ except Exception:
     nltk = None
     NLTK_AVAILABLE = False
 
+# simple emotion lexicon (expand as needed)
+EMOTION_LEXICON = {
+    "joy": {"happy","joy","love","delighted","pleased","glad","excited","enjoy"},
+    "anger": {"angry","enraged","furious","hate","annoyed","irritat","rage"},
+    "sadness": {"sad","unhappy","depressed","mourn","sorrow","sorry","gloom"},
+    "fear": {"afraid","scared","fear","terrified","panic","worried","anxious"},
+    "surprise": {"surprise","shocked","astonish","amazed","wow"},
+    "disgust": {"disgust","gross","nasty","sick","revolting","repuls"}
+}
+
 def sentiment_label(compound):
     if compound >= 0.05:
         return "positive"
@@ -14,23 +25,10 @@ def sentiment_label(compound):
         return "negative"
     return "neutral"
 
-def _ensure_nltk_resource(name):
-    if not NLTK_AVAILABLE:
-        return False
-    try:
-        nltk.data.find(name)
-        return True
-    except LookupError:
-        try:
-            nltk.download(name.split('/')[-1], quiet=True)
-            return True
-        except Exception:
-            return False
-
 def _get_nearest_noun(tokens, target_index):
-    if NLTK_AVAILABLE and _ensure_nltk_resource('taggers/averaged_perceptron_tagger'):
+    if NLTK_AVAILABLE:
         try:
-            tags = nltk.pos_tag(tokens)
+            tags = RESOURCES.pos_tag(tokens) or []
             for dist in range(0, max(len(tokens), 5)):
                 for idx in (target_index - dist, target_index + dist):
                     if 0 <= idx < len(tags) and tags[idx][1].startswith('NN'):
@@ -45,24 +43,28 @@ def _get_nearest_noun(tokens, target_index):
             return tokens[idx]
     return None
 
-def generate_summary(text, analyzer, mode="structured", sentences_limit=5):
-    overall_scores = analyzer.polarity_scores(text)
+def generate_summary(text, analyzer, mode="structured", sentences_limit=5, deadline=None, overall_scores=None):
+    if overall_scores is None:
+        overall_scores = analyzer.polarity_scores(text)
     overall_label = sentiment_label(overall_scores['compound'])
     lines = [f"Overall sentiment: {overall_label} (compound={overall_scores['compound']:.3f})"]
     sents = structure.split_sentences(text) or [text]
     for si, s in enumerate(sents[:sentences_limit], start=1):
-        res = structure.analyze_with_structure(s, analyzer)
-        words_info = res["words"]
-        if not words_info:
+        if deadline is not None and deadline.expired():
+            lines.append("...remaining sentences skipped (time budget).")
+            return "\n".join(lines)
+        res = structure.analyze_with_structure(s, analyzer, compact=True)
+        table = res["words"]
+        if not table:
             lines.append(f"Sentence {si}: no strong sentiment words detected.")
             continue
-        sorted_words = sorted(enumerate(words_info), key=lambda iv: abs(iv[1]['adjusted']), reverse=True)
-        top = sorted_words[:2]
+        sorted_idx = sorted(range(len(table)), key=lambda i: abs(table.adjusted[i]), reverse=True)
+        top = sorted_idx[:2]
         parts = []
         tokens = structure.split_words(s)
-        for idx, info in top:
-            w = info['word']
-            adj = info['adjusted']
+        for idx in top:
+            w = table.words[idx]
+            adj = table.adjusted[idx]
             polarity = "positive" if adj > 0 else ("negative" if adj < 0 else "neutral")
             target = _get_nearest_noun(tokens, idx)
             if target:
@@ -75,7 +77,25 @@ def generate_summary(text, analyzer, mode="structured", sentences_limit=5):
         lines.append(f"...and {len(sents)-sentences_limit} more sentences omitted.")
     return "\n".join(lines)
 
-def detect_tone_context(text, analyzer, top_k=3):
+def generate_word_summary(segments, overall_scores, top_k=5):
+    """Summary for word mode from already scored {"text", "vader"} segments."""
+    overall_label = sentiment_label(overall_scores['compound'])
+    lines = [f"Overall sentiment: {overall_label} (compound={overall_scores['compound']:.3f})"]
+    strongest = {}
+    for seg in segments:
+        c = seg["vader"]["compound"]
+        if c != 0.0:
+            word = seg["text"].lower()
+            if abs(c) > abs(strongest.get(word, 0.0)):
+                strongest[word] = c
+    if not strongest:
+        lines.append("No sentiment-bearing words detected.")
+    else:
+        top = sorted(strongest.items(), key=lambda kv: (-abs(kv[1]), kv[0]))[:top_k]
+        lines.append("Strongest words: " + ", ".join(f"{w} ({c:+.3f})" for w, c in top))
+    return "\n".join(lines)
+
+def detect_tone_context(text, analyzer, top_k=3, deadline=None, overall_scores=None):
     """
     Return a small context/tone summary:
       - tone_label: low/neutral/positive/negative with intensity
@@ -83,11 +103,14 @@ def detect_tone_context(text, analyzer, top_k=3):
       - emotion_scores: counts/weights per emotion
       - main_targets: nouns likely targeted by sentiment words
       - strong_words: top_k words contributing most to sentiment (adjusted)
+
+    deadline: optional budget.Deadline; sentences after it expires are not scored.
+    overall_scores: polarity_scores(text) if the caller already has them.
     """
     from . import structure as _structure
 
     # overall VADER
-    vs = analyzer.polarity_scores(text)
+    vs = overall_scores if overall_scores is not None else analyzer.polarity_scores(text)
     compound = vs['compound']
     # intensity buckets
     if abs(compound) >= 0.6:
@@ -103,15 +126,7 @@ def detect_tone_context(text, analyzer, top_k=3):
     elif compound <= -0.05:
         tone_label = f"{intensity} negative"
 
-    # simple emotion lexicon (expand as needed)
-    EMO = {
-        "joy": {"happy","joy","love","delighted","pleased","glad","excited","enjoy"},
-        "anger": {"angry","enraged","furious","hate","annoyed","irritat","rage"},
-        "sadness": {"sad","unhappy","depressed","mourn","sorrow","sorry","gloom"},
-        "fear": {"afraid","scared","fear","terrified","panic","worried","anxious"},
-        "surprise": {"surprise","shocked","astonish","amazed","wow"},
-        "disgust": {"disgust","gross","nasty","sick","revolting","repuls"}
-    }
+    EMO = EMOTION_LEXICON
 
     # analyze by sentence and words
     sents = _structure.split_sentences(text) or [text]
@@ -119,10 +134,12 @@ def detect_tone_context(text, analyzer, top_k=3):
     word_hits = []
 
     for si, s in enumerate(sents):
-        struct = _structure.analyze_with_structure(s, analyzer)
-        for i, info in enumerate(struct["words"]):
-            w = info["word"]
-            adj = info["adjusted"]
+        if deadline is not None and deadline.expired():
+            break
+        struct = _structure.analyze_with_structure(s, analyzer, compact=True)
+        table = struct["words"]
+        for i, w in enumerate(table.words):
+            adj = table.adjusted[i]
             lw = w.lower()
             # accumulate by emotion lexicon substring match
             for emo, lex in EMO.items():
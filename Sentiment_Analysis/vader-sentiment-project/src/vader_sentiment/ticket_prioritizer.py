@@ -3,6 +3,9 @@ Ticket prioritization logic for customer support.
 Combines emotion detection, urgency keywords, and sentiment intensity.
 """
 
+import hashlib
+from datetime import datetime, timedelta
+
 from . import structure, summarizer
 
 class TicketPrioritizer:
@@ -16,6 +19,21 @@ class TicketPrioritizer:
     # Severity thresholds
     CRITICAL_COMPOUND = -0.7  # Very negative
     HIGH_COMPOUND = -0.3      # Moderately negative
+
+    # Priority score tiers
+    CRITICAL_SCORE = 0.7
+    HIGH_SCORE = 0.4
+
+    # Repeat-customer boost (see adjust_for_customer_profile)
+    PROFILE_MIN_TICKETS = 2       # earlier tickets needed before a profile counts
+    PROFILE_ANGER_SHARE = 0.5     # share of earlier tickets with emotion 'anger'
+    PROFILE_BOOST = 0.15
+    RECENT_CRITICAL_DAYS = 7
+    RECENT_CRITICAL_BOOST = 0.05
+    PROFILE_REASON = "Repeat frustrated customer"
+
+    # Bump when the scoring code itself changes (weights in _compute_priority_score, ...)
+    SCORING_REVISION = 1
     
     # Urgency keywords that escalate priority
     URGENT_KEYWORDS = {
@@ -42,9 +60,13 @@ class TicketPrioritizer:
         """analyzer: vader_sentiment.analyzer.SentimentAnalyzer instance"""
         self.analyzer = analyzer
 
-    def prioritize(self, text):
+    def prioritize(self, text, analysis=None, profile=None):
         """
         Score and prioritize a support ticket.
+
+        analysis: optional result of ``analyzer.analyze(text)`` to reuse
+        instead of analyzing the text a second time.
+        profile: lexicon profile to analyze with (ignored when analysis is given).
         
         Returns:
         {
@@ -59,12 +81,13 @@ class TicketPrioritizer:
         }
         """
         # Get base sentiment analysis
-        analysis = self.analyzer.analyze(text)
+        if analysis is None:
+            analysis = self.analyzer.analyze(text, profile=profile)
         overall = analysis.get('overall', {})
         compound = overall.get('compound', 0.0)
         
         # Detect context/tone
-        context = analysis.get('context', {})
+        context = analysis.get('context') or {}
         emotion = context.get('main_emotion')
         
         # Check for severe keywords
@@ -110,12 +133,7 @@ class TicketPrioritizer:
             intensity = 'neutral'
         
         # Determine priority tier
-        if priority_score >= 0.7:
-            priority = 'critical'
-        elif priority_score >= 0.4:
-            priority = 'high'
-        else:
-            priority = 'normal'
+        priority = self._priority_tier(priority_score)
         
         # Build reason
         reasons = []
@@ -143,6 +161,119 @@ class TicketPrioritizer:
             'reason': reason
         }
     
+    def scoring_version(self, profile=None):
+        """
+        Short hash of the thresholds, keyword sets, analyzer version and the
+        analyzer's size limits (a sampled text scores differently), plus the
+        overlay version of a lexicon profile (see profile_scoring_version).
+        Stored with each ticket so stale priorities can be found and re-scored.
+        """
+        h = hashlib.sha256()
+        for name in ('SCORING_REVISION', 'CRITICAL_COMPOUND', 'HIGH_COMPOUND', 'CRITICAL_SCORE', 'HIGH_SCORE',
+                     'PROFILE_MIN_TICKETS', 'PROFILE_ANGER_SHARE', 'PROFILE_BOOST', 'RECENT_CRITICAL_DAYS',
+                     'RECENT_CRITICAL_BOOST'):
+            h.update(f"{name}={getattr(self, name)!r}\n".encode())
+        for name in ('URGENT_KEYWORDS', 'SEVERE_KEYWORDS', 'ANGER_KEYWORDS'):
+            h.update(f"{name}={sorted(getattr(self, name))!r}\n".encode())
+        analysis_version = getattr(self.analyzer, 'analysis_version', None)
+        if analysis_version is not None:
+            h.update(analysis_version().encode())
+        budget = getattr(self.analyzer, 'budget', None)
+        if budget is not None:
+            h.update(f"budget={budget.max_chars!r},{budget.max_sentences!r},{budget.max_tokens!r}\n".encode())
+        return self.profile_scoring_version(h.hexdigest()[:16], profile)
+
+    def profile_scoring_version(self, version, profile):
+        """
+        The scoring_version() for tickets scored with a lexicon profile:
+        version combined with the profile's current overlay version, so
+        editing the overlay makes those tickets stale. Cheap enough to call
+        per ticket with version computed once. None returns version.
+        """
+        if profile is None:
+            return version
+        return hashlib.sha256(f"{version}\n{self.analyzer.profile_tag(profile)}".encode()).hexdigest()[:16]
+
+    def adjust_for_ticket_type(self, priority_data, ticket_type):
+        """
+        Lower the priority of suggestions/recommendations (unless they're very strong).
+        Mutates and returns priority_data.
+        """
+        if ticket_type in ('suggestion', 'recommendation'):
+            if priority_data['priority'] == 'normal':
+                priority_data['priority_score'] *= 0.5  # Reduce score for suggestions
+            # Keep critical/high but adjust reason
+            priority_data['reason'] = f"[{ticket_type.upper()}] {priority_data['reason']}"
+        return priority_data
+
+    def adjust_for_customer_profile(self, priority_data, profile, now=None):
+        """
+        Raise the priority of a customer whose earlier tickets were mostly
+        negative or angry, and a little more if one of them was critical in
+        the last RECENT_CRITICAL_DAYS.
+
+        profile: TicketStorage.get_customer_profile() taken *before* this
+                 ticket was stored, or None.
+        Mutates and returns priority_data.
+        """
+        if not profile or profile['ticket_count'] < self.PROFILE_MIN_TICKETS:
+            return priority_data
+        count = profile['ticket_count']
+        ewma = profile['compound_ewma']
+        anger_share = profile['emotion_counts'].get('anger', 0) / count
+        if ewma > self.HIGH_COMPOUND and anger_share < self.PROFILE_ANGER_SHARE:
+            return priority_data
+
+        boost = self.PROFILE_BOOST
+        last_critical = profile.get('last_critical_at')
+        if last_critical:
+            now = now or datetime.now()
+            if now - datetime.fromisoformat(last_critical) <= timedelta(days=self.RECENT_CRITICAL_DAYS):
+                boost += self.RECENT_CRITICAL_BOOST
+        return self.apply_profile_boost(priority_data, boost,
+                                        f"{self.PROFILE_REASON} ({count} earlier tickets, avg sentiment {ewma:.2f})")
+
+    def apply_profile_boost(self, priority_data, boost, note=PROFILE_REASON):
+        """
+        Add a repeat-customer boost to the priority score (capped at 1.0) and
+        record the boost as 'profile_boost'. The store keeps it apart from the
+        score, so re-scoring re-applies it and duplicates can take it off again
+        (remove_profile_boost). The full boost is recorded even when the cap
+        cuts it short, so a lower base score after re-scoring gets all of it.
+        Mutates and returns priority_data.
+        """
+        if boost <= 0:
+            return priority_data
+        score = min(1.0, priority_data['priority_score'] + boost)
+        priority_data['profile_boost'] = boost
+        priority_data['priority_score'] = score
+        priority_data['priority'] = self._priority_tier(score)
+        priority_data['reason'] = f"{priority_data['reason']} | {note}"
+        return priority_data
+
+    def remove_profile_boost(self, priority_data):
+        """
+        Undo apply_profile_boost(), e.g. on priority data copied from another
+        customer's ticket. A score the cap cut short comes back as 1.0 minus
+        the boost, the lowest base score it can have come from.
+        Mutates and returns priority_data.
+        """
+        boost = priority_data.pop('profile_boost', None)
+        if not boost:
+            return priority_data
+        score = max(0.0, priority_data['priority_score'] - boost)
+        priority_data['priority_score'] = score
+        priority_data['priority'] = self._priority_tier(score)
+        priority_data['reason'] = priority_data['reason'].partition(f" | {self.PROFILE_REASON}")[0]
+        return priority_data
+
+    def _priority_tier(self, priority_score):
+        if priority_score >= self.CRITICAL_SCORE:
+            return 'critical'
+        if priority_score >= self.HIGH_SCORE:
+            return 'high'
+        return 'normal'
+
     def _compute_priority_score(self, compound, is_angry, is_urgent, anger_hits, urgency_hits):
         """
         Compute a priority score (0-1) from sentiment and keyword signals.
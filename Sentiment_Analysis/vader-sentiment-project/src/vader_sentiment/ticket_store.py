@@ -4,21 +4,156 @@ Ticket storage and management using SQLite.
 
 import sqlite3
 import json
-from datetime import datetime
+import calendar
+import secrets
+import time
+import zlib
+from datetime import datetime, timedelta
 from pathlib import Path
 
-class TicketStore:
+from .group_commit import DEFAULT_MAX_BATCH, DEFAULT_MAX_DELAY, GroupCommitWriter
+from .storage import (
+    DEFAULT_AGING_PER_HOUR, DEFAULT_ORDER_BY, ROLLUP_BUCKET_SECONDS, ROLLUP_DIMENSIONS, TREND_BUCKETS, TicketStorage, build_trends,
+    aging_rate, parse_order_by, profile_key, trend_bucket_size, update_profile,
+)
+
+# Hour bucket of a ticket row's created_at (ISO text) as epoch seconds.
+_ROLLUP_BUCKET_SQL = "(CAST(strftime('%s', {row}.created_at) AS INTEGER) / 3600) * 3600"
+
+
+# Messages at least this many UTF-8 bytes are stored zlib-compressed in
+# message_z, with only a preview of PREVIEW_CHARS characters left in message.
+DEFAULT_COMPRESS_THRESHOLD = 4096
+PREVIEW_CHARS = 280
+# Compression must save at least this fraction of the bytes to be kept.
+MIN_COMPRESSION_SAVING = 0.1
+
+
+def _pack_message(message, threshold):
+    """(message column, message_codec, message_z) for storing a message."""
+    if not threshold:
+        return message, None, None
+    raw = message.encode('utf-8')
+    if len(raw) < threshold:
+        return message, None, None
+    packed = zlib.compress(raw, 6)
+    if len(packed) > len(raw) * (1 - MIN_COMPRESSION_SAVING):
+        return message, None, None
+    return message[:PREVIEW_CHARS], 'zlib', packed
+
+
+def _full_message(message, message_z):
+    """The full text of a stored message; registered as the SQL function full_message()."""
+    if message_z is None:
+        return message
+    return zlib.decompress(message_z).decode('utf-8')
+
+
+# storage.aging_key() of a ticket row, with the rate read from store_settings.
+_AGING_KEY_SQL = ("CAST(strftime('%s', {row}.created_at) AS INTEGER) - COALESCE({row}.priority_score, 0) * 3600.0 "
+                  "/ (SELECT value FROM store_settings WHERE name = 'aging_per_hour')")
+
+
+def _rollup_trigger_sql(row, sign):
+    """Statements adding (sign=+1) or removing (sign=-1) one ticket row from the rollups."""
+    bucket = _ROLLUP_BUCKET_SQL.format(row=row)
+    stmts = []
+    for dim in ROLLUP_DIMENSIONS:
+        value = f"COALESCE({row}.{dim}, 'none')"
+        compound = f"COALESCE({row}.compound, 0)"
+        stmts.append(
+            f"INSERT INTO ticket_rollups (bucket, dimension, value, tickets, compound_sum) "
+            f"VALUES ({bucket}, '{dim}', {value}, {sign}, {sign} * {compound}) "
+            f"ON CONFLICT(bucket, dimension, value) DO UPDATE SET "
+            f"tickets = tickets + excluded.tickets, compound_sum = compound_sum + excluded.compound_sum;"
+        )
+    return "\n".join(stmts)
+
+
+def _to_epoch(value):
+    """
+    datetime, ISO string or epoch number -> epoch seconds on the same clock as
+    the rollup buckets (created_at is stored as naive local time).
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return calendar.timegm(value.timetuple())
+
+class TicketStore(TicketStorage):
     """Simple SQLite-based ticket storage."""
     
-    def __init__(self, db_path="tickets.db"):
-        """Initialize or connect to SQLite database."""
+    def __init__(self, db_path="tickets.db", query_log=None, aging_per_hour=None,
+                 compress_threshold=DEFAULT_COMPRESS_THRESHOLD):
+        """
+        Initialize or connect to SQLite database.
+
+        query_log: optional querylog.QueryLog timing every statement.
+        aging_per_hour: SLA aging rate (see storage.aging_key); None keeps
+            the rate stored in the database, DEFAULT_AGING_PER_HOUR for a new one.
+        compress_threshold: messages of at least this many bytes are stored
+            compressed (see compress_messages); None or 0 stores them as is.
+        """
         self.db_path = db_path
-        self.init_db()
+        self.query_log = query_log
+        self.compress_threshold = compress_threshold
+        self.writer = None
+        self.init_db(aging_per_hour)
     
-    def init_db(self):
+    def start_writer(self, max_delay=DEFAULT_MAX_DELAY, max_batch=DEFAULT_MAX_BATCH, synchronous='FULL'):
+        """
+        Route every write (add_ticket, update_ticket_status, delete_ticket,
+        update_priorities, ...) through a GroupCommitWriter (see
+        group_commit) so concurrent writes share transactions. A forked
+        child starts its own writer thread on its first write. Returns the
+        writer; close() stops it.
+        """
+        if self.writer is None:
+            self.writer = GroupCommitWriter(self._connect, max_delay=max_delay, max_batch=max_batch,
+                                            synchronous=synchronous)
+        return self.writer
+
+    def close(self):
+        """Commit pending writes and stop the writer thread, if any."""
+        writer, self.writer = self.writer, None
+        if writer is not None:
+            writer.close()
+
+    def _write(self, fn, *args):
+        """Run fn(cursor, *args) in its own transaction, or via the writer; returns its result."""
+        if self.writer is not None:
+            return self.writer.submit(fn, *args).result()
+        conn = self._connect()
+        c = conn.cursor()
+        result = fn(c, *args)
+        conn.commit()
+        conn.close()
+        return result
+
+    def _connect(self):
+        """Open a connection to the ticket database, with full_message() registered."""
+        if self.query_log is not None:
+            conn = self.query_log.connect(self.db_path)
+        else:
+            conn = sqlite3.connect(self.db_path)
+        conn.create_function('full_message', 2, _full_message, deterministic=True)
+        return conn
+
+    def _columns(self, alias='tickets'):
+        """Select list of every tickets column except message_z, for list views."""
+        return ', '.join(f'{alias}.{name}' for name in self._list_columns)
+
+    def init_db(self, aging_per_hour=None):
         """Create tables if they don't exist."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         c = conn.cursor()
+        # Takes effect only on a new, empty database; see incremental_vacuum().
+        c.execute('PRAGMA auto_vacuum = INCREMENTAL')
         
         c.execute('''CREATE TABLE IF NOT EXISTS tickets (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -36,35 +171,164 @@ class TicketStore:
             reason TEXT,
             status TEXT DEFAULT 'new',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            scoring_version TEXT
         )''')
+        added = self._add_missing_columns(c)
+        self._list_columns = [row[1] for row in c.execute('PRAGMA table_info(tickets)') if row[1] != 'message_z']
+        c.execute('CREATE INDEX IF NOT EXISTS idx_tickets_duplicate_of ON tickets(duplicate_of)')
+        # One index per storage.ORDERINGS entry, and per filter + default order.
+        c.execute('CREATE INDEX IF NOT EXISTS idx_tickets_score_created '
+                  'ON tickets(priority_score DESC, created_at DESC)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_tickets_score_id ON tickets(priority_score DESC, id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON tickets(created_at)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_tickets_updated_at ON tickets(updated_at)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_tickets_status_score '
+                  'ON tickets(status, priority_score DESC, created_at DESC)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_tickets_status_updated ON tickets(status, updated_at)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_tickets_status_resolved ON tickets(status, resolved_at)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_tickets_status_score_id ON tickets(status, priority_score DESC, id)')
+        if 'resolved_at' in added:
+            # Best guess for tickets resolved before resolved_at existed.
+            c.execute("UPDATE tickets SET resolved_at = updated_at WHERE status = 'resolved'")
+        c.execute('CREATE INDEX IF NOT EXISTS idx_tickets_priority_score '
+                  'ON tickets(priority, priority_score DESC, created_at DESC)')
+
+        c.execute('''CREATE TABLE IF NOT EXISTS job_checkpoints (
+            job TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            updated_at TIMESTAMP
+        )''')
+
+        self.fts_enabled = self._init_fts(c)
+        self._init_archive(c)
+        self._init_rollups(c)
+        self._init_signatures(c)
+        self._init_leases(c)
+        self._init_profiles(c)
+        self._init_aging(c, aging_per_hour)
         
         conn.commit()
         conn.close()
+        if 'message_z' in added:
+            # Compress the large messages of a database created before compression.
+            self.compress_messages()
+
+    def _init_fts(self, c):
+        """
+        Create the FTS5 index over ticket messages and the triggers that keep
+        it in sync with the tickets table. Returns False if this SQLite build
+        lacks FTS5 (search then falls back to LIKE scans).
+
+        The index reads full message text through the tickets_fts_content
+        view, so compressed messages are indexed (and snippeted) in full.
+        """
+        c.execute("SELECT sql FROM sqlite_master WHERE name = 'tickets_fts'")
+        row = c.fetchone()
+        existed = row is not None
+        if existed and "content='tickets'" in row[0]:
+            # Index from before message compression: rebuild it over the view.
+            c.execute('DROP TABLE tickets_fts')
+            for trigger in ('tickets_fts_ai', 'tickets_fts_ad', 'tickets_fts_au'):
+                c.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            existed = False
+        c.execute('''CREATE VIEW IF NOT EXISTS tickets_fts_content AS
+            SELECT id, full_message(message, message_z) AS message FROM tickets''')
+        try:
+            c.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(
+                message, content='tickets_fts_content', content_rowid='id', tokenize='porter unicode61'
+            )''')
+        except sqlite3.OperationalError:
+            return False
+        c.execute('''CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN
+            INSERT INTO tickets_fts(rowid, message) VALUES (new.id, full_message(new.message, new.message_z));
+        END''')
+        c.execute('''CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN
+            INSERT INTO tickets_fts(tickets_fts, rowid, message)
+                VALUES ('delete', old.id, full_message(old.message, old.message_z));
+        END''')
+        c.execute('''CREATE TRIGGER IF NOT EXISTS tickets_fts_au AFTER UPDATE OF message, message_z ON tickets
+            WHEN full_message(old.message, old.message_z) IS NOT full_message(new.message, new.message_z) BEGIN
+            INSERT INTO tickets_fts(tickets_fts, rowid, message)
+                VALUES ('delete', old.id, full_message(old.message, old.message_z));
+            INSERT INTO tickets_fts(rowid, message) VALUES (new.id, full_message(new.message, new.message_z));
+        END''')
+        if not existed:
+            # Index tickets stored before the FTS table existed.
+            c.execute("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')")
+        return True
+
+    # Columns added after the first release; older databases get them on open.
+    MIGRATED_COLUMNS = {
+        'ticket_type': "TEXT DEFAULT 'support'",
+        'category': 'TEXT',
+        'scoring_version': 'TEXT',
+        'duplicate_of': 'INTEGER',
+        'lexicon_profile': 'TEXT',
+        'aging_key': 'REAL',
+        'message_codec': 'TEXT',
+        'resolved_at': 'TIMESTAMP',
+        'profile_boost': 'REAL',
+        # Keep the compressed body last: list views never read its overflow pages.
+        'message_z': 'BLOB',
+    }
+
+    def _add_missing_columns(self, c):
+        """Add MIGRATED_COLUMNS the table lacks; returns their names."""
+        existing = {row[1] for row in c.execute('PRAGMA table_info(tickets)')}
+        added = []
+        for name, decl in self.MIGRATED_COLUMNS.items():
+            if name not in existing:
+                c.execute(f'ALTER TABLE tickets ADD COLUMN {name} {decl}')
+                added.append(name)
+        return added
     
-    def add_ticket(self, message, customer_name=None, priority_data=None, ticket_type='support', category=None):
+    def add_ticket(self, message, customer_name=None, priority_data=None, ticket_type='support', category=None,
+                   scoring_version=None, duplicate_of=None, signature=None, lexicon_profile=None):
         """
         Add a new ticket to the store.
         
         ticket_type: 'support', 'suggestion', 'recommendation'
         category: 'feature', 'bug', 'improvement', 'ui', 'performance', etc.
         priority_data: dict from TicketPrioritizer.prioritize()
+        scoring_version: TicketPrioritizer.scoring_version() that produced priority_data
+        duplicate_of: id of the original ticket this one near-duplicates
+        signature: optional (scheme, bytes) near-duplicate signature, stored
+                   so the dedup index can be rebuilt without rehashing
+        lexicon_profile: lexicon profile the ticket was scored with (None for the base lexicon)
+
+        The customer's profile (see get_customer_profile) is updated in the
+        same transaction.
         
         Returns: ticket_id
         """
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
+        return self._write(self._insert_ticket, message, customer_name, priority_data, ticket_type, category,
+                           scoring_version, duplicate_of, signature, lexicon_profile)
+
+    def add_ticket_async(self, message, customer_name=None, priority_data=None, ticket_type='support',
+                         category=None, scoring_version=None, duplicate_of=None, signature=None,
+                         lexicon_profile=None):
+        """add_ticket() through the writer; the Future's result is the ticket id once committed."""
+        if self.writer is None:
+            return super().add_ticket_async(message, customer_name, priority_data, ticket_type, category,
+                                            scoring_version, duplicate_of, signature, lexicon_profile)
+        return self.writer.submit(self._insert_ticket, message, customer_name, priority_data, ticket_type,
+                                  category, scoring_version, duplicate_of, signature, lexicon_profile)
+
+    def _insert_ticket(self, c, message, customer_name, priority_data, ticket_type, category, scoring_version,
+                       duplicate_of, signature, lexicon_profile):
         now = datetime.now().isoformat()
         flagged_keywords = json.dumps(priority_data.get('flagged_keywords', []) if priority_data else [])
+        stored, codec, packed = _pack_message(message, self.compress_threshold)
         
         c.execute('''INSERT INTO tickets 
             (customer_name, message, ticket_type, category, priority, priority_score, emotion, compound, intensity, 
-             urgency_flagged, flagged_keywords, reason, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+             urgency_flagged, flagged_keywords, reason, created_at, updated_at, scoring_version, duplicate_of,
+             lexicon_profile, profile_boost, message_codec, message_z)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
             (
                 customer_name,
-                message,
+                stored,
                 ticket_type,
                 category,
                 priority_data.get('priority', 'normal') if priority_data else 'normal',
@@ -76,42 +340,59 @@ class TicketStore:
                 flagged_keywords,
                 priority_data.get('reason', '') if priority_data else '',
                 now,
-                now
+                now,
+                scoring_version,
+                duplicate_of,
+                lexicon_profile,
+                priority_data.get('profile_boost') if priority_data else None,
+                codec,
+                packed
             )
         )
         
         ticket_id = c.lastrowid
-        conn.commit()
-        conn.close()
-        
+        if signature is not None:
+            scheme, blob = signature
+            c.execute('INSERT OR REPLACE INTO ticket_signatures (ticket_id, scheme, signature) VALUES (?, ?, ?)',
+                      (ticket_id, scheme, blob))
+        self._update_profile(c, customer_name, priority_data, now)
         return ticket_id
     
     def get_ticket(self, ticket_id):
-        """Get a single ticket by ID."""
-        conn = sqlite3.connect(self.db_path)
+        """Get a single ticket by ID, with its full message; archived tickets carry 'archived_at'."""
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
         
         c.execute('SELECT * FROM tickets WHERE id = ?', (ticket_id,))
         row = c.fetchone()
+        if row is None:
+            c.execute('SELECT * FROM tickets_archive WHERE id = ?', (ticket_id,))
+            row = c.fetchone()
         conn.close()
         
         if row:
             return self._row_to_dict(row)
         return None
     
-    def get_all_tickets(self, status=None, priority=None, order_by='priority_score DESC, created_at DESC'):
+    def get_all_tickets(self, status=None, priority=None, order_by=DEFAULT_ORDER_BY, limit=None):
         """
         Get all tickets, optionally filtered.
         
         status: 'new', 'in-progress', 'resolved', or None for all
         priority: 'critical', 'high', 'normal', or None for all
+        order_by: one of storage.ORDERINGS; ValueError otherwise
+        limit: at most this many tickets (None for all)
+
+        A compressed message (message_codec set) is returned as its preview;
+        get_ticket() has the full text.
         """
-        conn = sqlite3.connect(self.db_path)
+        terms = parse_order_by(order_by)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
         
-        query = 'SELECT * FROM tickets WHERE 1=1'
+        query = f'SELECT {self._columns()} FROM tickets WHERE 1=1'
         params = []
         
         if status:
@@ -121,7 +402,10 @@ class TicketStore:
             query += ' AND priority = ?'
             params.append(priority)
         
-        query += f' ORDER BY {order_by}'
+        query += ' ORDER BY ' + ', '.join(f"{column} {'DESC' if desc else 'ASC'}" for column, desc in terms)
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(int(limit))
         
         c.execute(query, params)
         rows = c.fetchall()
@@ -129,54 +413,625 @@ class TicketStore:
         
         return [self._row_to_dict(row) for row in rows]
     
-    def get_tickets_by_priority(self):
-        """Get all tickets grouped by priority tier."""
-        all_tickets = self.get_all_tickets()
-        
-        grouped = {
-            'critical': [t for t in all_tickets if t['priority'] == 'critical'],
-            'high': [t for t in all_tickets if t['priority'] == 'high'],
-            'normal': [t for t in all_tickets if t['priority'] == 'normal']
-        }
-        
-        return grouped
-    
-    def get_tickets_by_type(self):
-        """Get all tickets grouped by type (support vs suggestion/recommendation)."""
-        all_tickets = self.get_all_tickets()
-        
-        grouped = {
-            'support': [t for t in all_tickets if t.get('ticket_type') == 'support'],
-            'suggestion': [t for t in all_tickets if t.get('ticket_type') in ('suggestion', 'recommendation')],
-        }
-        
-        return grouped
-    
-    def update_ticket_status(self, ticket_id, status):
-        """Update ticket status ('new', 'in-progress', 'resolved')."""
-        conn = sqlite3.connect(self.db_path)
+    def iter_tickets(self, status=None, priority=None, ticket_type=None, batch_size=500, include_archived=False):
+        """
+        Yield tickets in id order, optionally filtered, batch_size rows at a time.
+
+        Each batch is its own short query (keyset pagination on id), so a
+        slow consumer never holds a read lock that would block writers.
+        include_archived: merge in archived tickets (carrying 'archived_at').
+        """
+        where = ''
+        params = []
+        for column, value in (('status', status), ('priority', priority), ('ticket_type', ticket_type)):
+            if value:
+                where += f' AND {column} = ?'
+                params.append(value)
+        query = f'SELECT * FROM tickets WHERE id > ?{where} ORDER BY id LIMIT ?'
+        if include_archived:
+            # Page each table on its own index, then merge the two pages.
+            columns = self._archive_columns
+            query = (f'SELECT * FROM (SELECT {columns}, NULL AS archived_at FROM tickets '
+                     f'WHERE id > ?{where} ORDER BY id LIMIT ?) '
+                     f'UNION ALL SELECT * FROM (SELECT {columns}, archived_at FROM tickets_archive '
+                     f'WHERE id > ?{where} ORDER BY id LIMIT ?) ORDER BY id LIMIT ?')
+        after_id = 0
+        while True:
+            conn = self._connect()
+            conn.row_factory = sqlite3.Row
+            c = conn.cursor()
+            page = [after_id, *params, batch_size]
+            c.execute(query, page * 2 + [batch_size] if include_archived else page)
+            rows = c.fetchmany(batch_size)
+            conn.close()
+            if not rows:
+                return
+            for row in rows:
+                ticket = self._row_to_dict(row)
+                if 'archived_at' in ticket and ticket['archived_at'] is None:
+                    del ticket['archived_at']
+                yield ticket
+            after_id = rows[-1]['id']
+
+    def _init_rollups(self, c):
+        """
+        Hourly rollups of ticket counts and compound sums per priority,
+        emotion and status, maintained by triggers on every insert, update
+        and delete so trend queries never touch the tickets table.
+        """
+        c.execute("SELECT 1 FROM sqlite_master WHERE name = 'ticket_rollups'")
+        existed = c.fetchone() is not None
+        c.execute('''CREATE TABLE IF NOT EXISTS ticket_rollups (
+            bucket INTEGER NOT NULL,
+            dimension TEXT NOT NULL,
+            value TEXT NOT NULL,
+            tickets INTEGER NOT NULL DEFAULT 0,
+            compound_sum REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, dimension, value)
+        ) WITHOUT ROWID''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS tickets_rollup_ai AFTER INSERT ON tickets BEGIN
+            {_rollup_trigger_sql('new', 1)}
+        END''')
+        c.execute("SELECT sql FROM sqlite_master WHERE name = 'tickets_rollup_ad'")
+        row = c.fetchone()
+        if row and 'tickets_archive' not in row[0]:
+            c.execute('DROP TRIGGER tickets_rollup_ad')  # from before archiving; counted moves as deletes
+        # Archived tickets stay in the rollups: moving one is not a delete.
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS tickets_rollup_ad AFTER DELETE ON tickets
+            WHEN NOT EXISTS (SELECT 1 FROM tickets_archive WHERE id = old.id) BEGIN
+            {_rollup_trigger_sql('old', -1)}
+        END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS tickets_archive_rollup_ad AFTER DELETE ON tickets_archive BEGIN
+            {_rollup_trigger_sql('old', -1)}
+        END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS tickets_rollup_au
+            AFTER UPDATE OF priority, emotion, status, compound, created_at ON tickets BEGIN
+            {_rollup_trigger_sql('old', -1)}
+            {_rollup_trigger_sql('new', 1)}
+        END''')
+        if not existed:
+            for dim in ROLLUP_DIMENSIONS:
+                c.execute(f'''INSERT INTO ticket_rollups (bucket, dimension, value, tickets, compound_sum)
+                    SELECT {_ROLLUP_BUCKET_SQL.format(row='tickets')} AS b, '{dim}', COALESCE({dim}, 'none'),
+                           COUNT(*), COALESCE(SUM(compound), 0)
+                    FROM tickets WHERE created_at IS NOT NULL GROUP BY b, COALESCE({dim}, 'none')''')
+
+    def _init_aging(self, c, per_hour):
+        """
+        Keep tickets.aging_key (storage.aging_key) current inside SQLite.
+        The rate lives in store_settings, and triggers re-key a row when it
+        is inserted or its priority_score/created_at change. The key does
+        not depend on the current time, so nothing is refreshed while tickets
+        wait and the SLA view is a walk of idx_tickets_aging.
+        """
+        c.execute('CREATE TABLE IF NOT EXISTS store_settings (name TEXT PRIMARY KEY, value)')
+        c.execute("INSERT OR IGNORE INTO store_settings (name, value) VALUES ('aging_per_hour', ?)",
+                  (DEFAULT_AGING_PER_HOUR,))
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS tickets_aging_ai AFTER INSERT ON tickets BEGIN
+            UPDATE tickets SET aging_key = {_AGING_KEY_SQL.format(row='new')} WHERE id = new.id;
+        END''')
+        c.execute(f'''CREATE TRIGGER IF NOT EXISTS tickets_aging_au
+            AFTER UPDATE OF priority_score, created_at ON tickets BEGIN
+            UPDATE tickets SET aging_key = {_AGING_KEY_SQL.format(row='new')} WHERE id = new.id;
+        END''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_tickets_aging ON tickets(aging_key, id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_tickets_status_aging ON tickets(status, aging_key, id)')
+        # Tickets stored before the aging_key column existed.
+        c.execute(f"UPDATE tickets SET aging_key = {_AGING_KEY_SQL.format(row='tickets')} WHERE aging_key IS NULL")
+        c.execute("SELECT value FROM store_settings WHERE name = 'aging_per_hour'")
+        self.aging_per_hour = c.fetchone()[0]
+        if per_hour is not None:
+            self._set_aging_rate(c, aging_rate(per_hour))
+
+    def set_aging_rate(self, per_hour):
+        """Change the SLA aging rate and re-key every ticket in one transaction."""
+        self._write(self._set_aging_rate, aging_rate(per_hour))
+
+    def _set_aging_rate(self, c, per_hour):
+        c.execute("SELECT value FROM store_settings WHERE name = 'aging_per_hour'")
+        if c.fetchone()[0] != per_hour:
+            c.execute("UPDATE store_settings SET value = ? WHERE name = 'aging_per_hour'", (per_hour,))
+            c.execute(f"UPDATE tickets SET aging_key = {_AGING_KEY_SQL.format(row='tickets')}")
+        self.aging_per_hour = per_hour
+
+    def _init_archive(self, c):
+        """
+        tickets_archive holds tickets moved out of the live table by
+        archive_resolved(): the same columns plus archived_at, keyed by id.
+        """
+        columns = [(row[1], row[2]) for row in c.execute('PRAGMA table_info(tickets)')]
+        c.execute('CREATE TABLE IF NOT EXISTS tickets_archive (id INTEGER PRIMARY KEY, archived_at TIMESTAMP)')
+        existing = {row[1] for row in c.execute('PRAGMA table_info(tickets_archive)')}
+        for name, decl in columns:
+            if name not in existing:
+                c.execute(f'ALTER TABLE tickets_archive ADD COLUMN {name} {decl}')
+        self._archive_columns = ', '.join(name for name, _ in columns)
+
+    def archive_resolved(self, older_than_days, batch_size=500, now=None):
+        """
+        Move tickets resolved (resolved_at) more than older_than_days ago
+        from tickets to tickets_archive, batch_size tickets per transaction,
+        so the live table and its indexes hold only the working set.
+        Returns the number moved.
+
+        Archived tickets keep their id: get_ticket() and delete_ticket()
+        still find them, and trends still count them. They leave search,
+        list views, exports and duplicate matching.
+        """
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=older_than_days)).isoformat()
+        moved = 0
+        while True:
+            count = self._write(self._archive_batch, cutoff, batch_size, now.isoformat())
+            moved += count
+            if count < batch_size:
+                return moved
+
+    def _archive_batch(self, c, cutoff, batch_size, archived_at):
+        c.execute("SELECT id FROM tickets WHERE status = 'resolved' AND resolved_at < ? ORDER BY resolved_at LIMIT ?",
+                  (cutoff, batch_size))
+        ids = [row[0] for row in c.fetchall()]
+        if ids:
+            marks = ', '.join('?' * len(ids))
+            columns = self._archive_columns
+            c.execute(f'INSERT OR REPLACE INTO tickets_archive ({columns}, archived_at) '
+                      f'SELECT {columns}, ? FROM tickets WHERE id IN ({marks})', (archived_at, *ids))
+            c.execute(f'DELETE FROM tickets WHERE id IN ({marks})', ids)
+        return len(ids)
+
+    def incremental_vacuum(self, max_pages=None):
+        """
+        Return up to max_pages free pages (all if None) to the filesystem;
+        returns the number released. A no-op unless the database uses
+        auto_vacuum=INCREMENTAL: new databases do, and an older one can be
+        converted once with PRAGMA auto_vacuum = INCREMENTAL; VACUUM.
+        """
+        return self._write(self._incremental_vacuum, max_pages)
+
+    @staticmethod
+    def _incremental_vacuum(c, max_pages):
+        c.execute('PRAGMA auto_vacuum')
+        if c.fetchone()[0] != 2:
+            return 0
+        c.execute('PRAGMA freelist_count')
+        before = c.fetchone()[0]
+        c.execute('PRAGMA incremental_vacuum' + ('' if max_pages is None else f'({int(max_pages)})'))
+        c.fetchall()
+        c.execute('PRAGMA freelist_count')
+        return before - c.fetchone()[0]
+
+    def _init_signatures(self, c):
+        """Near-duplicate signatures of recent tickets (see vader_sentiment.dedup)."""
+        c.execute('''CREATE TABLE IF NOT EXISTS ticket_signatures (
+            ticket_id INTEGER PRIMARY KEY,
+            scheme TEXT NOT NULL,
+            signature BLOB NOT NULL
+        )''')
+        c.execute('''CREATE TRIGGER IF NOT EXISTS tickets_signatures_ad AFTER DELETE ON tickets BEGIN
+            DELETE FROM ticket_signatures WHERE ticket_id = old.id;
+        END''')
+
+    def _init_leases(self, c):
+        """
+        Work queue leases, shared by every process using the database. A
+        lease is live while expires (epoch seconds) is in the future; status
+        changes and deletes end it.
+        """
+        c.execute('''CREATE TABLE IF NOT EXISTS ticket_leases (
+            ticket_id INTEGER PRIMARY KEY,
+            agent TEXT,
+            token TEXT NOT NULL,
+            expires REAL NOT NULL
+        )''')
+        c.execute('''CREATE TRIGGER IF NOT EXISTS tickets_leases_ad AFTER DELETE ON tickets BEGIN
+            DELETE FROM ticket_leases WHERE ticket_id = old.id;
+        END''')
+
+    def claim_next_ticket(self, agent=None, lease_seconds=300):
+        """
+        Lease the highest-priority waiting ticket in one statement: the
+        candidate is chosen and leased under the database write lock, so two
+        processes never get the same ticket.
+        """
+        token = secrets.token_hex(8)
+        ticket_id = self._write(self._claim, agent, token, lease_seconds, time.time())
+        if ticket_id is None:
+            return None
+        return {'ticket_id': ticket_id, 'token': token, 'agent': agent, 'expires_in': lease_seconds}
+
+    @staticmethod
+    def _claim(c, agent, token, lease_seconds, now):
+        c.execute('''INSERT INTO ticket_leases (ticket_id, agent, token, expires)
+            SELECT id, ?, ?, ? FROM tickets WHERE status = 'new' AND NOT EXISTS (
+                SELECT 1 FROM ticket_leases WHERE ticket_leases.ticket_id = tickets.id AND expires > ?)
+            ORDER BY priority_score DESC, id LIMIT 1
+            ON CONFLICT(ticket_id) DO UPDATE SET agent = excluded.agent, token = excluded.token,
+                expires = excluded.expires
+            RETURNING ticket_id''', (agent, token, now + lease_seconds, now))
+        row = c.fetchone()
+        return row[0] if row else None
+
+    def release_ticket(self, ticket_id, token):
+        return self._write(self._release, ticket_id, token)
+
+    @staticmethod
+    def _release(c, ticket_id, token):
+        c.execute('DELETE FROM ticket_leases WHERE ticket_id = ? AND token = ?', (ticket_id, token))
+        return c.rowcount > 0
+
+    def queue_stats(self):
+        conn = self._connect()
         c = conn.cursor()
-        now = datetime.now().isoformat()
-        
-        c.execute('UPDATE tickets SET status = ?, updated_at = ? WHERE id = ?',
-                  (status, now, ticket_id))
-        
-        conn.commit()
+        c.execute("SELECT COUNT(*) FROM tickets WHERE status = 'new'")
+        new = c.fetchone()[0]
+        c.execute('SELECT COUNT(*) FROM ticket_leases WHERE expires > ?', (time.time(),))
+        leased = c.fetchone()[0]
+        conn.close()
+        return {'waiting': new - leased, 'leased': leased}
+
+    def _init_profiles(self, c):
+        """
+        Per-customer sentiment profiles, folded forward one ticket at a time
+        by add_ticket. Deleting or re-scoring a ticket does not rewind them.
+        """
+        c.execute("SELECT 1 FROM sqlite_master WHERE name = 'customer_profiles'")
+        existed = c.fetchone() is not None
+        c.execute('''CREATE TABLE IF NOT EXISTS customer_profiles (
+            customer_name TEXT PRIMARY KEY,
+            ticket_count INTEGER NOT NULL,
+            compound_ewma REAL NOT NULL,
+            emotion_counts TEXT NOT NULL DEFAULT '{}',
+            last_critical_at TIMESTAMP,
+            first_ticket_at TIMESTAMP,
+            last_ticket_at TIMESTAMP
+        )''')
+        if not existed:
+            # Replay tickets stored before the profiles table existed.
+            c.execute('''SELECT customer_name, priority, emotion, compound, created_at
+                FROM tickets WHERE customer_name IS NOT NULL ORDER BY id''')
+            for customer_name, priority, emotion, compound, created_at in c.fetchall():
+                self._update_profile(c, customer_name,
+                                     {'priority': priority, 'emotion': emotion, 'compound': compound}, created_at)
+
+    @staticmethod
+    def _load_profile(c, key):
+        c.execute('''SELECT customer_name, ticket_count, compound_ewma, emotion_counts, last_critical_at,
+            first_ticket_at, last_ticket_at FROM customer_profiles WHERE customer_name = ?''', (key,))
+        row = c.fetchone()
+        if row is None:
+            return None
+        names = ('customer_name', 'ticket_count', 'compound_ewma', 'emotion_counts', 'last_critical_at',
+                 'first_ticket_at', 'last_ticket_at')
+        profile = dict(zip(names, row))
+        profile['emotion_counts'] = json.loads(profile['emotion_counts'])
+        return profile
+
+    def _update_profile(self, c, customer_name, priority_data, now):
+        """Fold one ticket into its customer's profile using cursor c (inside the caller's transaction)."""
+        key = profile_key(customer_name)
+        if key is None:
+            return
+        profile = update_profile(self._load_profile(c, key), priority_data, now)
+        c.execute('''INSERT OR REPLACE INTO customer_profiles (customer_name, ticket_count, compound_ewma,
+            emotion_counts, last_critical_at, first_ticket_at, last_ticket_at) VALUES (?, ?, ?, ?, ?, ?, ?)''',
+            (key, profile['ticket_count'], profile['compound_ewma'], json.dumps(profile['emotion_counts']),
+             profile['last_critical_at'], profile['first_ticket_at'], profile['last_ticket_at']))
+
+    def get_customer_profile(self, customer_name):
+        """
+        A customer's sentiment profile, or None (also for anonymous tickets):
+        {'customer_name', 'ticket_count', 'compound_ewma', 'emotion_counts',
+         'last_critical_at', 'first_ticket_at', 'last_ticket_at'}
+        """
+        key = profile_key(customer_name)
+        if key is None:
+            return None
+        conn = self._connect()
+        c = conn.cursor()
+        profile = self._load_profile(c, key)
+        conn.close()
+        return profile
+
+    def recent_signatures(self, scheme, limit):
+        """
+        [(ticket_id, root_id, signature_bytes)] for the newest
+        `limit` tickets that have a stored signature of this scheme, oldest first.
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute('''SELECT t.id, COALESCE(t.duplicate_of, t.id), s.signature
+            FROM ticket_signatures s JOIN tickets t ON t.id = s.ticket_id
+            WHERE s.scheme = ? ORDER BY s.ticket_id DESC LIMIT ?''', (scheme, limit))
+        rows = c.fetchall()
+        conn.close()
+        rows.reverse()
+        return rows
+
+    def get_duplicate_clusters(self, status=None, limit=50):
+        """
+        Original tickets that have near-duplicates, largest clusters first.
+
+        status: only count duplicates with this status (e.g. 'new').
+        Each result is the original ticket plus 'duplicate_count' and 'duplicate_ids'.
+        """
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        query = f'''SELECT {self._columns('r')}, COUNT(d.id) AS duplicate_count, GROUP_CONCAT(d.id) AS duplicate_ids
+            FROM tickets d JOIN tickets r ON r.id = d.duplicate_of WHERE 1=1'''
+        params = []
+        if status:
+            query += ' AND d.status = ?'
+            params.append(status)
+        query += ' GROUP BY r.id ORDER BY duplicate_count DESC, r.priority_score DESC LIMIT ?'
+        params.append(limit)
+        c.execute(query, params)
+        rows = c.fetchall()
+        conn.close()
+        clusters = []
+        for row in rows:
+            d = self._row_to_dict(row)
+            d['duplicate_ids'] = sorted(int(i) for i in d['duplicate_ids'].split(','))
+            clusters.append(d)
+        return clusters
+
+    def get_trends(self, start=None, end=None, bucket='day'):
+        """
+        Sentiment and priority trends from the hourly rollups.
+
+        start / end: datetime, ISO string or epoch seconds (end exclusive); open-ended if None.
+        bucket: 'hour', 'day', 'week' or a bucket size in seconds (a multiple of 3600).
+
+        Returns a list of buckets in time order:
+        {'bucket_start', 'tickets', 'avg_compound', 'priority': {...}, 'emotion': {...}, 'status': {...}}
+        """
+        size = trend_bucket_size(bucket)
+        start, end = _to_epoch(start), _to_epoch(end)
+
+        conn = self._connect()
+        c = conn.cursor()
+        query = '''SELECT (bucket / ?) * ? AS b, dimension, value, SUM(tickets), SUM(compound_sum)
+            FROM ticket_rollups WHERE 1=1'''
+        params = [size, size]
+        if start is not None:
+            query += ' AND bucket >= ?'
+            params.append(start - start % ROLLUP_BUCKET_SECONDS)
+        if end is not None:
+            query += ' AND bucket < ?'
+            params.append(end)
+        query += ' GROUP BY b, dimension, value HAVING SUM(tickets) != 0 ORDER BY b'
+        c.execute(query, params)
+        rows = c.fetchall()
+        conn.close()
+
+        return build_trends(rows)
+
+    def search(self, query, status=None, priority=None, limit=50, offset=0):
+        """
+        Full-text search over ticket messages, best matches first.
+
+        query: words to match (all must appear, stemmed); wrap the whole query
+               in double quotes to match it as an exact phrase.
+        status / priority: optional filters as in get_all_tickets().
+
+        Each result carries 'rank' (bm25, lower is better) and a highlighted
+        'snippet' taken from the full text; messages are as in get_all_tickets().
+        """
+        match = self._fts_query(query)
+        if not match:
+            return []
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        c = conn.cursor()
+        params = []
+        if self.fts_enabled:
+            sql = f'''SELECT {self._columns('t')}, bm25(tickets_fts) AS rank,
+                snippet(tickets_fts, 0, '[', ']', '...', 12) AS snippet
+                FROM tickets_fts JOIN tickets t ON t.id = tickets_fts.rowid
+                WHERE tickets_fts MATCH ?'''
+            params.append(match)
+        else:
+            sql = f'SELECT {self._columns("t")}, 0.0 AS rank, NULL AS snippet FROM tickets t WHERE 1=1'
+            for term in self._query_terms(query):
+                sql += ' AND full_message(t.message, t.message_z) LIKE ?'
+                params.append(f'%{term}%')
+        if status:
+            sql += ' AND t.status = ?'
+            params.append(status)
+        if priority:
+            sql += ' AND t.priority = ?'
+            params.append(priority)
+        sql += ' ORDER BY rank, t.priority_score DESC LIMIT ? OFFSET ?'
+        params.extend([limit, offset])
+        c.execute(sql, params)
+        rows = c.fetchall()
         conn.close()
+        return [self._row_to_dict(row) for row in rows]
+
+    @staticmethod
+    def _query_terms(query):
+        query = query.strip()
+        if len(query) > 1 and query[0] == query[-1] == '"':
+            return [query[1:-1].strip()]
+        return query.split()
+
+    @classmethod
+    def _fts_query(cls, query):
+        """Quote user input so FTS5 operators/punctuation can't break the MATCH syntax."""
+        terms = [t for t in cls._query_terms(query) if t]
+        return " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+    def update_ticket_status(self, ticket_id, status):
+        """
+        Update ticket status ('new', 'in-progress', 'resolved'). Returns
+        False when no live ticket has the id (missing or archived).
+        """
+        return self._write(self._set_status, ticket_id, status)
+
+    @staticmethod
+    def _set_status(c, ticket_id, status):
+        # resolved_at keeps the first resolution; reopening clears it.
+        now = datetime.now().isoformat()
+        c.execute("""UPDATE tickets SET status = ?, updated_at = ?,
+            resolved_at = CASE WHEN ? != 'resolved' THEN NULL ELSE COALESCE(resolved_at, ?) END
+            WHERE id = ?""", (status, now, status, now, ticket_id))
+        if not c.rowcount:
+            return False
+        c.execute('DELETE FROM ticket_leases WHERE ticket_id = ?', (ticket_id,))
+        return True
     
     def delete_ticket(self, ticket_id):
         """Delete a ticket."""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
+        self._write(self._delete, ticket_id)
+
+    @staticmethod
+    def _delete(c, ticket_id):
         c.execute('DELETE FROM tickets WHERE id = ?', (ticket_id,))
-        
-        conn.commit()
+        if not c.rowcount:
+            c.execute('DELETE FROM tickets_archive WHERE id = ?', (ticket_id,))
+    
+    def compress_messages(self, threshold=None, batch_size=500):
+        """
+        Compress stored plain-text messages of at least threshold bytes
+        (default: compress_threshold), batch_size rows per transaction.
+        Returns the number compressed.
+
+        Runs on open when a database first gains the message_z column. The
+        pages it frees are reused by new rows; VACUUM returns them to the
+        filesystem.
+        """
+        threshold = self.compress_threshold if threshold is None else threshold
+        if not threshold:
+            return 0
+        compressed = 0
+        after_id = 0
+        while True:
+            conn = self._connect()
+            c = conn.cursor()
+            c.execute('''SELECT id, message FROM tickets WHERE id > ? AND message_z IS NULL
+                AND length(CAST(message AS BLOB)) >= ? ORDER BY id LIMIT ?''', (after_id, threshold, batch_size))
+            rows = c.fetchall()
+            conn.close()
+            if not rows:
+                return compressed
+            after_id = rows[-1][0]
+            updates = []
+            for ticket_id, message in rows:
+                stored, codec, packed = _pack_message(message, threshold)
+                if packed is not None:
+                    updates.append((stored, codec, packed, ticket_id))
+            if updates:
+                compressed += self._write(self._store_packed, updates)
+
+    @staticmethod
+    def _store_packed(c, updates):
+        c.executemany('UPDATE tickets SET message = ?, message_codec = ?, message_z = ? '
+                      'WHERE id = ? AND message_z IS NULL', updates)
+        return len(updates)
+
+    def get_priority_scores(self, status='new'):
+        """[(ticket_id, priority_score)] of tickets with this status, for seeding a WorkQueue."""
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute('SELECT id, priority_score FROM tickets WHERE status = ?', (status,))
+        rows = c.fetchall()
+        conn.close()
+        return rows
+
+    def iter_ticket_chunks(self, chunk_size=500, after_id=0, stale_version=None):
+        """
+        Yield lists of (id, message, ticket_type, lexicon_profile, profile_boost) in id order,
+        chunk_size rows at a time.
+
+        after_id: resume after this ticket id.
+        stale_version: only tickets whose scoring_version differs from this (or is unset).
+                       A dict maps lexicon profile names to their versions; its None
+                       entry applies to tickets without (or with an unlisted) profile.
+        """
+        query = ('SELECT id, full_message(message, message_z), ticket_type, lexicon_profile, profile_boost '
+                 'FROM tickets WHERE id > ?')
+        filter_params = []
+        if stale_version is not None:
+            versions = stale_version if isinstance(stale_version, dict) else {None: stale_version}
+            profiles = [name for name in versions if name is not None]
+            expected = '?'
+            if profiles:
+                expected = 'CASE lexicon_profile ' + ' '.join('WHEN ? THEN ?' for _ in profiles) + ' ELSE ? END'
+                for name in profiles:
+                    filter_params += [name, versions[name]]
+            filter_params.append(versions[None])
+            query += f' AND (scoring_version IS NULL OR scoring_version != {expected})'
+        query += ' ORDER BY id LIMIT ?'
+        while True:
+            conn = self._connect()
+            c = conn.cursor()
+            c.execute(query, [after_id, *filter_params, chunk_size])
+            rows = c.fetchall()
+            conn.close()
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1][0]
+
+    def update_priorities(self, updates, scoring_version=None, checkpoint=None):
+        """
+        Write re-computed priority data back in a single transaction.
+
+        updates: iterable of (ticket_id, priority_data)
+        scoring_version: version stamped on every updated row whose
+                         priority_data has no 'scoring_version' of its own
+        checkpoint: optional (job, last_id) saved in the same transaction
+        """
+        now = datetime.now().isoformat()
+        rows = [
+            (
+                p.get('priority', 'normal'),
+                p.get('priority_score', 0.0),
+                p.get('emotion'),
+                p.get('compound', 0.0),
+                p.get('intensity', 'neutral'),
+                1 if p.get('urgency_flagged') else 0,
+                json.dumps(p.get('flagged_keywords', [])),
+                p.get('reason', ''),
+                p.get('scoring_version', scoring_version),
+                now,
+                ticket_id,
+            )
+            for ticket_id, p in updates
+        ]
+        return self._write(self._update_priorities, rows, checkpoint, now)
+
+    @staticmethod
+    def _update_priorities(c, rows, checkpoint, now):
+        c.executemany('''UPDATE tickets SET priority = ?, priority_score = ?, emotion = ?, compound = ?,
+            intensity = ?, urgency_flagged = ?, flagged_keywords = ?, reason = ?, scoring_version = ?,
+            updated_at = ? WHERE id = ?''', rows)
+        if checkpoint is not None:
+            job, last_id = checkpoint
+            c.execute('''INSERT INTO job_checkpoints (job, last_id, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(job) DO UPDATE SET last_id = excluded.last_id, updated_at = excluded.updated_at''',
+                (job, last_id, now))
+        return len(rows)
+
+    def get_checkpoint(self, job):
+        """Last ticket id committed by a resumable job, or 0."""
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute('SELECT last_id FROM job_checkpoints WHERE job = ?', (job,))
+        row = c.fetchone()
         conn.close()
+        return row[0] if row else 0
+
+    def clear_checkpoint(self, job):
+        self._write(self._clear_checkpoint, job)
+
+    @staticmethod
+    def _clear_checkpoint(c, job):
+        c.execute('DELETE FROM job_checkpoints WHERE job = ?', (job,))
     
     def get_stats(self):
         """Get summary stats about tickets."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         c = conn.cursor()
         
         c.execute('SELECT COUNT(*) FROM tickets')
@@ -209,8 +1064,11 @@ class TicketStore:
         }
     
     def _row_to_dict(self, row):
-        """Convert sqlite3.Row to dict and parse JSON fields."""
+        """Convert sqlite3.Row to dict, parse JSON fields and decompress a selected message_z."""
         d = dict(row)
+        packed = d.pop('message_z', None)
+        if packed is not None:
+            d['message'] = _full_message(d['message'], packed)
         if d.get('flagged_keywords'):
             d['flagged_keywords'] = json.loads(d['flagged_keywords'])
         if d.get('urgency_flagged'):
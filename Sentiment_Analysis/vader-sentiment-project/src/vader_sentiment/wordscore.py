@@ -0,0 +1,87 @@
+"""
+Batch scoring of single tokens straight from the VADER lexicon.
+
+For one token, polarity_scores() reduces to a lexicon lookup: with a single
+word there are no neighbours for boosters, negations, "but" or ALL-CAPS
+contrast to act on. What is left is VADER's token cleanup, booster words
+scoring 0, the !/? emphasis and the normalization into neg/neu/pos/compound.
+score_words() does exactly that, once per distinct token, and gives the same
+dicts as calling polarity_scores() on each token.
+
+Tokens containing an emoji (VADER replaces it with a multi-word
+description) or whitespace are handed to polarity_scores() unchanged.
+"""
+
+import math
+import string
+
+from vaderSentiment.vaderSentiment import BOOSTER_DICT, normalize
+
+
+def _strip_punc_if_word(token):
+    # As VADER's SentiText: keep short tokens such as ":)" intact.
+    stripped = token.strip(string.punctuation)
+    return token if len(stripped) <= 2 else stripped
+
+
+def _punctuation_emphasis(token):
+    # VADER's _amplify_ep + _amplify_qm.
+    ep_amplifier = min(token.count("!"), 4) * 0.292
+    qm_count = token.count("?")
+    qm_amplifier = 0
+    if qm_count > 1:
+        qm_amplifier = qm_count * 0.18 if qm_count <= 3 else 0.96
+    return ep_amplifier + qm_amplifier
+
+
+def _scores(valence, token):
+    """score_valence() for the single sentiment `valence`."""
+    sum_s = float(valence)
+    amplifier = _punctuation_emphasis(token) if ("!" in token or "?" in token) else 0
+    if sum_s > 0:
+        sum_s += amplifier
+    elif sum_s < 0:
+        sum_s -= amplifier
+    compound = normalize(sum_s)
+
+    pos_sum = neg_sum = 0.0
+    neu_count = 0
+    if valence > 0:
+        pos_sum = float(valence) + 1 + amplifier
+    elif valence < 0:
+        neg_sum = float(valence) - 1 - amplifier
+    else:
+        neu_count = 1
+    total = pos_sum + math.fabs(neg_sum) + neu_count
+    return {"neg": round(math.fabs(neg_sum / total), 3),
+            "neu": round(math.fabs(neu_count / total), 3),
+            "pos": round(math.fabs(pos_sum / total), 3),
+            "compound": round(compound, 4)}
+
+
+def score_word(token, vader):
+    """polarity_scores(token) for one token, from vader's lexicon when possible."""
+    text = token.strip()
+    if not text:
+        return {"neg": 0.0, "neu": 0.0, "pos": 0.0, "compound": 0.0}
+    if len(text.split()) != 1 or (not text.isascii() and any(c in vader.emojis for c in text)):
+        return vader.polarity_scores(token)
+    word = _strip_punc_if_word(text).lower()
+    valence = 0 if word in BOOSTER_DICT else vader.lexicon.get(word, 0)
+    return _scores(valence, text)
+
+
+def score_words(tokens, vader):
+    """
+    [polarity_scores(t) for t in tokens], resolving each distinct token once.
+    vader may be a SentimentIntensityAnalyzer or a cache.CachedVader, with a
+    plain or layered lexicon.
+    """
+    seen = {}
+    out = []
+    for token in tokens:
+        scores = seen.get(token)
+        if scores is None:
+            scores = seen[token] = score_word(token, vader)
+        out.append(dict(scores))
+    return out
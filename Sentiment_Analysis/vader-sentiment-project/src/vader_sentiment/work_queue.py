@@ -0,0 +1,145 @@
+"""
+In-memory priority queue of tickets waiting for an agent.
+
+Tickets are ordered by priority_score (highest first), then by id (oldest
+first). Updates and removals are lazy: the heap may hold stale entries,
+which are skipped when they reach the top, so push/discard/claim are all
+O(log n) and no operation scans the backlog.
+
+Claiming a ticket takes a lease. Until the lease is released or expires the
+ticket is not handed to anyone else; an expired lease puts the ticket back
+in the queue.
+
+The heap and its leases live in one process, so MemoryTicketStore uses it
+for its claim_next_ticket(). The SQLite store keeps leases in the
+database instead, where every server process sees them.
+"""
+
+import heapq
+import itertools
+import secrets
+import threading
+import time
+
+DEFAULT_LEASE_SECONDS = 300
+
+
+class WorkQueue:
+    """
+    Heap-backed "next ticket to handle" queue with leases.
+
+    lease_seconds: default lease length for claim().
+    clock: monotonic time source (injectable for tests).
+    """
+
+    def __init__(self, lease_seconds=DEFAULT_LEASE_SECONDS, clock=time.monotonic):
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self._heap = []          # (-score, ticket_id, version)
+        self._queued = {}        # ticket_id -> (score, version) of the live heap entry
+        self._leases = {}        # ticket_id -> {'token', 'agent', 'expires', 'score'}
+        self._expiry = []        # (expires, ticket_id, token)
+        self._versions = itertools.count()
+        self._lock = threading.Lock()
+
+    def seed(self, entries):
+        """Replace the queue contents with (ticket_id, priority_score) pairs in O(n)."""
+        with self._lock:
+            self._queued = {}
+            self._heap = []
+            for ticket_id, score in entries:
+                if ticket_id in self._leases:
+                    continue
+                version = next(self._versions)
+                self._queued[ticket_id] = (score or 0.0, version)
+                self._heap.append((-(score or 0.0), ticket_id, version))
+            heapq.heapify(self._heap)
+
+    def push(self, ticket_id, score):
+        """Add a ticket, or update its score if already queued or leased."""
+        with self._lock:
+            score = score or 0.0
+            lease = self._leases.get(ticket_id)
+            if lease is not None:
+                lease['score'] = score
+                return
+            self._push(ticket_id, score)
+
+    def _push(self, ticket_id, score):
+        version = next(self._versions)
+        self._queued[ticket_id] = (score, version)
+        heapq.heappush(self._heap, (-score, ticket_id, version))
+        if len(self._heap) > 2 * len(self._queued) + 1024:
+            # Mostly stale entries: rebuild from the live ones.
+            self._heap = [(-sc, tid, v) for tid, (sc, v) in self._queued.items()]
+            heapq.heapify(self._heap)
+
+    def discard(self, ticket_id):
+        """Forget a ticket (handled, no longer new, or deleted), dropping any lease."""
+        with self._lock:
+            self._queued.pop(ticket_id, None)
+            self._leases.pop(ticket_id, None)
+
+    def claim(self, agent=None, lease_seconds=None):
+        """
+        Lease the highest-priority waiting ticket.
+
+        Returns {'ticket_id', 'token', 'agent', 'expires_in'} or None if
+        nothing is waiting.
+        """
+        lease_seconds = self.lease_seconds if lease_seconds is None else lease_seconds
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            while self._heap:
+                neg_score, ticket_id, version = heapq.heappop(self._heap)
+                current = self._queued.get(ticket_id)
+                if current is None or current[1] != version:
+                    continue  # stale entry
+                del self._queued[ticket_id]
+                token = secrets.token_hex(8)
+                expires = now + lease_seconds
+                self._leases[ticket_id] = {'token': token, 'agent': agent, 'expires': expires, 'score': -neg_score}
+                heapq.heappush(self._expiry, (expires, ticket_id, token))
+                return {'ticket_id': ticket_id, 'token': token, 'agent': agent, 'expires_in': lease_seconds}
+            return None
+
+    def renew(self, ticket_id, token, lease_seconds=None):
+        """Extend a lease; False if the token no longer holds it."""
+        lease_seconds = self.lease_seconds if lease_seconds is None else lease_seconds
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            lease = self._leases.get(ticket_id)
+            if lease is None or lease['token'] != token:
+                return False
+            lease['expires'] = now + lease_seconds
+            heapq.heappush(self._expiry, (lease['expires'], ticket_id, token))
+            return True
+
+    def release(self, ticket_id, token):
+        """Give a leased ticket back to the queue; False if the token no longer holds it."""
+        with self._lock:
+            lease = self._leases.get(ticket_id)
+            if lease is None or lease['token'] != token:
+                return False
+            del self._leases[ticket_id]
+            self._push(ticket_id, lease['score'])
+            return True
+
+    def _expire(self, now):
+        while self._expiry and self._expiry[0][0] <= now:
+            expires, ticket_id, token = heapq.heappop(self._expiry)
+            lease = self._leases.get(ticket_id)
+            # Skip entries superseded by a renewal, release or new claim.
+            if lease is not None and lease['token'] == token and lease['expires'] <= now:
+                del self._leases[ticket_id]
+                self._push(ticket_id, lease['score'])
+
+    def __len__(self):
+        return len(self._queued)
+
+    def stats(self):
+        with self._lock:
+            self._expire(self.clock())
+            return {'waiting': len(self._queued), 'leased': len(self._leases), 'heap_entries': len(self._heap)}
@@ -1,37 +1,58 @@
+import os
 import traceback
 import logging
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, current_app, render_template, request, jsonify
 from vader_sentiment import SentimentAnalyzer
 from flask_cors import CORS
 import webbrowser
 
-logging.basicConfig(level=logging.DEBUG)
 
-app = Flask(__name__, template_folder="templates", static_folder="static")
-CORS(app)                     # allow cross-origin for local testing
-analyzer = SentimentAnalyzer()
+def create_app(config=None):
+    """Build the analysis web app; see support_server.create_app for the production notes."""
+    app = Flask(__name__, template_folder="templates", static_folder="static")
+    app.config.update({"DEBUG": False, "LOG_LEVEL": "WARNING"})
+    app.config.from_prefixed_env("WEB_APP")
+    if config:
+        app.config.update(config)
+    app.debug = bool(app.config["DEBUG"])
+    app.logger.setLevel(app.config["LOG_LEVEL"])
+    CORS(app)                     # allow cross-origin for local testing
+
+    analyzer = SentimentAnalyzer()
+    analyzer.analyze("Warm-up pass so the first request is not slow!")
+    app.extensions["analyzer"] = analyzer
+
+    app.add_url_rule("/", view_func=index)
+    app.add_url_rule("/analyze", view_func=analyze, methods=["POST"])
+    return app
+
 
-@app.route("/")
 def index():
     return render_template("index.html")
 
-@app.route("/analyze", methods=["POST"])
+
 def analyze():
-    app.logger.debug("Received /analyze POST")   # <-- helps confirm request arrived
+    current_app.logger.debug("Received /analyze POST")   # <-- helps confirm request arrived
     data = request.get_json() or {}
     text = data.get("text", "")
     if not text.strip():
         return jsonify({"error": "empty text"}), 400
     try:
-        res = analyzer.analyze(text)
+        res = current_app.extensions["analyzer"].analyze(text)
         return jsonify(res)
     except Exception as e:
-        tb = traceback.format_exc()
-        app.logger.exception("Error during analysis")
-        # For local debugging only — do not expose stack traces in production
-        return jsonify({"error": str(e), "traceback": tb}), 500
+        current_app.logger.exception("Error during analysis")
+        body = {"error": str(e)}
+        # Stack traces are only exposed in debug mode
+        if current_app.debug:
+            body["traceback"] = traceback.format_exc()
+        return jsonify(body), 500
+
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    app = create_app({"DEBUG": True, "LOG_LEVEL": "DEBUG"})
     url = "http://127.0.0.1:8000"
-    webbrowser.open_new_tab(url)
+    if not os.environ.get("WERKZEUG_RUN_MAIN"):
+        webbrowser.open_new_tab(url)
     app.run(host="127.0.0.1", port=8000, debug=True)
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""
+WSGI entry point for production serving.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Configuration comes from ``SUPPORT_*`` environment variables
+(see ``support_server.DEFAULT_CONFIG``).
+"""
+
+from support_server import create_app
+
+app = create_app()
@@ -0,0 +1,143 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from vader_sentiment.admission import AdmissionController, Overloaded
+
+from support_server import create_app
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAdmissionController(unittest.TestCase):
+
+    def test_full_queue_rejects_with_429(self):
+        ac = AdmissionController(max_concurrent=1, max_queue=0, retry_after=2.5)
+        slot = ac.acquire()
+        with self.assertRaises(Overloaded) as cm:
+            ac.acquire()
+        self.assertEqual((cm.exception.status, cm.exception.retry_after_header), (429, "3"))
+        ac.release(slot)
+        ac.release(ac.acquire())
+        self.assertEqual(ac.stats()["rejected"], {"429": 1, "503": 0})
+
+    def test_queue_wait_times_out_with_503(self):
+        ac = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        ac.acquire()
+        with self.assertRaises(Overloaded) as cm:
+            ac.acquire()
+        self.assertEqual(cm.exception.status, 503)
+        self.assertEqual(ac.stats()["waiting"], 0)
+
+    def test_waiter_is_admitted_when_a_slot_frees(self):
+        ac = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+        slot = ac.acquire()
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(ac.acquire()))
+        waiter.start()
+        while ac.stats()["waiting"] == 0:
+            pass
+        ac.release(slot)
+        waiter.join(5)
+        self.assertEqual(len(got), 1)
+        self.assertEqual(ac.stats()["active"], 1)
+
+    def test_degrades_on_p95_latency(self):
+        clock = FakeClock()
+        ac = AdmissionController(max_concurrent=4, degrade_p95_ms=500, latency_window=10, clock=clock)
+        for _ in range(10):
+            slot = ac.acquire()
+            self.assertFalse(slot.degraded)
+            clock.now += 0.1
+            ac.release(slot)
+        slow = ac.acquire()
+        clock.now += 2.0
+        ac.release(slow)
+        self.assertTrue(ac.acquire().degraded)
+        self.assertEqual(ac.stats()["p95_ms"], 2000.0)
+
+
+class TestServerAdmission(unittest.TestCase):
+
+    def client(self, **config):
+        app = create_app({"STORAGE": "memory", "WARM_UP": False, **config})
+        return app, app.test_client()
+
+    def test_busy_server_answers_429_with_retry_after(self):
+        app, client = self.client(ADMISSION_MAX_CONCURRENT=1, ADMISSION_MAX_QUEUE=0)
+        admission = app.extensions["support"].admission
+        slot = admission.acquire()
+        response = client.post("/api/analyze", json={"text": "The site is down!"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "1")
+        # Reads are never queued behind analysis.
+        self.assertEqual(client.get("/api/tickets").status_code, 200)
+        admission.release(slot)
+        self.assertEqual(client.post("/api/analyze", json={"text": "The site is down!"}).status_code, 200)
+
+    def test_slots_follow_the_worker_thread_count(self):
+        for threads, slots in ((1, 1), (2, 1), (8, 4)):
+            app, _ = self.client(THREADS=threads)
+            self.assertEqual(app.extensions["support"].admission.max_concurrent, slots)
+
+    def test_threaded_worker_sheds_concurrent_analysis(self):
+        app, client = self.client(THREADS=2, ADMISSION_MAX_QUEUE=0)
+        analyzer = app.extensions["support"].analyzer
+        entered, release = threading.Event(), threading.Event()
+        analyze = analyzer.analyze
+
+        def slow_analyze(*args, **kwargs):
+            entered.set()
+            release.wait(5)
+            return analyze(*args, **kwargs)
+
+        analyzer.analyze = slow_analyze
+        responses = []
+        worker = threading.Thread(target=lambda: responses.append(
+            app.test_client().post("/api/analyze", json={"text": "The site is down!"})))
+        worker.start()
+        self.assertTrue(entered.wait(5))
+        self.assertEqual(client.post("/api/analyze", json={"text": "Still down"}).status_code, 429)
+        release.set()
+        worker.join(5)
+        self.assertEqual(responses[0].status_code, 200)
+
+    def test_degraded_results_are_cached_apart(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "cache.db")
+            text = "I am furious, the app is broken!"
+            _, degraded = self.client(ANALYSIS_CACHE_PATH=path, DEGRADE_QUEUE_DEPTH=0)
+            self.assertIsNone(degraded.post("/api/analyze", json={"text": text}).get_json()["analysis"]["context"])
+            _, full = self.client(ANALYSIS_CACHE_PATH=path)
+            self.assertIsNotNone(full.post("/api/analyze", json={"text": text}).get_json()["analysis"]["context"])
+
+    def test_degraded_requests_skip_summary_and_context(self):
+        _, client = self.client(DEGRADE_QUEUE_DEPTH=0)
+        body = client.post("/api/analyze", json={"text": "I am furious, the app is broken!"}).get_json()
+        self.assertTrue(body["degraded"])
+        self.assertIsNone(body["analysis"]["summary"])
+        self.assertIsNone(body["analysis"]["context"])
+        self.assertIn("broken", body["priority_data"]["flagged_keywords"])
+        created = client.post("/api/tickets", json={"message": "Account hacked, help!"}).get_json()
+        self.assertTrue(created["degraded"])
+        self.assertEqual(created["priority_data"]["priority"], "critical")
+        self.assertEqual(client.get("/api/stats").get_json()["admission"]["degraded"], 2)
+
+    def test_admission_can_be_disabled(self):
+        _, client = self.client(ADMISSION_MAX_CONCURRENT=None)
+        body = client.post("/api/analyze", json={"text": "Thanks, all good now."}).get_json()
+        self.assertFalse(body["degraded"])
+        self.assertIsNotNone(body["analysis"]["context"])
+        self.assertIsNone(client.get("/api/stats").get_json()["admission"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+from vader_sentiment import archive
+from vader_sentiment.archive import Archiver
+from vader_sentiment.memory_store import MemoryTicketStore
+from vader_sentiment.ticket_store import TicketStore
+
+from support_server import create_app
+
+LATER = datetime.now() + timedelta(days=31)
+
+
+class TestArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "tickets.db")
+        self.engines = [TicketStore(db_path=self.db_path), MemoryTicketStore()]
+        for store in self.engines:
+            for i in range(1, 6):
+                store.add_ticket(f"Refund request {i}", "A", {'priority': 'normal', 'compound': -0.2})
+            for ticket_id in (1, 2, 4):
+                store.update_ticket_status(ticket_id, 'resolved')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_moves_old_resolved_tickets_in_batches(self):
+        for store in self.engines:
+            trends = store.get_trends(bucket='day')
+            self.assertEqual(store.archive_resolved(30, batch_size=2), 0)
+            self.assertEqual(store.archive_resolved(30, batch_size=2, now=LATER), 3)
+            self.assertEqual([t['id'] for t in store.get_all_tickets(order_by='id')], [3, 5])
+            self.assertEqual(store.get_stats()['total_tickets'], 2)
+
+            archived = store.get_ticket(2)
+            self.assertEqual((archived['message'], archived['status']), ("Refund request 2", 'resolved'))
+            self.assertEqual(archived['archived_at'], LATER.isoformat())
+            self.assertNotIn('archived_at', store.get_ticket(3))
+            self.assertEqual(store.get_trends(bucket='day'), trends)
+            self.assertEqual([t['id'] for t in store.search("refund")], [3, 5])
+
+            store.delete_ticket(2)
+            self.assertIsNone(store.get_ticket(2))
+            self.assertEqual(store.get_trends(bucket='day')[0]['tickets'], 4)
+
+    def test_age_counts_from_resolution_not_last_update(self):
+        for store in self.engines:
+            resolved_at = store.get_ticket(1)['resolved_at']
+            store.update_ticket_status(1, 'resolved')
+            store.update_priorities([(1, {'priority': 'high', 'priority_score': 0.6})], scoring_version='v2')
+            self.assertEqual(store.get_ticket(1)['resolved_at'], resolved_at)
+            store.update_ticket_status(4, 'new')
+            self.assertIsNone(store.get_ticket(4)['resolved_at'])
+            store.update_priorities([(2, {'priority': 'high'})], scoring_version='v2')
+            self.assertEqual(store.archive_resolved(30, batch_size=1, now=LATER), 2)
+            self.assertEqual([t['id'] for t in store.get_all_tickets(order_by='id')], [3, 4, 5])
+
+    def test_archived_tickets_refuse_status_updates(self):
+        for store in self.engines:
+            store.archive_resolved(30, now=LATER)
+            self.assertFalse(store.update_ticket_status(2, 'new'))
+            self.assertEqual(store.get_ticket(2)['status'], 'resolved')
+            self.assertFalse(store.update_ticket_status(99, 'new'))
+            self.assertTrue(store.update_ticket_status(3, 'in-progress'))
+
+    def test_iter_tickets_can_include_the_archive(self):
+        for store in self.engines:
+            store.archive_resolved(30, now=LATER)
+            self.assertEqual([t['id'] for t in store.iter_tickets(batch_size=2)], [3, 5])
+            tickets = list(store.iter_tickets(batch_size=2, include_archived=True))
+            self.assertEqual([t['id'] for t in tickets], [1, 2, 3, 4, 5])
+            self.assertEqual([t.get('archived_at') for t in tickets][1:3], [LATER.isoformat(), None])
+            self.assertNotIn('archived_at', tickets[2])
+            self.assertEqual([t['id'] for t in store.iter_tickets(status='resolved', include_archived=True)],
+                             [1, 2, 4])
+
+    def test_export_includes_the_archive_on_request(self):
+        app = create_app({"DB_PATH": self.db_path, "WARM_UP": False})
+        self.engines[0].archive_resolved(30, now=LATER)
+        client = app.test_client()
+        live = client.get("/api/tickets/export?format=jsonl").get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in live], [3, 5])
+        full = client.get("/api/tickets/export?format=jsonl&include_archived=1").get_data(as_text=True)
+        records = [json.loads(line) for line in full.splitlines()]
+        self.assertEqual([(r['id'], bool(r['archived_at'])) for r in records],
+                         [(1, True), (2, True), (3, False), (4, True), (5, False)])
+
+    def test_archived_large_messages_stay_readable(self):
+        store = self.engines[0]
+        log = "".join(f"ERROR request {i} failed: connection reset\n" for i in range(5000))
+        ticket_id = store.add_ticket(log, "B", None)
+        store.update_ticket_status(ticket_id, 'resolved')
+        store.archive_resolved(30, now=LATER)
+        self.assertEqual(store.get_ticket(ticket_id)['message'], log)
+
+    def test_incremental_vacuum_releases_archived_pages(self):
+        store = self.engines[0]
+        for i in range(40):
+            ticket_id = store.add_ticket(os.urandom(6000).hex(), "C", None)
+            store.update_ticket_status(ticket_id, 'resolved')
+        store.archive_resolved(30, now=LATER)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DELETE FROM tickets_archive")
+        conn.commit()
+        conn.close()
+        size = os.path.getsize(self.db_path)
+        self.assertGreater(store.incremental_vacuum(), 0)
+        self.assertLess(os.path.getsize(self.db_path), size)
+        self.assertEqual(self.engines[1].incremental_vacuum(), 0)
+
+
+class TestArchiver(unittest.TestCase):
+
+    def test_run_once_archives_and_counts(self):
+        store = MemoryTicketStore()
+        store.update_ticket_status(store.add_ticket("Done", "A", None), 'resolved')
+        archiver = Archiver(store, older_than_days=0, vacuum_pages=100)
+        self.assertEqual(archiver.run_once(), 1)
+        stats = archiver.stats()
+        self.assertEqual((stats['runs'], stats['archived'], stats['pages_released']), (1, 1, 0))
+        with self.assertRaises(ValueError):
+            Archiver(store, older_than_days=30, batch_size=0)
+
+    def test_server_skips_archived_tickets(self):
+        app = create_app({"STORAGE": "memory", "WARM_UP": False, "DEDUP_THRESHOLD": 0.8})
+        client = app.test_client()
+        message = "The checkout page times out with error 504 when I pay by card"
+        first = client.post("/api/tickets", json={"message": message}).get_json()["ticket_id"]
+        client.patch(f"/api/tickets/{first}/status", json={"status": "resolved"})
+        store = app.extensions["support"].store
+        self.assertEqual(store.archive_resolved(0), 1)
+        self.assertEqual(client.patch(f"/api/tickets/{first}/status", json={"status": "new"}).status_code, 409)
+        self.assertEqual(client.patch("/api/tickets/99/status", json={"status": "new"}).status_code, 404)
+        second = client.post("/api/tickets", json={"message": message}).get_json()
+        self.assertIsNone(second["duplicate_of"])
+        third = client.post("/api/tickets", json={"message": message}).get_json()
+        self.assertEqual(third["duplicate_of"], second["ticket_id"])
+
+    def test_server_starts_no_archiver(self):
+        app = create_app({"STORAGE": "memory", "WARM_UP": False})
+        self.assertNotIn("ticket-archiver", [t.name for t in threading.enumerate()])
+        self.assertNotIn("archive", app.test_client().get("/api/stats").get_json())
+
+    def test_main_runs_one_pass_and_reports(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "tickets.db")
+            store = TicketStore(db_path=db_path)
+            store.update_ticket_status(store.add_ticket("Done", "A", None), 'resolved')
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                archive.main(["--db", db_path, "--older-than-days", "0", "--once"])
+            stats = json.loads(out.getvalue())
+            self.assertEqual((stats['runs'], stats['archived']), (1, 1))
+            self.assertIn('archived_at', store.get_ticket(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from vader_sentiment.batching import MicroBatcher
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def test_concurrent_submits_share_a_batch(self):
+        seen = []
+
+        def handler(items):
+            seen.append(list(items))
+            return [item * 2 for item in items]
+
+        async def run():
+            batcher = MicroBatcher(handler, max_batch_size=8, max_wait=0.05)
+            results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+            await batcher.stop()
+            return results
+
+        self.assertEqual(asyncio.run(run()), [0, 2, 4, 6, 8])
+        self.assertEqual(seen, [[0, 1, 2, 3, 4]])
+
+    def test_batch_size_is_capped(self):
+        sizes = []
+
+        def handler(items):
+            sizes.append(len(items))
+            return items
+
+        async def run():
+            batcher = MicroBatcher(handler, max_batch_size=3, max_wait=0.05)
+            await asyncio.gather(*(batcher.submit(i) for i in range(7)))
+            await batcher.stop()
+
+        asyncio.run(run())
+        self.assertEqual(sum(sizes), 7)
+        self.assertTrue(all(size <= 3 for size in sizes))
+
+    def test_per_item_exception(self):
+        def handler(items):
+            return [ValueError("bad") if item < 0 else item for item in items]
+
+        async def run():
+            batcher = MicroBatcher(handler, max_wait=0.01)
+            results = await asyncio.gather(batcher.submit(1), batcher.submit(-1), return_exceptions=True)
+            await batcher.stop()
+            return results
+
+        ok, err = asyncio.run(run())
+        self.assertEqual(ok, 1)
+        self.assertIsInstance(err, ValueError)
+
+    def test_stop_waits_for_running_batches(self):
+        def handler(items):
+            time.sleep(0.1)
+            return items
+
+        async def run():
+            batcher = MicroBatcher(handler, max_wait=0.01)
+            pending = asyncio.ensure_future(batcher.submit(7))
+            while not batcher._running:
+                await asyncio.sleep(0.005)
+            await batcher.stop()
+            return pending.done() and await pending, batcher._running
+
+        result, running = asyncio.run(run())
+        self.assertEqual(result, 7)
+        self.assertEqual(running, set())
+
+
+class TestSupportASGIApp(unittest.TestCase):
+
+    def setUp(self):
+        from support_asgi import create_app
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.app = create_app({"DB_PATH": os.path.join(self.tmpdir.name, "t.db"), "WARM_UP": False})
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _request(self, method, path, payload=None):
+        return self._requests((method, path, payload))[0]
+
+    def _requests(self, *calls):
+        """Send each (method, path, payload) in turn on one event loop."""
+        responses = []
+
+        async def send_one(method, path, payload):
+            body = json.dumps(payload).encode() if payload is not None else b""
+            path, _, query = path.partition("?")
+            sent = []
+
+            async def receive():
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            async def send(message):
+                sent.append(message)
+
+            await self.app({"type": "http", "method": method, "path": path, "query_string": query.encode()},
+                           receive, send)
+            responses.append((sent[0]["status"], json.loads(sent[1]["body"])))
+
+        async def run():
+            for call in calls:
+                await send_one(*call)
+            await self.app.batcher.stop()
+
+        asyncio.run(run())
+        return responses
+
+    def test_analyze_route(self):
+        status, body = self._request("POST", "/api/analyze", {"text": "I am furious, nothing works!"})
+        self.assertEqual(status, 200)
+        self.assertIn("priority", body["priority_data"])
+        self.assertIn("overall", body["analysis"])
+
+    def test_analyze_format_query_parameter(self):
+        text = "I am not happy. The app is very slow!!"
+        (_, verbose), (_, compact), (status, _) = self._requests(
+            ("POST", "/api/analyze", {"text": text}),
+            ("POST", "/api/analyze?format=compact", {"text": text}),
+            ("POST", "/api/analyze?format=xml", {"text": text}),
+        )
+        words = verbose["analysis"]["segments"][0]["structure"]["words"]
+        table = compact["analysis"]["segments"][0]["structure"]["words"]
+        self.assertEqual(table["w"], [w["word"] for w in words])
+        self.assertEqual(status, 400)
+
+    def test_stats_sections_match_the_wsgi_server(self):
+        status, body = self._request("GET", "/api/stats")
+        self.assertEqual(status, 200)
+        for section in ("admission", "queries", "writer", "queue"):
+            self.assertIn(section, body)
+
+    def test_submit_ticket_and_unknown_route(self):
+        status, body = self._request("POST", "/api/tickets", {"message": "Great product, thanks!"})
+        self.assertEqual(status, 201)
+        status, _ = self._request("GET", "/api/nope")
+        self.assertEqual(status, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
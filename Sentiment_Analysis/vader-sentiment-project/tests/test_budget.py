@@ -0,0 +1,122 @@
+import os
+import tempfile
+import time
+import unittest
+
+from vader_sentiment.analyzer import SentimentAnalyzer
+from vader_sentiment.budget import AnalysisBudget, Deadline
+from vader_sentiment.persistent_cache import PersistentAnalysisCache
+
+from support_server import create_app
+
+SENTENCE = "The export failed again and I am angry."
+
+
+class StepClock:
+    """Advances by `step` seconds on every call."""
+
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+class TestSampling(unittest.TestCase):
+
+    def test_within_budget_is_untouched(self):
+        self.assertEqual(AnalysisBudget().sample(SENTENCE), (SENTENCE, None))
+
+    def test_sentence_head_and_tail(self):
+        text = " ".join(f"Sentence number {i}." for i in range(10))
+        sampled, report = AnalysisBudget(max_sentences=4, max_tokens=None).sample(text)
+        self.assertEqual(sampled, "Sentence number 0. Sentence number 1. Sentence number 8. Sentence number 9.")
+        self.assertEqual(report["reasons"], ["sentences"])
+        self.assertEqual(report["omitted_sentences"], 6)
+
+    def test_chars_cut_on_whitespace(self):
+        text = "alpha " * 1000 + "omega"
+        sampled, report = AnalysisBudget(max_chars=100, max_sentences=None, max_tokens=None).sample(text)
+        self.assertLessEqual(len(sampled), 100)
+        self.assertTrue(sampled.startswith("alpha alpha"))
+        self.assertTrue(sampled.endswith("alpha omega"))
+        self.assertTrue(all(word in ("alpha", "omega") for word in sampled.split()))
+        self.assertEqual(report["original_chars"], len(text))
+
+    def test_tokens(self):
+        text = " ".join(["one two three."] * 6)
+        sampled, report = AnalysisBudget(max_tokens=7).sample(text)
+        self.assertEqual(len(sampled.split()), 6)
+        self.assertEqual(report["reasons"], ["tokens"])
+        # A single sentence longer than the budget keeps its first and last tokens.
+        sampled, _ = AnalysisBudget(max_tokens=4).sample("a b c d e f g h")
+        self.assertEqual(sampled, "a b g h")
+
+    def test_newlines_survive_sampling(self):
+        text = "\n".join(f"Line {i} is here." for i in range(200))
+        # Character limit only: sentence counting must not flatten the sample.
+        sampled, report = AnalysisBudget(max_chars=200).sample(text)
+        self.assertEqual(report["reasons"], ["chars"])
+        self.assertIn("\n", sampled)
+        self.assertEqual(sampled, AnalysisBudget(max_chars=200, max_sentences=None, max_tokens=None).sample(text)[0])
+        sampled, _ = AnalysisBudget(max_sentences=4, max_tokens=None).sample(text)
+        self.assertEqual(sampled, "Line 0 is here.\nLine 1 is here. Line 198 is here.\nLine 199 is here.")
+
+    def test_deterministic(self):
+        text = (SENTENCE + " ") * 5000
+        budget = AnalysisBudget()
+        self.assertEqual(budget.sample(text), budget.sample(text))
+
+    def test_deadline(self):
+        deadline = Deadline(2.5, clock=StepClock(2.0))
+        self.assertFalse(deadline.expired())
+        self.assertTrue(deadline.expired())
+        self.assertTrue(deadline.exceeded)
+        self.assertFalse(Deadline(None).expired())
+
+
+class TestBudgetedAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = SentimentAnalyzer(sentence_cache=False, budget=AnalysisBudget(max_sentences=20))
+
+    def test_large_input_is_bounded_and_marked(self):
+        text = (SENTENCE + " ") * 20000  # ~800 KB
+        started = time.perf_counter()
+        result = self.analyzer.analyze(text)
+        self.assertLess(time.perf_counter() - started, 5)
+        self.assertTrue(result["approximate"])
+        self.assertIn("chars", result["budget"]["reasons"])
+        self.assertLessEqual(len(result["segments"]), 20)
+        self.assertEqual(result["context"]["main_emotion"], "anger")
+
+    def test_small_input_has_no_marker(self):
+        self.assertNotIn("approximate", self.analyzer.analyze(SENTENCE))
+
+    def test_deadline_skips_remaining_stages_and_is_not_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            analyzer = SentimentAnalyzer(sentence_cache=False,
+                                         persistent_cache=PersistentAnalysisCache(os.path.join(tmp, "c.db")))
+            budget = AnalysisBudget(deadline_seconds=5, clock=StepClock(1.0))
+            text = " ".join([SENTENCE] * 30)
+            result = analyzer.analyze(text, mode="sentence", budget=budget)
+            self.assertEqual(result["budget"]["reasons"], ["deadline"])
+            self.assertLess(len(result["segments"]), 30)
+            self.assertEqual(analyzer.persistent_cache.stats()["entries"], 0)
+            self.assertNotIn("approximate", analyzer.analyze(text, mode="sentence"))
+            self.assertEqual(analyzer.persistent_cache.stats()["entries"], 1)
+
+
+class TestServerBudget(unittest.TestCase):
+
+    def test_analyze_endpoint_reports_approximate(self):
+        client = create_app({"STORAGE": "memory", "WARM_UP": False, "ANALYSIS_MAX_SENTENCES": 5}).test_client()
+        data = client.post("/api/analyze", json={"text": " ".join([SENTENCE] * 50)}).get_json()
+        self.assertTrue(data["analysis"]["approximate"])
+        self.assertEqual(data["analysis"]["budget"]["analyzed_sentences"], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
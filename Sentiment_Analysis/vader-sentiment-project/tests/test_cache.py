@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from vader_sentiment.analyzer import SentimentAnalyzer
+from vader_sentiment.cache import SentenceCache
+from vader_sentiment.compact import TokenTable
+from vader_sentiment import persistent_cache
+from vader_sentiment.persistent_cache import PersistentAnalysisCache
+
+
+class TestSentenceCache(unittest.TestCase):
+
+    def test_lru_eviction_and_stats(self):
+        cache = SentenceCache(maxsize=2)
+        calls = []
+
+        def compute(value):
+            calls.append(value)
+            return value.upper()
+
+        self.assertEqual(cache.get_or_compute("k", "a", lambda: compute("a")), "A")
+        self.assertEqual(cache.get_or_compute("k", "b", lambda: compute("b")), "B")
+        self.assertEqual(cache.get_or_compute("k", "a", lambda: compute("a")), "A")
+        cache.get_or_compute("k", "c", lambda: compute("c"))  # evicts "b"
+        cache.get_or_compute("k", "b", lambda: compute("b"))
+        self.assertEqual(calls, ["a", "b", "c", "b"])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 4, 2))
+        self.assertEqual(stats["size"], 2)
+
+    def test_long_texts_bypass_cache(self):
+        cache = SentenceCache(maxsize=10, max_key_length=5)
+        cache.get_or_compute("k", "longer than five", lambda: 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_repeated_sentences_are_scored_once(self):
+        cache = SentenceCache()
+        analyzer = SentimentAnalyzer(sentence_cache=cache)
+        uncached = SentimentAnalyzer(sentence_cache=False)
+        text = "Thanks in advance! The checkout page is broken."
+        first = analyzer.analyze(text)
+        misses = cache.misses
+        second = analyzer.analyze(text)
+        self.assertEqual(cache.misses, misses)
+        self.assertEqual(first, second)
+        self.assertEqual(first, uncached.analyze(text))
+
+
+class TestPersistentAnalysisCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cache.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_results_survive_restart(self):
+        text = "Hello again. My invoice is wrong and I'm annoyed!"
+        first = SentimentAnalyzer(sentence_cache=False, persistent_cache=PersistentAnalysisCache(self.path))
+        expected = first.analyze(text)
+
+        cache = PersistentAnalysisCache(self.path)
+        second = SentimentAnalyzer(sentence_cache=False, persistent_cache=cache)
+        self.assertEqual(second.analyze(text), expected)
+        self.assertEqual(cache.hits, 1)
+        packed = second.analyze(text, compact=True)
+        self.assertIsInstance(packed["segments"][0]["structure"]["words"], TokenTable)
+
+    def test_lexicon_change_invalidates(self):
+        cache = PersistentAnalysisCache(self.path)
+        analyzer = SentimentAnalyzer(sentence_cache=False, persistent_cache=cache)
+        analyzer.analyze("The product is fine.")
+        self.assertEqual(cache.stats()["entries"], 1)
+
+        analyzer.vader.lexicon["fine"] = -2.0
+        analyzer.attach_persistent_cache(cache)
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertLess(analyzer.analyze("The product is fine.")["overall"]["compound"], 0)
+
+    def test_format_change_invalidates(self):
+        cache = PersistentAnalysisCache(self.path)
+        analyzer = SentimentAnalyzer(sentence_cache=False, persistent_cache=cache)
+        analyzer.analyze("The product is fine.")
+        with mock.patch.object(persistent_cache, "CACHE_FORMAT", persistent_cache.CACHE_FORMAT + 1):
+            analyzer.attach_persistent_cache(cache)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_size_based_eviction(self):
+        cache = PersistentAnalysisCache(self.path, max_bytes=2000)
+        cache.set_version("v1")
+        for i in range(50):
+            cache.put("kind", f"text {i}", {"payload": "x" * 100})
+        cache.evict()
+        self.assertLessEqual(cache.stats()["bytes"], 2000)
+        self.assertIsNotNone(cache.get("kind", "text 49"))
+
+
+if __name__ == '__main__':
+    unittest.main()
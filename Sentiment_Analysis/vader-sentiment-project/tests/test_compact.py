@@ -0,0 +1,41 @@
+import json
+import unittest
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from vader_sentiment import compact, structure
+
+
+class TestCompactResults(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.vader = SentimentIntensityAnalyzer()
+
+    def test_notes_round_trip(self):
+        table, score = structure.score_tokens("I am not very happy!!", self.vader)
+        verbose = table.to_verbose()
+        happy = next(w for w in verbose if w["word"] == "happy")
+        self.assertEqual(happy["notes"], ["lexicon", "booster(very)", "negation", "punct(1.16)"])
+        self.assertAlmostEqual(score, sum(w["adjusted"] for w in verbose))
+
+    def test_dumps_verbose_matches_dict_output(self):
+        sentence = "This is absolutely terrible, I hate it?"
+        expanded = structure.analyze_with_structure(sentence, self.vader)
+        packed = structure.analyze_with_structure(sentence, self.vader, compact=True)
+        self.assertEqual(json.loads(compact.dumps(packed)), json.loads(json.dumps(expanded)))
+        self.assertEqual(compact.to_verbose(packed), expanded)
+
+    def test_compact_wire_is_smaller(self):
+        packed = structure.analyze_with_structure("Great support, really quick and friendly! " * 20, self.vader, compact=True)
+        self.assertLess(len(compact.dumps(packed, wire="compact")), len(compact.dumps(packed)))
+        wire = json.loads(compact.dumps(packed, wire="compact"))["words"]
+        self.assertEqual(len(wire["w"]), len(wire["f"]))
+
+    def test_unknown_wire_format(self):
+        with self.assertRaises(ValueError):
+            compact.dumps({}, wire="xml")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+from vader_sentiment import dedup
+from vader_sentiment.dedup import NearDuplicateIndex
+
+from support_server import create_app
+
+OUTAGE = "The system is down!! I cannot log in to my account since 9am, please help."
+
+
+class TestNearDuplicateIndex(unittest.TestCase):
+
+    def test_finds_near_duplicates_only(self):
+        index = NearDuplicateIndex(threshold=0.8)
+        index.add(1, OUTAGE)
+        index.add(2, "Love the new dashboard, great work on the charts")
+        match = index.find("the system is DOWN! I cannot log in to my account since 9am please help!!!")
+        self.assertEqual(match[:2], (1, 1))
+        self.assertIsNone(index.find("How do I change the billing address on my invoice?"))
+
+    def test_signatures_match_without_numpy(self):
+        hasher = dedup.MinHasher()
+        with_numpy = hasher.signature(OUTAGE)
+        saved, dedup.NUMPY_AVAILABLE = dedup.NUMPY_AVAILABLE, False
+        try:
+            self.assertEqual(hasher.signature(OUTAGE), with_numpy)
+        finally:
+            dedup.NUMPY_AVAILABLE = saved
+        self.assertEqual(dedup.signature_from_bytes(dedup.signature_to_bytes(with_numpy)), with_numpy)
+
+    def test_window_evicts_oldest_and_remove(self):
+        index = NearDuplicateIndex(max_entries=2)
+        index.add(1, OUTAGE)
+        index.add(2, "Refund still missing after two weeks")
+        index.add(3, "Password reset email never arrives")
+        self.assertEqual(len(index), 2)
+        self.assertIsNone(index.find(OUTAGE))
+        index.remove(2)
+        self.assertIsNone(index.find("Refund still missing after two weeks"))
+
+
+class TestDuplicateIngestion(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config = {"DB_PATH": os.path.join(self.tmpdir.name, "tickets.db"), "WARM_UP": False}
+        self.client = create_app(self.config).test_client()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def submit(self, client, message, ticket_type="support"):
+        resp = client.post("/api/tickets", json={"message": message, "ticket_type": ticket_type})
+        self.assertEqual(resp.status_code, 201)
+        return resp.get_json()
+
+    def test_duplicates_reuse_analysis_and_cluster(self):
+        first = self.submit(self.client, OUTAGE)
+        second = self.submit(self.client, OUTAGE.upper() + "!!")
+        other = self.submit(self.client, "Could you add dark mode to the mobile app?", "suggestion")
+        self.assertIsNone(first["duplicate_of"])
+        self.assertEqual(second["duplicate_of"], first["ticket_id"])
+        self.assertEqual(second["priority_data"], first["priority_data"])
+        self.assertIsNone(other["duplicate_of"])
+
+        clusters = self.client.get("/api/tickets/clusters").get_json()["clusters"]
+        self.assertEqual([c["id"] for c in clusters], [first["ticket_id"]])
+        self.assertEqual(clusters[0]["duplicate_ids"], [second["ticket_id"]])
+
+        # A restarted server rebuilds the index from stored signatures.
+        restarted = create_app(self.config).test_client()
+        third = self.submit(restarted, OUTAGE + " Thanks")
+        self.assertEqual(third["duplicate_of"], first["ticket_id"])
+
+    def test_different_ticket_type_is_not_reused(self):
+        self.submit(self.client, OUTAGE)
+        self.assertIsNone(self.submit(self.client, OUTAGE, "suggestion")["duplicate_of"])
+
+    def test_threshold_zero_disables(self):
+        client = create_app(dict(self.config, DEDUP_THRESHOLD=0)).test_client()
+        self.submit(client, OUTAGE)
+        self.assertIsNone(self.submit(client, OUTAGE)["duplicate_of"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from vader_sentiment import export
+from vader_sentiment.ticket_store import TicketStore
+
+from support_server import create_app
+
+
+class TestExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "tickets.db")
+        self.store = TicketStore(db_path=self.db_path)
+        for i in range(7):
+            self.store.add_ticket(f'Ticket "{i}", with, commas\nand a newline', f"Cust{i}",
+                                  {'priority': 'high' if i % 2 else 'normal', 'flagged_keywords': ['down']})
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_iter_tickets_pages_in_id_order(self):
+        ids = [t['id'] for t in self.store.iter_tickets(batch_size=3)]
+        self.assertEqual(ids, list(range(1, 8)))
+        self.assertEqual([t['id'] for t in self.store.iter_tickets(priority='high', batch_size=2)], [2, 4, 6])
+
+    def test_csv_round_trips_and_streams_in_chunks(self):
+        chunks = list(export.export_tickets(self.store, 'csv', batch_size=3))
+        self.assertGreaterEqual(len(chunks), 3)
+        rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[0]['message'], 'Ticket "0", with, commas\nand a newline')
+        self.assertEqual(json.loads(rows[0]['flagged_keywords']), ['down'])
+
+    def test_jsonl_with_filter(self):
+        lines = "".join(export.export_tickets(self.store, 'jsonl', priority='normal', batch_size=2)).splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([r['id'] for r in records], [1, 3, 5, 7])
+        self.assertEqual(list(records[0]), list(export.EXPORT_COLUMNS))
+
+    def test_endpoint_streams(self):
+        client = create_app({"DB_PATH": self.db_path, "WARM_UP": False}).test_client()
+        resp = client.get("/api/tickets/export?format=jsonl&priority=high")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.is_streamed)
+        self.assertEqual(resp.mimetype, "application/x-ndjson")
+        self.assertEqual(len(resp.get_data(as_text=True).splitlines()), 3)
+        self.assertEqual(client.get("/api/tickets/export?format=xml").status_code, 400)
+
+    def test_asgi_endpoint_streams(self):
+        from support_asgi import create_app as create_asgi_app
+        app = create_asgi_app({"DB_PATH": self.db_path, "WARM_UP": False})
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(app({"type": "http", "method": "GET", "path": "/api/tickets/export",
+                         "query_string": b"format=csv"}, receive, send))
+        self.assertEqual(sent[0]["status"], 200)
+        body = b"".join(m.get("body", b"") for m in sent[1:]).decode()
+        self.assertEqual(len(list(csv.DictReader(io.StringIO(body)))), 7)
+        self.assertFalse(sent[-1].get("more_body", False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+
+from vader_sentiment import features
+from vader_sentiment.analyzer import SentimentAnalyzer
+from vader_sentiment.features import FEATURE_COLUMNS, NpyWriter, build_feature_matrix, extract_features
+from vader_sentiment.ticket_store import TicketStore
+
+MESSAGES = [
+    "Great support, thank you so much!",
+    "The app is NOT working and I am furious. Fix it ASAP!!",
+    "Someone hacked my account?? I need help immediately.",
+    "",
+]
+
+
+class TestFeatures(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = SentimentAnalyzer(sentence_cache=False)
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_row_matches_analysis(self):
+        row = dict(zip(FEATURE_COLUMNS, extract_features(MESSAGES[1], self.analyzer)))
+        overall = self.analyzer.vader.polarity_scores(MESSAGES[1])
+        self.assertEqual(row["vader_compound"], overall["compound"])
+        self.assertEqual((row["sentences"], row["exclamations"], row["questions"]), (2, 2, 0))
+        self.assertEqual(row["negations"], 1)
+        negated = dict(zip(FEATURE_COLUMNS, extract_features("This is not good.", self.analyzer)))
+        self.assertEqual((negated["negations"], negated["negated_words"]), (1, 1))
+        self.assertGreaterEqual(row["allcaps_words"], 2)
+        self.assertEqual((row["kw_anger"], row["kw_severe"]), (1, 0))
+        self.assertGreaterEqual(row["kw_urgent"], 2)
+        self.assertEqual(len(extract_features("", self.analyzer)), len(FEATURE_COLUMNS))
+
+    def test_npy_writer_header_and_flushes(self):
+        path = os.path.join(self.dir, "x.npy")
+        with NpyWriter(path, "f", 3, flush_every=2) as w:
+            for i in range(5):
+                w.append([i, i + 0.5, -i])
+        descr, shape, offset = features.read_npy_header(path)
+        self.assertEqual((descr[1:], shape, offset), ("f4", (5, 3), features._NPY_HEADER_LEN))
+        self.assertEqual(os.path.getsize(path), offset + 5 * 3 * 4)
+        with self.assertRaises(ValueError):
+            NpyWriter(os.path.join(self.dir, "y.npy"), "f", 3).append([1.0])
+
+    @unittest.skipUnless(features.NUMPY_AVAILABLE, "numpy not installed")
+    def test_build_and_load_memory_mapped(self):
+        out = os.path.join(self.dir, "out")
+        schema = build_feature_matrix(enumerate(MESSAGES, start=10), out, analyzer=self.analyzer, flush_every=3)
+        matrix, ids, loaded = features.load_feature_matrix(out)
+        self.assertEqual(loaded, schema)
+        self.assertEqual(matrix.shape, (len(MESSAGES), len(FEATURE_COLUMNS)))
+        self.assertEqual(str(matrix.dtype), "float32")
+        self.assertEqual(ids.tolist(), [10, 11, 12, 13])
+        self.assertEqual(type(matrix).__name__, "memmap")
+        expected = extract_features(MESSAGES[2], self.analyzer)
+        self.assertEqual(matrix[2].tolist(), [float(features.np.float32(v)) for v in expected])
+        self.assertFalse([n for n in os.listdir(out) if n.endswith(".tmp")])
+
+    @unittest.skipUnless(features.NUMPY_AVAILABLE, "numpy not installed")
+    def test_cli_from_ticket_store(self):
+        db = os.path.join(self.dir, "tickets.db")
+        store = TicketStore(db_path=db)
+        for i, message in enumerate(MESSAGES[:3]):
+            store.add_ticket(message, customer_name=f"customer{i}")
+        out = os.path.join(self.dir, "cli")
+        features.main(["--db", db, "--out", out])
+        matrix, ids, schema = features.load_feature_matrix(out)
+        self.assertEqual(schema["rows"], 3)
+        self.assertEqual(ids.tolist(), [t["id"] for t in store.iter_tickets()])
+        with open(os.path.join(out, "schema.json"), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["columns"], list(FEATURE_COLUMNS))
+
+        store.update_ticket_status(1, "resolved")
+        store.archive_resolved(0)
+        features.main(["--db", db, "--out", out])
+        self.assertEqual(features.load_feature_matrix(out)[1].tolist(), [2, 3])
+        features.main(["--db", db, "--out", out, "--include-archived"])
+        self.assertEqual(features.load_feature_matrix(out)[1].tolist(), [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from vader_sentiment.group_commit import GroupCommitWriter, WriterClosed
+from vader_sentiment.ticket_store import TicketStore
+
+from support_server import create_app
+
+PRIORITY = {"priority": "high", "priority_score": 0.6, "compound": -0.4, "emotion": "anger"}
+
+
+class TestGroupCommitWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmpdir.name, "tickets.db")
+        self.store = TicketStore(self.db)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_concurrent_inserts_share_transactions(self):
+        writer = self.store.start_writer(max_delay=0.02)
+        ids = []
+        lock = threading.Lock()
+
+        def work(n):
+            for i in range(10):
+                ticket_id = self.store.add_ticket(f"ticket {n}-{i}", f"customer{n}", PRIORITY)
+                with lock:
+                    ids.append(ticket_id)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(set(ids)), 80)
+        stats = writer.stats()
+        self.assertEqual(stats["writes"], 80)
+        self.assertLess(stats["batches"], 80)
+        self.assertEqual(self.store.get_ticket(ids[-1])["priority"], "high")
+        self.assertEqual(self.store.get_customer_profile("customer3")["ticket_count"], 10)
+
+    def test_future_carries_the_ticket_id(self):
+        self.store.start_writer()
+        future = self.store.add_ticket_async("Checkout is broken", "Ana", PRIORITY)
+        ticket_id = future.result(5)
+        self.assertEqual(self.store.get_ticket(ticket_id)["message"], "Checkout is broken")
+
+    def test_failing_write_does_not_roll_back_the_batch(self):
+        with sqlite3.connect(self.db) as conn:
+            conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)")
+        writer = GroupCommitWriter(lambda: sqlite3.connect(self.db), max_delay=0.05)
+
+        def insert(c, body):
+            c.execute("INSERT INTO notes (body) VALUES (?)", (body,))
+            return c.lastrowid
+
+        def fail(c):
+            insert(c, "rolled back")
+            raise RuntimeError("boom")
+
+        futures = [writer.submit(insert, "first"), writer.submit(fail), writer.submit(insert, "second")]
+        writer.close()
+        self.assertIsInstance(futures[1].exception(), RuntimeError)
+        with sqlite3.connect(self.db) as conn:
+            rows = conn.execute("SELECT id, body FROM notes ORDER BY id").fetchall()
+        self.assertEqual(rows, [(futures[0].result(), "first"), (futures[2].result(), "second")])
+        self.assertEqual(writer.stats()["failed"], 1)
+
+    def test_close_commits_pending_writes_then_refuses_more(self):
+        writer = self.store.start_writer(max_delay=0.5)
+        futures = [self.store.add_ticket_async(f"ticket {i}", "Bo", PRIORITY) for i in range(5)]
+        self.store.close()
+        self.assertEqual(sorted(f.result(0) for f in futures), [1, 2, 3, 4, 5])
+        with self.assertRaises(WriterClosed):
+            writer.submit(lambda c: None)
+
+    def test_status_updates_and_deletes_go_through_the_writer(self):
+        writer = self.store.start_writer()
+        ticket_id = self.store.add_ticket("Refund please", "Cy", PRIORITY)
+        self.store.update_ticket_status(ticket_id, "resolved")
+        self.assertEqual(self.store.get_ticket(ticket_id)["status"], "resolved")
+        self.store.delete_ticket(ticket_id)
+        self.assertIsNone(self.store.get_ticket(ticket_id))
+        self.assertEqual(writer.stats()["writes"], 3)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs os.fork")
+    def test_forked_child_starts_its_own_writer(self):
+        writer = self.store.start_writer()
+        self.store.add_ticket("Before fork", "Di", PRIORITY)
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                ticket_id = self.store.add_ticket_async("From the child", "Di", PRIORITY).result(5)
+                self.store.update_priorities([(ticket_id, PRIORITY)], scoring_version="v2")
+                code = 0 if self.store.get_ticket(ticket_id)["scoring_version"] == "v2" else 1
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertEqual(self.store.add_ticket("After fork", "Di", PRIORITY), 3)
+        self.assertEqual(writer.stats()["writes"], 2)
+
+    def test_rescore_writes_go_through_the_writer(self):
+        writer = self.store.start_writer()
+        ticket_id = self.store.add_ticket("Refund please", "Cy", PRIORITY)
+        self.store.update_priorities([(ticket_id, PRIORITY)], checkpoint=("rescore", ticket_id))
+        self.store.clear_checkpoint("rescore")
+        self.assertEqual(self.store.get_checkpoint("rescore"), 0)
+        self.assertEqual(writer.stats()["writes"], 3)
+
+    def test_rejects_unknown_synchronous_mode(self):
+        with self.assertRaises(ValueError):
+            self.store.start_writer(synchronous="SOMETIMES")
+        self.assertIsNone(self.store.writer)
+
+    def test_server_reports_writer_stats(self):
+        app = create_app({"DB_PATH": self.db, "WARM_UP": False, "GROUP_COMMIT": True,
+                          "SQLITE_SYNCHRONOUS": "normal"})
+        client = app.test_client()
+        created = client.post("/api/tickets", json={"message": "The app crashes on login"})
+        self.assertEqual(created.status_code, 201)
+        writer = client.get("/api/stats").get_json()["writer"]
+        self.assertEqual((writer["writes"], writer["synchronous"]), (1, "NORMAL"))
+        app.extensions["support"].store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import json
+import os
+import tempfile
+import unittest
+
+from vader_sentiment.analyzer import SentimentAnalyzer
+from vader_sentiment.cache import SentenceCache
+from vader_sentiment.lexicon import LayeredLexicon, LexiconRegistry, parse_overlay
+from vader_sentiment.memory_store import MemoryTicketStore
+from vader_sentiment.rescore import rescore_tickets
+from vader_sentiment.ticket_prioritizer import TicketPrioritizer
+from vader_sentiment.ticket_store import TicketStore
+
+from support_server import create_app
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class LexiconTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, data, mtime=None):
+        path = os.path.join(self.dir, name + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(data if isinstance(data, str) else json.dumps(data))
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+
+class TestLayeredLexicon(unittest.TestCase):
+
+    def test_overlay_adds_overrides_and_removes(self):
+        base = {"good": 1.9, "bad": -2.5, "sick": -2.0}
+        lex = LayeredLexicon(base, parse_overlay({"Outage": -3, "bad": -1.0, "sick": None}))
+        self.assertEqual(lex["outage"], -3.0)
+        self.assertEqual(lex["bad"], -1.0)
+        self.assertEqual(lex["good"], 1.9)
+        self.assertNotIn("sick", lex)
+        with self.assertRaises(KeyError):
+            lex["sick"]
+        self.assertEqual(len(lex), 3)
+        self.assertEqual(sorted(lex), ["bad", "good", "outage"])
+        self.assertEqual(base, {"good": 1.9, "bad": -2.5, "sick": -2.0})
+
+    def test_invalid_overlays(self):
+        for data in ([1], {"x": "bad"}, {"x": 9}, {"x": True}, {" ": 1}):
+            with self.assertRaises(ValueError):
+                parse_overlay(data)
+
+
+class TestLexiconRegistry(LexiconTestCase):
+
+    def test_hot_reload_on_change_add_and_delete(self):
+        self.write("billing", {"chargeback": -2.5}, mtime=1000)
+        clock = FakeClock()
+        registry = LexiconRegistry(self.dir, reload_interval=5, clock=clock)
+        first = registry.get("billing")
+        self.assertEqual(registry.names(), ["billing"])
+
+        self.write("billing", {"chargeback": -3.0}, mtime=2000)
+        self.write("games", {"laggy": -1.8})
+        self.assertIs(registry.get("billing"), first)  # not rescanned yet
+        clock.now = 6
+        second = registry.get("billing")
+        self.assertIsNot(second, first)
+        self.assertNotEqual(second.version, first.version)
+        self.assertEqual(first.overlay["chargeback"], -2.5)  # old view unchanged
+        self.assertEqual(registry.names(), ["billing", "games"])
+
+        os.remove(os.path.join(self.dir, "games.json"))
+        clock.now = 12
+        with self.assertRaises(ValueError):
+            registry.get("games")
+
+    def test_broken_file_keeps_previous_version(self):
+        self.write("billing", {"chargeback": -2.5}, mtime=1000)
+        registry = LexiconRegistry(self.dir, reload_interval=0)
+        version = registry.get("billing").version
+        self.write("billing", "{not json", mtime=2000)
+        with self.assertLogs("vader_sentiment.lexicon", "WARNING"):
+            self.assertEqual(registry.get("billing").version, version)
+        self.assertIn("billing", registry.status()["errors"])
+
+
+class TestAnalyzerProfiles(LexiconTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write("ops", {"outage": -3.5, "great": None})
+        self.analyzer = SentimentAnalyzer(sentence_cache=SentenceCache(),
+                                          lexicons=LexiconRegistry(self.dir, reload_interval=0))
+
+    def test_profile_changes_scores_without_touching_the_base(self):
+        text = "Another outage today."
+        base = self.analyzer.analyze(text)["overall"]["compound"]
+        ops = self.analyzer.analyze(text, profile="ops")["overall"]["compound"]
+        self.assertEqual(base, 0.0)
+        self.assertLess(ops, -0.5)
+        self.assertNotIn("outage", self.analyzer.vader.lexicon)
+        # Cached base results are not served for the profile, or the other way round.
+        self.assertEqual(self.analyzer.analyze(text)["overall"]["compound"], base)
+        self.assertGreater(self.analyzer.analyze("great", profile=None)["overall"]["compound"], 0)
+        self.assertEqual(self.analyzer.analyze("great", profile="ops")["overall"]["compound"], 0)
+
+    def test_profile_vader_is_rebuilt_after_reload(self):
+        before = self.analyzer.analyze("outage", profile="ops")["overall"]["compound"]
+        self.write("ops", {"outage": 2.0}, mtime=os.path.getmtime(os.path.join(self.dir, "ops.json")) + 10)
+        after = self.analyzer.analyze("outage", profile="ops")["overall"]["compound"]
+        self.assertLess(before, 0)
+        self.assertGreater(after, 0)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            self.analyzer.analyze("hello", profile="nope")
+        with self.assertRaises(ValueError):
+            SentimentAnalyzer(sentence_cache=False).check_profile("ops")
+
+    def test_rescore_uses_the_ticket_profile(self):
+        store = MemoryTicketStore()
+        prioritizer = TicketPrioritizer(self.analyzer)
+        store.add_ticket("Total outage, nothing works", "A", lexicon_profile="ops")
+        store.add_ticket("Total outage, nothing works", "B", lexicon_profile="removed")
+        rescore_tickets(store, prioritizer=prioritizer)
+        with_profile, fallback = store.get_ticket(1), store.get_ticket(2)
+        self.assertLess(with_profile['compound'], fallback['compound'])
+
+    def test_overlay_edits_make_profile_tickets_stale(self):
+        prioritizer = TicketPrioritizer(self.analyzer)
+        base = prioritizer.scoring_version()
+        self.assertNotEqual(prioritizer.scoring_version("ops"), base)
+        for store in (MemoryTicketStore(), TicketStore(db_path=os.path.join(self.dir, "t.db"))):
+            store.add_ticket("Total outage", "A", scoring_version=prioritizer.scoring_version("ops"),
+                             lexicon_profile="ops")
+            store.add_ticket("Total outage", "B", scoring_version=base)
+            store.add_ticket("Total outage", "C", scoring_version=base, lexicon_profile="removed")
+            self.assertEqual(rescore_tickets(store, prioritizer=prioritizer, only_stale=True)['updated'], 0)
+
+            self.write("ops", {"outage": -1.0}, mtime=os.path.getmtime(os.path.join(self.dir, "ops.json")) + 10)
+            summary = rescore_tickets(store, prioritizer=prioritizer, only_stale=True)
+            self.assertEqual(summary['updated'], 1)
+            self.assertEqual(store.get_ticket(1)['scoring_version'], prioritizer.scoring_version("ops"))
+            self.assertEqual(rescore_tickets(store, prioritizer=prioritizer, only_stale=True)['updated'], 0)
+            self.write("ops", {"outage": -3.5, "great": None},
+                       mtime=os.path.getmtime(os.path.join(self.dir, "ops.json")) + 10)
+
+
+class TestServerProfiles(LexiconTestCase):
+
+    def test_request_selects_profile(self):
+        self.write("ops", {"outage": -3.5})
+        client = create_app({"STORAGE": "memory", "WARM_UP": False, "LEXICON_DIR": self.dir}).test_client()
+        base = client.post("/api/analyze", json={"text": "Another outage"}).get_json()
+        ops = client.post("/api/analyze", json={"text": "Another outage", "lexicon_profile": "ops"}).get_json()
+        self.assertLess(ops["priority_data"]["compound"], base["priority_data"]["compound"])
+        resp = client.post("/api/analyze", json={"text": "Another outage", "lexicon_profile": "nope"})
+        self.assertEqual(resp.status_code, 400)
+
+        resp = client.post("/api/tickets", json={"message": "Another outage", "lexicon_profile": "ops"})
+        self.assertEqual(resp.get_json()["ticket"]["lexicon_profile"], "ops")
+        # A near-duplicate scored with another profile is not folded into it.
+        resp = client.post("/api/tickets", json={"message": "Another outage"})
+        self.assertIsNone(resp.get_json()["duplicate_of"])
+        self.assertIn("ops", client.get("/api/stats").get_json()["lexicons"]["profiles"])
+
+    def test_duplicates_need_the_same_overlay_version(self):
+        self.write("ops", {"outage": -3.5})
+        client = create_app({"STORAGE": "memory", "WARM_UP": False, "LEXICON_DIR": self.dir,
+                             "LEXICON_RELOAD_SECONDS": 0}).test_client()
+        ticket = {"message": "Another outage in the billing service", "lexicon_profile": "ops"}
+        first = client.post("/api/tickets", json=ticket).get_json()
+        self.assertEqual(client.post("/api/tickets", json=ticket).get_json()["duplicate_of"], first["ticket_id"])
+        self.write("ops", {"outage": 1.0}, mtime=os.path.getmtime(os.path.join(self.dir, "ops.json")) + 10)
+        edited = client.post("/api/tickets", json=ticket).get_json()
+        self.assertIsNone(edited["duplicate_of"])
+        self.assertGreater(edited["priority_data"]["compound"], first["priority_data"]["compound"])
+
+
+if __name__ == '__main__':
+    unittest.main()
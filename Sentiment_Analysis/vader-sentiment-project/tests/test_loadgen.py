@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import loadgen
+
+
+class FakeTransport:
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def request(self, method, path, body):
+        with self._lock:
+            self.calls.append((method, path, body))
+        return 500 if path == "/api/stats" else 200
+
+
+class TestLoadgen(unittest.TestCase):
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(loadgen.percentile(values, 50), 50)
+        self.assertEqual(loadgen.percentile(values, 99), 99)
+        self.assertEqual(loadgen.percentile([7], 99), 7)
+        self.assertIsNone(loadgen.percentile([], 50))
+
+    def test_parse_mix(self):
+        self.assertEqual(loadgen.parse_mix("submit=3, stats"), {"submit": 3.0, "stats": 1.0})
+        with self.assertRaises(ValueError):
+            loadgen.parse_mix("delete=1")
+
+    def test_closed_loop_reports_per_route(self):
+        transport = FakeTransport()
+        overall, routes, _ = loadgen.run_load(
+            transport, {"submit": 1, "stats": 1}, loadgen.synthetic_corpus(10),
+            concurrency=4, duration=None, max_requests=200)
+        self.assertEqual(len(transport.calls), 200)
+        self.assertEqual(overall["requests"], 200)
+        self.assertEqual(routes["stats"]["error_rate"], 1.0)
+        self.assertEqual(routes["submit"]["errors"], 0)
+        self.assertEqual(set(routes["submit"]["latency_ms"]), {"mean", "p50", "p90", "p95", "p99", "max"})
+        body = json.loads(next(b for m, p, b in transport.calls if p == "/api/tickets"))
+        self.assertEqual(body["customer_name"], "loadgen")
+
+    def test_open_loop_paces_requests(self):
+        transport = FakeTransport()
+        overall, _, elapsed = loadgen.run_load(
+            transport, {"list": 1}, ["x"], rate=100, duration=None, max_requests=20)
+        self.assertEqual(overall["requests"], 20)
+        self.assertGreaterEqual(elapsed, 0.18)
+
+    def test_recorded_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "corpus.jsonl")
+            with open(path, "w") as f:
+                f.write('{"message": "Refund please"}\nSystem is down\n\n')
+            self.assertEqual(loadgen.load_corpus(path), ["Refund please", "System is down"])
+
+    def test_in_process_cli(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            out = os.path.join(tmp, "report.json")
+            loadgen.main(["--in-process", "--storage", "memory", "--mix", "stats=1,list=1",
+                          "--requests", "20", "--concurrency", "2", "--output", out])
+            with open(out) as f:
+                report = json.load(f)
+        self.assertEqual(report["overall"]["requests"], 20)
+        self.assertEqual(report["overall"]["errors"], 0)
+        self.assertEqual(report["mode"], "closed-loop")
+
+
+if __name__ == '__main__':
+    unittest.main()
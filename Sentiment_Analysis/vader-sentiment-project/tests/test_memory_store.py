@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+
+from vader_sentiment.analyzer import SentimentAnalyzer
+from vader_sentiment.memory_store import MemoryTicketStore
+from vader_sentiment.rescore import rescore_tickets
+from vader_sentiment.storage import TicketStorage, create_store
+from vader_sentiment.ticket_prioritizer import TicketPrioritizer
+from vader_sentiment.ticket_store import TicketStore
+
+from support_server import create_app
+
+TICKETS = [
+    ("Refund still missing", "A", {'priority': 'high', 'priority_score': 0.5, 'compound': -0.4,
+                                   'emotion': 'anger', 'flagged_keywords': ['refund'], 'urgency_flagged': True}),
+    ("Password reset email never arrives", "B", {'priority': 'normal', 'priority_score': 0.1}),
+    ("System is DOWN, refund me", "C", {'priority': 'critical', 'priority_score': 0.9, 'compound': -0.8}),
+    ("Love the new dashboard", "D", None),
+]
+
+VOLATILE = ('created_at', 'updated_at', 'resolved_at', 'aging_key')
+
+
+def strip(tickets):
+    return [{k: v for k, v in t.items() if k not in VOLATILE} for t in tickets]
+
+
+class TestEngineParity(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.engines = [TicketStore(db_path=os.path.join(self.tmpdir.name, "tickets.db")), MemoryTicketStore()]
+        for store in self.engines:
+            for message, customer, priority_data in TICKETS:
+                store.add_ticket(message, customer, priority_data)
+            store.add_ticket("System is down, refund me!", "E", {'priority': 'critical', 'priority_score': 0.9},
+                             duplicate_of=3)
+            store.update_ticket_status(2, 'resolved')
+            store.delete_ticket(4)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def assertSameOnBoth(self, call):
+        sqlite_result, memory_result = (call(store) for store in self.engines)
+        self.assertEqual(sqlite_result, memory_result)
+        return memory_result
+
+    def test_both_engines_implement_the_interface(self):
+        for store in self.engines:
+            self.assertIsInstance(store, TicketStorage)
+
+    def test_reads_match(self):
+        self.assertSameOnBoth(lambda s: strip([s.get_ticket(1)]))
+        self.assertSameOnBoth(lambda s: s.get_ticket(4))
+        self.assertSameOnBoth(lambda s: strip(s.get_all_tickets(order_by='priority_score DESC, id ASC')))
+        self.assertSameOnBoth(lambda s: strip(s.get_all_tickets(status='new', priority='critical',
+                                                                  order_by='id')))
+        self.assertSameOnBoth(lambda s: strip(s.iter_tickets(status='new', batch_size=2)))
+        self.assertSameOnBoth(lambda s: s.get_stats())
+        self.assertSameOnBoth(lambda s: sorted(s.get_priority_scores('new')))
+        clusters = self.assertSameOnBoth(lambda s: strip(s.get_duplicate_clusters()))
+        self.assertEqual(clusters[0]['duplicate_ids'], [5])
+        self.assertSameOnBoth(lambda s: sorted(t["id"] for t in s.search("refund")))
+        profile = self.assertSameOnBoth(lambda s: {k: v for k, v in s.get_customer_profile("A").items()
+                                                   if not k.endswith('_at')})
+        self.assertEqual(profile['emotion_counts'], {'anger': 1})
+
+    def test_trends_match(self):
+        trends = self.assertSameOnBoth(lambda s: s.get_trends(bucket='hour'))
+        self.assertEqual(trends[0]['tickets'], 4)
+        self.assertEqual(trends[0]['status'], {'new': 3, 'resolved': 1})
+
+    def test_rescore_on_memory_engine(self):
+        store = self.engines[1]
+        prioritizer = TicketPrioritizer(SentimentAnalyzer())
+        summary = rescore_tickets(store, prioritizer, chunk_size=2)
+        self.assertEqual(summary['updated'], 4)
+        self.assertEqual(rescore_tickets(store, prioritizer, only_stale=True)['updated'], 0)
+
+    def test_ticket_chunks_match(self):
+        def chunks(store, **kwargs):
+            out = []
+            for rows in store.iter_ticket_chunks(**kwargs):
+                out.append([row[0] for row in rows])
+                if len(out) == 1:
+                    store.add_ticket("Arrived mid-run", "F", None)
+            return out
+
+        self.assertEqual(self.assertSameOnBoth(lambda s: chunks(s, chunk_size=2)), [[1, 2], [3, 5], [6]])
+        self.assertSameOnBoth(lambda s: s.update_priorities([(1, {}), (6, {})], scoring_version="v2"))
+        self.assertEqual(self.assertSameOnBoth(lambda s: chunks(s, chunk_size=2, after_id=1, stale_version="v2")),
+                         [[2, 3], [5, 7]])
+
+    def test_unsupported_order_by(self):
+        with self.assertRaises(ValueError):
+            self.engines[1].get_all_tickets(order_by='random()')
+
+
+class TestStorageSelection(unittest.TestCase):
+
+    def test_create_store(self):
+        self.assertIsInstance(create_store({"STORAGE": "memory"}), MemoryTicketStore)
+        with self.assertRaises(ValueError):
+            create_store({"STORAGE": "redis"})
+
+    def test_server_runs_on_memory_engine(self):
+        app = create_app({"STORAGE": "memory", "WARM_UP": False})
+        self.assertIsInstance(app.extensions["support"].store, MemoryTicketStore)
+        client = app.test_client()
+        resp = client.post("/api/tickets", json={"message": "System is DOWN! HELP!!!"})
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(client.get("/api/stats").get_json()["stats"]["total_tickets"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from vader_sentiment.memory_store import MemoryTicketStore
+from vader_sentiment.rescore import rescore_tickets
+from vader_sentiment.storage import PROFILE_EWMA_ALPHA
+from vader_sentiment.ticket_prioritizer import TicketPrioritizer
+from vader_sentiment.ticket_store import TicketStore
+
+from support_server import create_app
+
+
+def angry(compound=-0.6, priority='high'):
+    return {'priority': priority, 'priority_score': 0.5, 'compound': compound, 'emotion': 'anger'}
+
+
+class TestCustomerProfiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "tickets.db")
+        self.store = TicketStore(db_path=self.db_path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_incremental_ewma_and_counts(self):
+        for store in (self.store, MemoryTicketStore()):
+            store.add_ticket("first", "Acme", angry(-0.8, 'critical'))
+            store.add_ticket("second", " Acme ", {'priority': 'normal', 'compound': 0.5, 'emotion': 'joy'})
+            profile = store.get_customer_profile("Acme")
+            self.assertEqual(profile['customer_name'], "Acme")
+            self.assertEqual(profile['ticket_count'], 2)
+            self.assertAlmostEqual(profile['compound_ewma'], -0.8 + PROFILE_EWMA_ALPHA * (0.5 + 0.8))
+            self.assertEqual(profile['emotion_counts'], {'anger': 1, 'joy': 1})
+            self.assertIsNotNone(profile['last_critical_at'])
+            self.assertLessEqual(profile['first_ticket_at'], profile['last_ticket_at'])
+
+    def test_anonymous_tickets_have_no_profile(self):
+        self.store.add_ticket("hello", "Anonymous", angry())
+        self.store.add_ticket("hello", None, angry())
+        self.assertIsNone(self.store.get_customer_profile("Anonymous"))
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM customer_profiles').fetchone()[0], 0)
+        conn.close()
+
+    def test_existing_database_is_backfilled(self):
+        self.store.add_ticket("one", "Acme", angry(-0.4))
+        self.store.add_ticket("two", "Acme", angry(-0.2))
+        expected = self.store.get_customer_profile("Acme")
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('DROP TABLE customer_profiles')
+        conn.commit()
+        conn.close()
+        self.assertEqual(TicketStore(db_path=self.db_path).get_customer_profile("Acme"), expected)
+
+
+class TestProfileBoost(unittest.TestCase):
+
+    def setUp(self):
+        self.prioritizer = TicketPrioritizer(analyzer=None)
+
+    def profile(self, count=3, ewma=-0.5, anger=0, last_critical_at=None):
+        return {'ticket_count': count, 'compound_ewma': ewma, 'emotion_counts': {'anger': anger},
+                'last_critical_at': last_critical_at}
+
+    def data(self, score=0.3):
+        return {'priority': 'normal', 'priority_score': score, 'reason': 'Neutral sentiment'}
+
+    def test_boosts_frustrated_repeat_customers(self):
+        data = self.prioritizer.adjust_for_customer_profile(self.data(), self.profile())
+        self.assertAlmostEqual(data['priority_score'], 0.3 + TicketPrioritizer.PROFILE_BOOST)
+        self.assertEqual(data['priority'], 'high')
+        self.assertIn('Repeat frustrated customer', data['reason'])
+
+    def test_anger_share_and_recent_critical(self):
+        now = datetime(2024, 5, 10)
+        profile = self.profile(count=4, ewma=0.2, anger=2, last_critical_at=(now - timedelta(days=1)).isoformat())
+        data = self.prioritizer.adjust_for_customer_profile(self.data(), profile, now=now)
+        boost = TicketPrioritizer.PROFILE_BOOST + TicketPrioritizer.RECENT_CRITICAL_BOOST
+        self.assertAlmostEqual(data['priority_score'], 0.3 + boost)
+
+    def test_boost_is_recorded_and_removable(self):
+        data = self.prioritizer.adjust_for_customer_profile(self.data(), self.profile())
+        self.assertEqual(data['profile_boost'], TicketPrioritizer.PROFILE_BOOST)
+        data = self.prioritizer.remove_profile_boost(data)
+        self.assertAlmostEqual(data.pop('priority_score'), 0.3)
+        self.assertEqual(data, {'priority': 'normal', 'reason': 'Neutral sentiment'})
+
+    def test_capped_score_records_the_full_boost(self):
+        data = self.prioritizer.adjust_for_customer_profile(self.data(score=0.95), self.profile())
+        self.assertEqual((data['priority_score'], data['profile_boost']), (1.0, TicketPrioritizer.PROFILE_BOOST))
+        self.assertAlmostEqual(self.prioritizer.remove_profile_boost(data)['priority_score'],
+                               1.0 - TicketPrioritizer.PROFILE_BOOST)
+        self.assertEqual(data['priority'], 'critical')
+
+    def test_no_boost_for_new_or_content_customers(self):
+        for profile in (None, self.profile(count=1), self.profile(ewma=0.4, anger=1)):
+            self.assertEqual(self.prioritizer.adjust_for_customer_profile(self.data(), profile), self.data())
+
+
+class TestServerProfiles(unittest.TestCase):
+
+    def test_repeat_angry_customer_is_escalated(self):
+        client = create_app({"STORAGE": "memory", "WARM_UP": False, "DEDUP_THRESHOLD": 0}).test_client()
+        messages = ["I am furious, the export is broken again",
+                    "Still furious, nothing works and billing is wrong",
+                    "The invoice page shows an error"]
+        for message in messages:
+            resp = client.post("/api/tickets", json={"message": message, "customer_name": "Acme"})
+            self.assertEqual(resp.status_code, 201)
+        last = resp.get_json()['priority_data']
+        baseline = client.post("/api/tickets", json={"message": messages[-1], "customer_name": "Other"})
+        self.assertGreater(last['priority_score'], baseline.get_json()['priority_data']['priority_score'])
+        self.assertIn('Repeat frustrated customer', last['reason'])
+
+    def test_duplicates_get_their_own_customers_boost(self):
+        app = create_app({"STORAGE": "memory", "WARM_UP": False, "DEDUP_THRESHOLD": 0.8})
+        client = app.test_client()
+        store = app.extensions["support"].store
+        for _ in range(2):
+            store.add_ticket("Earlier complaint", "Acme", angry())
+        message = "The invoice page shows an error every time I open it"
+        boosted = client.post("/api/tickets", json={"message": message, "customer_name": "Acme"}).get_json()
+        copy = client.post("/api/tickets", json={"message": message, "customer_name": "Other"}).get_json()
+        self.assertEqual(copy['duplicate_of'], boosted['ticket_id'])
+        self.assertAlmostEqual(copy['priority_data']['priority_score'],
+                               boosted['priority_data']['priority_score'] - TicketPrioritizer.PROFILE_BOOST)
+        self.assertNotIn('Repeat frustrated customer', copy['priority_data']['reason'])
+        again = client.post("/api/tickets", json={"message": message, "customer_name": "Acme"}).get_json()
+        self.assertEqual(again['priority_data']['priority_score'], boosted['priority_data']['priority_score'])
+
+    def test_rescore_keeps_the_boost(self):
+        app = create_app({"STORAGE": "memory", "WARM_UP": False, "DEDUP_THRESHOLD": 0})
+        services = app.extensions["support"]
+        for _ in range(2):
+            services.store.add_ticket("Earlier complaint", "Acme", angry())
+        ticket = app.test_client().post("/api/tickets", json={"message": "The invoice page shows an error",
+                                                              "customer_name": "Acme"}).get_json()['ticket']
+        rescore_tickets(services.store, prioritizer=services.prioritizer)
+        rescored = services.store.get_ticket(ticket['id'])
+        self.assertEqual((rescored['priority_score'], rescored['priority']),
+                         (ticket['priority_score'], ticket['priority']))
+        self.assertIn('Repeat frustrated customer', rescored['reason'])
+
+    def test_rescore_restores_a_boost_the_cap_cut_short(self):
+        prioritizer = create_app({"STORAGE": "memory", "WARM_UP": False}).extensions["support"].prioritizer
+        store = MemoryTicketStore()
+        message = "The invoice page shows an error"
+        ticket_id = store.add_ticket(message, "Acme", {'priority': 'critical', 'priority_score': 1.0,
+                                                       'reason': 'Angry', 'profile_boost': 0.2})
+        rescore_tickets(store, prioritizer=prioritizer)
+        base = prioritizer.prioritize(message)['priority_score']
+        rescored = store.get_ticket(ticket_id)
+        self.assertEqual(rescored['profile_boost'], 0.2)
+        self.assertAlmostEqual(rescored['priority_score'], min(1.0, base + 0.2))
+
+
+if __name__ == '__main__':
+    unittest.main()
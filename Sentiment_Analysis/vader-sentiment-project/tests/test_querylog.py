@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from vader_sentiment.querylog import QueryLog, plan_problems
+from vader_sentiment.storage import ORDERINGS, create_store
+from vader_sentiment.ticket_store import TicketStore
+
+from support_server import create_app
+
+
+def statement(log, text):
+    return next(s for s in log.stats(top=1000)['statements'] if text in s['sql'])
+
+
+class TestQueryLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmpdir.name, "tickets.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def store(self, **kwargs):
+        store = TicketStore(self.db, query_log=QueryLog(**kwargs))
+        for i, priority in enumerate(("critical", "high", "normal", "normal")):
+            store.add_ticket(f"message {i}", f"customer{i}", {"priority": priority, "priority_score": i / 4})
+        store.query_log.reset()
+        return store
+
+    def test_records_duration_rows_and_plan_of_slow_statements(self):
+        store = self.store(slow_ms=0.0)
+        with self.assertLogs("vader_sentiment.querylog", "WARNING") as logs:
+            self.assertEqual(len(store.get_all_tickets(status="new")), 4)
+        entry = statement(store.query_log, "FROM tickets WHERE 1=1 AND status = ?")
+        self.assertEqual((entry['calls'], entry['rows'], entry['slow']), (1, 4, 1))
+        self.assertEqual(entry['problems'], [])
+        recent = store.query_log.stats()['recent_slow'][-1]
+        self.assertIn("idx_tickets_status_score", " ".join(recent['plan']))
+        self.assertIn("Slow query", logs.output[0])
+
+    def test_fast_statements_are_timed_but_not_logged(self):
+        store = self.store(slow_ms=10_000)
+        with self.assertNoLogs("vader_sentiment.querylog", "WARNING"):
+            store.get_ticket(1)
+        entry = statement(store.query_log, "SELECT * FROM tickets WHERE id = ?")
+        self.assertEqual((entry['calls'], entry['rows'], entry['slow']), (1, 1, 0))
+
+    def test_explain_all_flags_full_scans_once(self):
+        store = self.store(slow_ms=None, explain_all=True)
+        with self.assertLogs("vader_sentiment.querylog", "WARNING") as logs:
+            store.get_stats()
+            store.get_stats()
+        scans = [line for line in logs.output if "AVG(compound)" in line]
+        self.assertEqual(len(scans), 1)
+        self.assertIn("full_scan", scans[0])
+        self.assertEqual(statement(store.query_log, "SELECT AVG(compound)")['problems'], ["full_scan"])
+
+    def test_no_allowed_ordering_needs_a_sort(self):
+        store = self.store(slow_ms=None, explain_all=True)
+        for order_by in sorted(ORDERINGS):
+            store.get_all_tickets(order_by=order_by)
+            entry = statement(store.query_log, f"FROM tickets WHERE 1=1 ORDER BY {order_by}")
+            self.assertNotIn("temp_sort", entry['problems'], order_by)
+
+    def test_plan_problems(self):
+        self.assertEqual(plan_problems(["SCAN tickets", "USE TEMP B-TREE FOR ORDER BY"]), ["full_scan", "temp_sort"])
+        self.assertEqual(plan_problems(["SCAN tickets USING INDEX idx_tickets_created_at"]), [])
+        self.assertEqual(plan_problems(["SCAN sqlite_master"]), [])
+
+
+class TestOrderByWhitelist(unittest.TestCase):
+
+    def test_rejects_unlisted_orderings_on_both_engines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for store in (TicketStore(os.path.join(tmp, "t.db")), create_store({"STORAGE": "memory"})):
+                store.add_ticket("hello", "A", {"priority": "normal", "priority_score": 0.1})
+                for bad in ("message", "priority_score DESC; DROP TABLE tickets", "random()", "customer_name ASC"):
+                    with self.assertRaises(ValueError):
+                        store.get_all_tickets(order_by=bad)
+                self.assertEqual(len(store.get_all_tickets(order_by="ID desc")), 1)
+
+    def test_server_reports_query_stats(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            client = create_app({"DB_PATH": os.path.join(tmp, "t.db"), "WARM_UP": False,
+                                 "SLOW_QUERY_MS": 10_000}).test_client()
+            client.get("/api/tickets")
+            queries = client.get("/api/stats").get_json()["queries"]
+        self.assertEqual(queries["slow_ms"], 10_000)
+        self.assertTrue(any("FROM tickets WHERE 1=1" in s["sql"] for s in queries["statements"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
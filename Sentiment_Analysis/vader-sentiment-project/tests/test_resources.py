@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from vader_sentiment import resources, structure, summarizer
+from vader_sentiment.resources import NLTKResources
+
+
+@unittest.skipUnless(resources.NLTK_AVAILABLE, "nltk not installed")
+class TestNLTKResources(unittest.TestCase):
+
+    def setUp(self):
+        self.saved = (resources.RESOURCES.tokenizer, resources.RESOURCES.tagger,
+                      resources.RESOURCES._pos_tagger, resources.RESOURCES.details)
+        self.saved_path = list(resources.nltk.data.path)
+        self.empty_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        (resources.RESOURCES.tokenizer, resources.RESOURCES.tagger,
+         resources.RESOURCES._pos_tagger, resources.RESOURCES.details) = self.saved
+        resources.nltk.data.path[:] = self.saved_path
+        self.empty_dir.cleanup()
+
+    def _missing_everything(self):
+        # Make every lookup fail regardless of what is installed on this machine.
+        return mock.patch.object(resources.nltk.data, "find", side_effect=LookupError("missing"))
+
+    def test_missing_resources_select_fallbacks_without_downloading(self):
+        with self._missing_everything(), mock.patch.object(resources.nltk, "download") as download:
+            status = NLTKResources().load(data_dir=self.empty_dir.name)
+        download.assert_not_called()
+        self.assertEqual((status["tokenizer"], status["tagger"]), ("regex", "heuristic"))
+        self.assertIn(self.empty_dir.name, resources.nltk.data.path[0])
+
+    def test_download_is_only_attempted_when_enabled(self):
+        with self._missing_everything(), mock.patch.object(resources.nltk, "download", return_value=False) as download:
+            NLTKResources().load(data_dir=self.empty_dir.name, download=True)
+        self.assertTrue(download.called)
+        self.assertEqual(download.call_args.kwargs["download_dir"], self.empty_dir.name)
+
+    def test_requests_do_no_lookups_after_load(self):
+        with self._missing_everything():
+            resources.load(warm=False)
+        with mock.patch.object(resources.nltk.data, "find", side_effect=AssertionError("I/O in request path")), \
+                mock.patch.object(resources.nltk, "download", side_effect=AssertionError("download in request path")):
+            self.assertEqual(structure.split_words("Not good, really!"), ["Not", "good", ",", "really", "!"])
+            self.assertEqual(summarizer._get_nearest_noun(["the", "app", "is", "slow"], 3), "slow")
+
+    def test_stats_report_modes(self):
+        from support_server import create_app
+        with self._missing_everything(), tempfile.TemporaryDirectory() as tmp:
+            client = create_app({"DB_PATH": tmp + "/tickets.db", "WARM_UP": False,
+                                 "NLTK_DATA_DIR": self.empty_dir.name}).test_client()
+            nltk_status = client.get("/api/stats").get_json()["nltk"]
+        self.assertEqual(nltk_status["tokenizer"], "regex")
+        self.assertEqual(nltk_status["data_dir"], self.empty_dir.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from support_server import create_app
+
+
+class TestSupportServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "tickets.db")
+        self.app = create_app({"DB_PATH": self.db_path, "WARM_UP": False})
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_factory_defaults_to_production_settings(self):
+        self.assertFalse(self.app.debug)
+        self.assertEqual(self.app.config["DB_PATH"], self.db_path)
+
+    def test_submit_and_fetch_ticket(self):
+        resp = self.client.post("/api/tickets", json={"customer_name": "Ann", "message": "System is DOWN! HELP!!!"})
+        self.assertEqual(resp.status_code, 201)
+        ticket_id = resp.get_json()["ticket_id"]
+
+        resp = self.client.get(f"/api/tickets/{ticket_id}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()["ticket"]["customer_name"], "Ann")
+
+    def test_errors_hide_traceback_outside_debug(self):
+        def boom(text, **kwargs):
+            raise RuntimeError("boom")
+        self.app.extensions["support"].prioritizer.prioritize = boom
+        resp = self.client.post("/api/analyze", json={"text": "hello"})
+        self.assertEqual(resp.status_code, 500)
+        self.assertNotIn("traceback", resp.get_json())
+
+    def test_analyze_compact_format(self):
+        text = "I am not happy. The app is very slow!!"
+        verbose = self.client.post("/api/analyze", json={"text": text}).get_json()
+        compact = self.client.post("/api/analyze?format=compact", json={"text": text}).get_json()
+        words = verbose["analysis"]["segments"][0]["structure"]["words"]
+        table = compact["analysis"]["segments"][0]["structure"]["words"]
+        self.assertIsInstance(words, list)
+        self.assertEqual(table["w"], [w["word"] for w in words])
+        self.assertEqual(verbose["priority_data"], compact["priority_data"])
+
+    def test_aging_queue(self):
+        self.client.post("/api/tickets", json={"message": "Quick billing question"})
+        self.client.post("/api/tickets", json={"message": "Someone hacked my account! URGENT!!"})
+        body = self.client.get("/api/tickets/aging?limit=5").get_json()
+        self.assertEqual(body["aging_per_hour"], 0.01)
+        self.assertEqual(body["tickets"][0]["priority"], "critical")
+        self.assertGreaterEqual(body["tickets"][0]["aged_score"], body["tickets"][1]["aged_score"])
+        self.assertEqual(self.client.get("/api/tickets/aging?limit=x").status_code, 400)
+
+    def test_empty_message_rejected(self):
+        resp = self.client.post("/api/tickets", json={"message": "  "})
+        self.assertEqual(resp.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
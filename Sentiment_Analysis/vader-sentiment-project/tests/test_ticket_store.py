@@ -0,0 +1,285 @@
+import calendar
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+
+from vader_sentiment.analyzer import SentimentAnalyzer
+from vader_sentiment.budget import AnalysisBudget
+from vader_sentiment.querylog import QueryLog
+from vader_sentiment.rescore import default_prioritizer, rescore_tickets, server_config
+from vader_sentiment.ticket_prioritizer import TicketPrioritizer
+from vader_sentiment.ticket_store import TicketStore
+
+MESSAGES = [
+    "System is completely DOWN! HELP!!!",
+    "I am extremely angry and frustrated about this service",
+    "Just a quick question about billing",
+    "Someone hacked my account! URGENT!!",
+    "Love the new dashboard, great work",
+]
+
+
+class StoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "tickets.db")
+        self.store = TicketStore(db_path=self.db_path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+
+class TestSearch(StoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ids = [
+            self.store.add_ticket("I need a refund for my last order", "A", {'priority': 'high', 'priority_score': 0.5}),
+            self.store.add_ticket("Password reset email never arrives", "B", {'priority': 'normal'}),
+            self.store.add_ticket("Refunds take forever, reset my password too", "C", {'priority': 'normal'}),
+        ]
+
+    def test_search_matches_stems_and_filters(self):
+        self.assertTrue(self.store.fts_enabled)
+        found = {t['id'] for t in self.store.search("refund")}
+        self.assertEqual(found, {self.ids[0], self.ids[2]})
+        found = {t['id'] for t in self.store.search("refund", priority='high')}
+        self.assertEqual(found, {self.ids[0]})
+        self.assertIn('[', self.store.search("refund")[0]['snippet'])
+
+    def test_phrase_query(self):
+        found = [t['id'] for t in self.store.search('"password reset"')]
+        self.assertEqual(found, [self.ids[1]])
+        found = {t['id'] for t in self.store.search('password reset')}
+        self.assertEqual(found, {self.ids[1], self.ids[2]})
+
+    def test_index_follows_deletes_and_status(self):
+        self.store.delete_ticket(self.ids[0])
+        self.store.update_ticket_status(self.ids[2], 'resolved')
+        self.assertEqual([t['id'] for t in self.store.search("refund", status='resolved')], [self.ids[2]])
+        self.assertEqual(self.store.search("refund", status='new'), [])
+
+    def test_operators_in_user_input_are_literal(self):
+        self.assertEqual(self.store.search('refund AND (NOT "'), [])
+
+
+class TestTrends(StoreTestCase):
+
+    def _add(self, created_at, priority, compound, emotion=None):
+        ticket_id = self.store.add_ticket("msg", "Cust", {'priority': priority, 'compound': compound, 'emotion': emotion})
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('UPDATE tickets SET created_at = ? WHERE id = ?', (created_at, ticket_id))
+        conn.commit()
+        conn.close()
+        return ticket_id
+
+    def test_rollups_track_inserts_updates_and_deletes(self):
+        self._add("2026-03-01T09:15:00", "critical", -0.8, "anger")
+        second = self._add("2026-03-01T09:45:00", "normal", 0.4)
+        third = self._add("2026-03-02T10:00:00", "high", -0.4, "anger")
+
+        days = self.store.get_trends(bucket='day')
+        self.assertEqual([d['bucket_start'] for d in days], ["2026-03-01T00:00:00", "2026-03-02T00:00:00"])
+        self.assertEqual(days[0]['tickets'], 2)
+        self.assertEqual(days[0]['priority'], {'critical': 1, 'normal': 1})
+        self.assertAlmostEqual(days[0]['avg_compound'], -0.2)
+        self.assertEqual(days[0]['emotion'], {'anger': 1, 'none': 1})
+
+        self.store.update_ticket_status(second, 'resolved')
+        self.store.delete_ticket(third)
+        hours = self.store.get_trends(start="2026-03-01T00:00:00", end="2026-03-03T00:00:00", bucket='hour')
+        self.assertEqual(len(hours), 1)
+        self.assertEqual(hours[0]['status'], {'new': 1, 'resolved': 1})
+
+    def test_existing_tickets_are_backfilled(self):
+        self._add("2026-03-01T09:15:00", "critical", -0.8)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('DROP TABLE ticket_rollups')
+        conn.commit()
+        conn.close()
+        store = TicketStore(db_path=self.db_path)
+        self.assertEqual(store.get_trends(bucket='day')[0]['tickets'], 1)
+
+    def test_invalid_bucket(self):
+        with self.assertRaises(ValueError):
+            self.store.get_trends(bucket=90)
+
+
+class TestAging(StoreTestCase):
+
+    NOW = datetime(2026, 3, 4, 12, 0, 0)
+
+    def _add(self, created_at, priority, score):
+        ticket_id = self.store.add_ticket("msg", "Cust", {'priority': priority, 'priority_score': score})
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('UPDATE tickets SET created_at = ? WHERE id = ?', (created_at, ticket_id))
+        conn.commit()
+        conn.close()
+        return ticket_id
+
+    def test_waiting_normal_ticket_outranks_fresh_high_one(self):
+        old_normal = self._add("2026-03-01T12:00:00", "normal", 0.3)
+        fresh_high = self._add("2026-03-04T11:00:00", "high", 0.6)
+        fresh_critical = self._add("2026-03-04T11:30:00", "critical", 0.9)
+        queue = self.store.get_aging_queue(now=self.NOW)
+        self.assertEqual([t['id'] for t in queue], [old_normal, fresh_critical, fresh_high])
+        self.assertEqual([t['aged_score'] for t in queue], [1.02, 0.905, 0.61])
+
+        self.store.update_priorities([(fresh_high, {'priority': 'critical', 'priority_score': 1.5})])
+        self.assertEqual(self.store.get_aging_queue(limit=1, now=self.NOW)[0]['id'], fresh_high)
+        self.store.update_ticket_status(fresh_high, 'resolved')
+        self.assertEqual(self.store.get_aging_queue(limit=1, now=self.NOW)[0]['id'], old_normal)
+
+    def test_rate_change_rekeys_existing_tickets(self):
+        old_normal = self._add("2026-03-03T12:00:00", "normal", 0.3)
+        fresh_high = self._add("2026-03-04T11:00:00", "high", 0.6)
+        self.assertEqual(self.store.get_aging_queue(now=self.NOW)[0]['id'], fresh_high)
+        self.store.set_aging_rate(0.05)
+        self.assertEqual(self.store.get_aging_queue(now=self.NOW)[0]['id'], old_normal)
+        # The rate is stored with the tickets; reopening keeps it unless told otherwise.
+        self.assertEqual(TicketStore(db_path=self.db_path).aging_per_hour, 0.05)
+        reopened = TicketStore(db_path=self.db_path, aging_per_hour=0.01)
+        self.assertEqual(reopened.get_aging_queue(now=self.NOW)[0]['id'], fresh_high)
+        with self.assertRaises(ValueError):
+            self.store.set_aging_rate(0)
+
+    def test_existing_tickets_are_backfilled(self):
+        ticket_id = self._add("2026-03-01T12:00:00", "normal", 0.3)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('UPDATE tickets SET aging_key = NULL')
+        conn.commit()
+        conn.close()
+        store = TicketStore(db_path=self.db_path)
+        self.assertEqual(store.get_ticket(ticket_id)['aging_key'], calendar.timegm((2026, 3, 1, 12, 0, 0)) - 108000)
+
+    def test_aging_view_is_an_index_scan(self):
+        store = TicketStore(db_path=self.db_path, query_log=QueryLog(slow_ms=None, explain_all=True))
+        store.get_aging_queue()
+        entry = next(s for s in store.query_log.stats()['statements'] if 'ORDER BY aging_key' in s['sql'])
+        self.assertEqual(entry['problems'], [])
+
+
+LOG = "".join(f"ERROR worker-{i % 7} request {i} failed: connection reset by peer\n" for i in range(400))
+
+
+class TestCompression(StoreTestCase):
+
+    def _raw(self, ticket_id):
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('SELECT message, message_codec, length(message_z) FROM tickets WHERE id = ?',
+                           (ticket_id,)).fetchone()
+        conn.close()
+        return row
+
+    def test_large_messages_are_stored_compressed(self):
+        message = "The export crashes, log below:\n" + LOG + "Traceback: KeyError 'zebra'"
+        big = self.store.add_ticket(message, "A", {'priority': 'high', 'priority_score': 0.5})
+        small = self.store.add_ticket("Short question about billing", "B", {'priority': 'normal'})
+
+        stored, codec, packed_len = self._raw(big)
+        self.assertEqual((len(stored), codec), (280, 'zlib'))
+        self.assertLess(packed_len, len(message) // 10)
+        self.assertEqual(self._raw(small), ("Short question about billing", None, None))
+
+        self.assertEqual(self.store.get_ticket(big)['message'], message)
+        listed = {t['id']: t for t in self.store.get_all_tickets()}
+        self.assertEqual(listed[big]['message'], message[:280])
+        self.assertEqual(listed[big]['message_codec'], 'zlib')
+        self.assertEqual([t['message'] for t in self.store.iter_tickets()], [message, "Short question about billing"])
+        self.assertEqual(next(self.store.iter_ticket_chunks())[0][1], message)
+
+        # The index covers the compressed tail of the message, not just the preview.
+        results = self.store.search("zebra")
+        self.assertEqual([t['id'] for t in results], [big])
+        self.assertIn("[zebra]", results[0]['snippet'])
+        self.store.delete_ticket(big)
+        self.assertEqual(self.store.search("zebra"), [])
+
+    def test_compression_can_be_disabled(self):
+        plain = TicketStore(db_path=self.db_path, compress_threshold=None)
+        self.assertIsNone(self._raw(plain.add_ticket(LOG, "B", None))[1])
+
+    def test_existing_database_is_migrated(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript('''
+            DROP TABLE tickets; DROP TABLE tickets_fts; DROP VIEW tickets_fts_content;
+            CREATE TABLE tickets (id INTEGER PRIMARY KEY AUTOINCREMENT, customer_name TEXT,
+                message TEXT NOT NULL, priority TEXT NOT NULL, priority_score REAL, emotion TEXT, compound REAL,
+                intensity TEXT, urgency_flagged INTEGER, flagged_keywords TEXT, reason TEXT,
+                status TEXT DEFAULT 'new', created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+            CREATE VIRTUAL TABLE tickets_fts USING fts5(message, content='tickets', content_rowid='id');
+        ''')
+        conn.execute("INSERT INTO tickets (message, priority, created_at) VALUES (?, 'normal', '2026-03-01T09:00:00')",
+                     (LOG + "zebra",))
+        conn.execute("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')")
+        conn.commit()
+        conn.close()
+
+        store = TicketStore(db_path=self.db_path)
+        self.assertEqual(self._raw(1)[1], 'zlib')
+        self.assertEqual(store.get_ticket(1)['message'], LOG + "zebra")
+        self.assertEqual([t['id'] for t in store.search("zebra")], [1])
+        self.assertEqual(store.compress_messages(), 0)
+
+
+class TestRescore(StoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.prioritizer = TicketPrioritizer(SentimentAnalyzer())
+        for msg in MESSAGES:
+            self.store.add_ticket(msg, "Cust", {'priority': 'normal', 'priority_score': 0.0})
+
+    def test_rescore_updates_and_stamps_version(self):
+        summary = rescore_tickets(self.store, self.prioritizer, chunk_size=2)
+        self.assertEqual(summary['updated'], len(MESSAGES))
+        self.assertEqual(summary['chunks'], 3)
+        hacked = self.store.get_all_tickets(priority='critical')
+        self.assertTrue(any('hacked' in t['message'] for t in hacked))
+        version = self.prioritizer.scoring_version()
+        self.assertTrue(all(t['scoring_version'] == version for t in self.store.get_all_tickets()))
+
+        again = rescore_tickets(self.store, self.prioritizer, only_stale=True)
+        self.assertEqual(again['updated'], 0)
+
+    def test_resumes_from_checkpoint(self):
+        class Interrupt(Exception):
+            pass
+
+        def stop_after_first(summary):
+            raise Interrupt()
+
+        with self.assertRaises(Interrupt):
+            rescore_tickets(self.store, self.prioritizer, chunk_size=2, job="resume", progress=stop_after_first)
+        self.assertEqual(self.store.get_checkpoint("resume"), 2)
+
+        summary = rescore_tickets(self.store, self.prioritizer, chunk_size=2, job="resume")
+        self.assertEqual(summary['resumed_after'], 2)
+        self.assertEqual(summary['updated'], len(MESSAGES) - 2)
+        self.assertEqual(self.store.get_checkpoint("resume"), 0)
+
+    def test_version_changes_with_thresholds(self):
+        before = self.prioritizer.scoring_version()
+        self.prioritizer.CRITICAL_COMPOUND = -0.6
+        self.assertNotEqual(before, self.prioritizer.scoring_version())
+
+    def test_version_changes_with_the_budget(self):
+        budgeted = TicketPrioritizer(SentimentAnalyzer(budget=AnalysisBudget(max_chars=1000)))
+        shorter = TicketPrioritizer(SentimentAnalyzer(budget=AnalysisBudget(max_chars=500)))
+        versions = {p.scoring_version() for p in (self.prioritizer, budgeted, shorter)}
+        self.assertEqual(len(versions), 3)
+
+    def test_workers_score_like_the_server(self):
+        config = server_config({"SUPPORT_ANALYSIS_MAX_SENTENCES": "3", "SUPPORT_DB_PATH": "x.db"})
+        self.assertEqual((config["ANALYSIS_MAX_SENTENCES"], config["LEXICON_RELOAD_SECONDS"]), (3, None))
+        budget = default_prioritizer(config).analyzer.budget
+        self.assertEqual((budget.max_chars, budget.max_sentences), (20000, 3))
+        self.assertIsNotNone(default_prioritizer().analyzer.budget)
+
+
+if __name__ == '__main__':
+    unittest.main()
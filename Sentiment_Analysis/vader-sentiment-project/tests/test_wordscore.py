@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+import unittest
+
+from vaderSentiment.vaderSentiment import BOOSTER_DICT, SentimentIntensityAnalyzer
+
+from vader_sentiment import wordscore
+from vader_sentiment.analyzer import SentimentAnalyzer
+from vader_sentiment.lexicon import LexiconRegistry
+
+
+class TestScoreWords(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.vader = SentimentIntensityAnalyzer()
+
+    def assertMatchesVader(self, tokens):
+        expected = [self.vader.polarity_scores(t) for t in tokens]
+        self.assertEqual(wordscore.score_words(tokens, self.vader), expected)
+
+    def test_whole_lexicon_matches_polarity_scores(self):
+        self.assertMatchesVader(list(self.vader.lexicon))
+
+    def test_case_punctuation_and_emphasis(self):
+        tokens = []
+        for w in ("good", "terrible", "no", "table", "lol"):
+            tokens += [w.upper(), w.capitalize(), w + "!", w + "!!!!!!", w + "??", w + "????", "..." + w + ",", w + "?!"]
+        self.assertMatchesVader(tokens)
+
+    def test_boosters_emoticons_and_odd_tokens(self):
+        tokens = list(BOOSTER_DICT) + [",", "!", "??", "", "  ", ":)", ":-(", "<3", "but", "n't", "can't", "'s"]
+        self.assertMatchesVader(tokens)
+
+    def test_emoji_and_whitespace_fall_back_to_vader(self):
+        self.assertMatchesVader(["\U0001F600", "great\U0001F620", "not good", "—"])
+
+    def test_repeated_tokens_get_independent_dicts(self):
+        a, b = wordscore.score_words(["happy", "happy"], self.vader)
+        a["compound"] = 0
+        self.assertNotEqual(b["compound"], 0)
+
+
+class TestWordMode(unittest.TestCase):
+
+    def test_segments_match_per_token_scoring(self):
+        analyzer = SentimentAnalyzer(sentence_cache=False)
+        text = "Great support, but the refund is LATE and I'm furious!!"
+        res = analyzer.analyze(text, mode="word")
+        for seg in res["segments"]:
+            self.assertEqual(seg["vader"], analyzer.vader.polarity_scores(seg["text"]))
+            self.assertIsNone(seg["structure"])
+        self.assertIn("Strongest words: great (+0.625), furious (-0.572)", res["summary"])
+        self.assertIn("tone_label", res["context"])
+
+    def test_profile_overlay_applies(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "billing.json"), "w", encoding="utf-8") as f:
+                json.dump({"chargeback": -3.0, "good": None}, f)
+            analyzer = SentimentAnalyzer(sentence_cache=False, lexicons=LexiconRegistry(tmp, reload_interval=None))
+            base, profiled = (analyzer.score_words(["chargeback", "good"], profile=p) for p in (None, "billing"))
+        self.assertEqual(base[0]["compound"], 0.0)
+        self.assertLess(profiled[0]["compound"], 0)
+        self.assertGreater(base[1]["compound"], 0)
+        self.assertEqual(profiled[1]["compound"], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
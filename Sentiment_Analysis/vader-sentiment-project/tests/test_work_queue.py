@@ -0,0 +1,139 @@
+import os
+import tempfile
+import time
+import unittest
+
+from vader_sentiment.memory_store import MemoryTicketStore
+from vader_sentiment.ticket_store import TicketStore
+from vader_sentiment.work_queue import WorkQueue
+
+from support_server import create_app
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestWorkQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.queue = WorkQueue(lease_seconds=60, clock=self.clock)
+        self.queue.seed([(1, 0.2), (2, 0.9), (3, 0.5), (4, 0.9)])
+
+    def test_claims_in_priority_then_id_order(self):
+        claimed = [self.queue.claim()['ticket_id'] for _ in range(4)]
+        self.assertEqual(claimed, [2, 4, 3, 1])
+        self.assertIsNone(self.queue.claim())
+
+    def test_updates_and_discards_are_lazy(self):
+        self.queue.push(1, 1.0)
+        self.queue.discard(2)
+        self.assertEqual(self.queue.claim()['ticket_id'], 1)
+        self.assertEqual(self.queue.claim()['ticket_id'], 4)
+        self.assertEqual(len(self.queue), 1)
+
+    def test_lease_expiry_and_release(self):
+        lease = self.queue.claim(agent="ann")
+        self.assertEqual(lease['ticket_id'], 2)
+        self.assertFalse(self.queue.release(2, "wrong-token"))
+
+        self.clock.now = 30
+        self.assertTrue(self.queue.renew(2, lease['token']))
+        self.clock.now = 61
+        self.assertEqual(self.queue.claim()['ticket_id'], 4)  # renewed lease still held
+        self.clock.now = 91
+        self.assertEqual(self.queue.claim()['ticket_id'], 2)  # expired, back in the queue
+
+        lease = self.queue.claim()
+        self.assertTrue(self.queue.release(lease['ticket_id'], lease['token']))
+        self.assertEqual(self.queue.claim()['ticket_id'], lease['ticket_id'])
+
+
+class TestStoreLeases(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "tickets.db")
+        self.engines = [TicketStore(db_path=self.db_path), MemoryTicketStore()]
+        for store in self.engines:
+            for score in (0.2, 0.9, 0.5, 0.9):
+                store.add_ticket(f"ticket {score}", "A", {'priority': 'normal', 'priority_score': score})
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_claims_follow_priority_and_status(self):
+        for store in self.engines:
+            first = store.claim_next_ticket(agent="ann")
+            self.assertEqual((first['ticket_id'], first['agent']), (2, "ann"))
+            store.update_ticket_status(4, 'in-progress')
+            self.assertEqual(store.claim_next_ticket()['ticket_id'], 3)
+            self.assertEqual(store.queue_stats(), {'waiting': 1, 'leased': 2})
+            self.assertFalse(store.release_ticket(2, "wrong-token"))
+            self.assertTrue(store.release_ticket(2, first['token']))
+            self.assertEqual(store.claim_next_ticket()['ticket_id'], 2)
+            store.delete_ticket(1)
+            self.assertIsNone(store.claim_next_ticket())
+
+    def test_processes_sharing_a_database_never_share_a_lease(self):
+        other = TicketStore(db_path=self.db_path)
+        claimed = [store.claim_next_ticket()['ticket_id'] for store in (self.engines[0], other) * 2]
+        self.assertEqual(claimed, [2, 4, 3, 1])
+        self.assertIsNone(other.claim_next_ticket())
+
+    def test_expired_leases_are_claimed_again(self):
+        store = self.engines[0]
+        store.claim_next_ticket(lease_seconds=0.05)
+        time.sleep(0.1)
+        self.assertEqual(store.claim_next_ticket()['ticket_id'], 2)
+
+
+class TestQueueEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.config = {"DB_PATH": os.path.join(self.tmpdir.name, "tickets.db"), "WARM_UP": False,
+                       "DEDUP_THRESHOLD": 0}
+        self.client = create_app(self.config).test_client()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def submit(self, message):
+        data = self.client.post("/api/tickets", json={"message": message}).get_json()
+        return data["ticket_id"], data["priority_data"]["priority_score"]
+
+    def test_next_follows_inserts_status_and_deletes(self):
+        low, low_score = self.submit("Just a quick question about billing")
+        urgent, urgent_score = self.submit("Someone hacked my account! URGENT!!")
+        other, other_score = self.submit("The app is slow and I am a bit annoyed")
+        self.assertGreater(urgent_score, max(low_score, other_score))
+
+        first = self.client.post("/api/queue/next", json={"agent": "ann"}).get_json()
+        self.assertEqual(first["ticket"]["id"], urgent)
+        self.client.patch(f"/api/tickets/{other}/status", json={"status": "in-progress"})
+        self.client.delete(f"/api/tickets/{low}")
+        empty = self.client.post("/api/queue/next", json={}).get_json()
+        self.assertIsNone(empty["ticket"])
+
+        token = first["lease"]["token"]
+        self.assertEqual(self.client.post(f"/api/queue/{urgent}/release", json={"token": "x"}).status_code, 409)
+        self.assertEqual(self.client.post(f"/api/queue/{urgent}/release", json={"token": token}).status_code, 200)
+        self.client.patch(f"/api/tickets/{other}/status", json={"status": "new"})
+
+        # Another worker process on the same database sees the same queue and leases.
+        worker = create_app(self.config).test_client()
+        claimed = [worker.post("/api/queue/next").get_json()["ticket"]["id"],
+                   self.client.post("/api/queue/next").get_json()["ticket"]["id"]]
+        self.assertEqual(claimed, [urgent, other])
+        self.assertIsNone(worker.post("/api/queue/next").get_json()["ticket"])
+
+
+if __name__ == '__main__':
+    unittest.main()